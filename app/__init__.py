@@ -1,22 +1,91 @@
 from flask import Flask
-from flask_pymongo import PyMongo
 import os
 from dotenv import load_dotenv 
 from flask_cors import CORS
+from .conexiones import GestorMongo, CLASE_ADMIN, CLASE_PUBLICA
 
 load_dotenv()
 
-mongo = PyMongo()
+mongo = GestorMongo()
+
+def _config_pools():
+    """Pool, timeouts y read preference de cada clase de ruta (admin / público)."""
+    def pool(prefijo, max_pool, min_pool, lectura):
+        return {
+            "maxPoolSize": int(os.getenv(f"MONGO_{prefijo}_MAX_POOL", max_pool)),
+            "minPoolSize": int(os.getenv(f"MONGO_{prefijo}_MIN_POOL", min_pool)),
+            "readPreference": os.getenv(f"MONGO_{prefijo}_READ_PREFERENCE", lectura),
+        }
+    return {
+        CLASE_ADMIN: pool("ADMIN", 10, 1, "primary"),
+        CLASE_PUBLICA: pool("PUBLICO", 50, 4, "primary"),
+    }
 
 def create_app():
     app = Flask(__name__)
     CORS(app)
 
+    # JSON con orjson (ObjectId/datetime nativos) y compresión gzip/brotli (respuestas.py)
+    from .respuestas import ProveedorJSON, compresion, MINIMO_BYTES, NIVEL_GZIP, CALIDAD_BROTLI
+    app.json = ProveedorJSON(app)
+    if os.getenv("COMPRESION", "1") == "1":
+        compresion.init_app(app,
+                            minimo=int(os.getenv("COMPRESION_MINIMO_BYTES", str(MINIMO_BYTES))),
+                            nivel_gzip=int(os.getenv("COMPRESION_NIVEL_GZIP", str(NIVEL_GZIP))),
+                            calidad_brotli=int(os.getenv("COMPRESION_CALIDAD_BROTLI", str(CALIDAD_BROTLI))))
+
     app.config["MONGO_URI"] = os.getenv("MONGO_URI")
+    app.config["MONGO_POOLS"] = _config_pools()
+    app.config["MONGO_OPCIONES"] = {
+        "serverSelectionTimeoutMS": int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+        "connectTimeoutMS": int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000")),
+        "waitQueueTimeoutMS": int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "2000")),
+    }
     app.secret_key = os.getenv("SECRET_KEY")
+    # Motor del ranking IEG: "python", "mongo" (pushdown) o "verificar" (ambos)
+    app.config["RANKING_MODE"] = os.getenv("RANKING_MODE", "python")
 
     mongo.init_app(app)
 
+    # Almacenamiento: "mongo", "memoria" (sin servidor) o "replica" (lecturas en memoria)
+    app.config["STORAGE_BACKEND"] = os.getenv("STORAGE_BACKEND", "mongo")
+    from .models import configurar_repositorio
+    from .repositorios import crear_repositorio
+    configurar_repositorio(crear_repositorio(
+        app.config["STORAGE_BACKEND"], mongo,
+        datos=os.getenv("STORAGE_DATOS"),
+        ttl=float(os.getenv("STORAGE_REPLICA_TTL", "5")),
+    ))
+
+    # Índices declarados en indices.py (únicos de email/codigo_modelo y filtros)
+    if os.getenv("ASEGURAR_INDICES", "1") == "1":
+        from .indices import gestor_indices
+        gestor_indices.asegurar(app.logger)
+
+    from . import metricas
+    metricas.init_app(app, mongo)
+
+    from .cache import catalog_cache, resultados_cache
+    catalog_cache.configurar(float(os.getenv("CATALOG_CACHE_TTL", "2")))
+    resultados_cache.configurar(int(os.getenv("RESULT_CACHE_SIZE", "256")))
+
+    # Índice de dominancia para el top-k (dominancia.py); IEG_INDICE_MIN_MODELOS=0 lo desactiva
+    from . import dominancia
+    dominancia.configurar(int(os.getenv("IEG_INDICE_MIN_MODELOS", str(dominancia.MIN_MODELOS))),
+                          int(os.getenv("IEG_INDICE_K_MAXIMO", str(dominancia.K_MAXIMO))))
+
+    # Hashing de contraseñas en un pool acotado (credenciales.py)
+    from .credenciales import servicio_credenciales, METODO_POR_DEFECTO
+    servicio_credenciales.configurar(
+        os.getenv("PASSWORD_HASH_METODO", METODO_POR_DEFECTO),
+        hilos=int(os.getenv("PASSWORD_HASH_HILOS", "2")),
+        cola=int(os.getenv("PASSWORD_HASH_COLA", "16")),
+        timeout=float(os.getenv("PASSWORD_HASH_TIMEOUT", "3")),
+    )
+
+    from .dashboard import dashboard_stats
+    dashboard_stats.init_app(app, float(os.getenv("DASHBOARD_STATS_TTL", "60")))
+
     from .routes import admin_bp
     app.register_blueprint(admin_bp, url_prefix="/admin")
 
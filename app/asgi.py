@@ -0,0 +1,232 @@
+"""
+Modo asyncio de la API pública: una aplicación ASGI con los endpoints JSON que
+pasan la mayor parte del tiempo esperando a MongoDB:
+  GET  /api/get_marcas
+  GET  /api/get_perfiles
+  POST /api/comparar_resultados
+  GET  /api/reporte/perfil/<id>
+Las lecturas van por un cliente asíncrono (AsyncMongoClient) y las
+independientes se lanzan a la vez: perfil y fila materializada en
+comparar_resultados, perfil y marcas en el reporte, PCs y laptops al recargar
+el catálogo. Mientras esperan, el mismo worker atiende otras peticiones.
+El cálculo (CoreService, recomendador) y las escrituras son los mismos de
+public_routes.py y corren en un hilo (asyncio.to_thread) con el contexto de la
+app Flask, así las respuestas son idénticas a las del modo WSGI.
+El resto de la aplicación sigue en Flask (run:app); el proxy envía estas rutas
+a este proceso:
+  gunicorn -k uvicorn.workers.UvicornWorker app.asgi:aplicacion
+"""
+import asyncio
+import re
+import time
+from urllib.parse import parse_qs
+from bson.objectid import ObjectId
+from .cache import catalog_cache
+from .materializacion import recomendaciones_materializadas
+from .metricas import HTTP_LATENCIA
+from .respuestas import compresion
+from .models import repositorio, PROYECCION_NOMBRE, PROYECCION_PESOS
+from .recomendador import pesos_de
+from .repositorios_async import crear_repositorio_async
+from . import public_routes as rutas
+
+MAX_CUERPO = 1024 * 1024
+ENCABEZADOS_CORS = [(b"access-control-allow-origin", b"*")]
+
+
+class Peticion:
+    __slots__ = ("metodo", "ruta", "query", "cuerpo")
+
+    def __init__(self, metodo, ruta, query, cuerpo):
+        self.metodo = metodo
+        self.ruta = ruta
+        self.query = query
+        self.cuerpo = cuerpo
+
+    def arg(self, nombre):
+        valores = self.query.get(nombre)
+        return valores[0] if valores else None
+
+    def json(self, cargar):
+        """Cuerpo JSON como dict, o None si no es un objeto JSON válido."""
+        try:
+            data = cargar(self.cuerpo) if self.cuerpo else None
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+
+
+def _id_o_none(id):
+    return ObjectId(id) if ObjectId.is_valid(id) else None
+
+
+async def _ninguno():
+    return None
+
+
+class AplicacionAsync:
+    """Aplicación ASGI; crea la app Flask (configuración y singletons) en la primera llamada."""
+
+    def __init__(self, flask_app=None):
+        self.flask_app = flask_app
+        self.repositorio = None
+        self._rutas = {
+            ("GET", "/api/get_marcas"): ("public.get_marcas_api", self.get_marcas),
+            ("GET", "/api/get_perfiles"): ("public.get_perfiles_api", self.get_perfiles),
+            ("POST", "/api/comparar_resultados"): ("public.comparar_resultados", self.comparar_resultados),
+        }
+        self._reporte = re.compile(r"^/api/reporte/perfil/([^/]+)$")
+
+    def _iniciar(self):
+        if self.flask_app is None:
+            from . import create_app
+            self.flask_app = create_app()
+        if self.repositorio is None:
+            config = self.flask_app.config
+            opciones = {**config.get("MONGO_OPCIONES", {}), **config.get("MONGO_POOLS", {}).get("publico", {})}
+            self.repositorio = crear_repositorio_async(config.get("STORAGE_BACKEND", "mongo"),
+                                                       config.get("MONGO_URI"), opciones, repositorio())
+
+    def _en_contexto(self, funcion, *args):
+        with self.flask_app.app_context():
+            return funcion(*args)
+
+    async def _sincrono(self, funcion, *args):
+        """Ejecuta código síncrono de public_routes en un hilo, con el contexto de la app."""
+        return await asyncio.to_thread(self._en_contexto, funcion, *args)
+
+    def _modo(self, peticion, data=None):
+        modo = (data or {}).get("modo") or peticion.arg("modo") or self.flask_app.config.get("RANKING_MODE")
+        return modo if modo in rutas.MODOS_RANKING else "python"
+
+    # ENDPOINTS
+
+    async def get_marcas(self, peticion):
+        marcas = await self.repositorio.listar("marcas", None, PROYECCION_NOMBRE)
+        return {"marcas": [{"id": str(m["_id"]), "nombre": m["nombre"]} for m in marcas]}, 200
+
+    async def get_perfiles(self, peticion):
+        perfiles = await self.repositorio.listar("perfiles_uso", None, PROYECCION_NOMBRE)
+        return {"perfiles": [{"id": str(p["_id"]), "nombre": p["nombre"]} for p in perfiles]}, 200
+
+    async def comparar_resultados(self, peticion):
+        data = peticion.json(self.flask_app.json.loads)
+        if data is None: return {"error": "Cuerpo JSON inválido"}, 400
+        perfil_id = data.get("perfil_id")
+        marca_id = data.get("marca_id")
+        k = rutas._entero_acotado(data.get("k"), rutas.TOP_K_DEFECTO, rutas.TOP_K_MAXIMO)
+        cursor = data.get("cursor")
+        error = rutas._error_ids(perfil_id, marca_id)
+        if error: return {"error": error}, 400
+
+        modo = self._modo(peticion, data)
+        materializable = not cursor and modo == "python" and k == recomendaciones_materializadas.K
+        await catalog_cache.version_vigente_async(self.repositorio)
+
+        # Perfil y fila materializada a la vez
+        id = _id_o_none(perfil_id)
+        lecturas = [self.repositorio.obtener("perfiles_uso", {"_id": id}, PROYECCION_PESOS) if id
+                    else _ninguno()]
+        if materializable:
+            clave = recomendaciones_materializadas.clave(perfil_id, marca_id)
+            lecturas.append(self.repositorio.obtener(recomendaciones_materializadas.COLECCION, {"_id": clave}))
+        perfil, *materializada = await asyncio.gather(*lecturas)
+
+        # El LRU de resultados se consulta antes que la fila (en el hilo, como en Flask)
+        leer_fila = (lambda: materializada[0]) if materializable else None
+        return await self._sincrono(rutas._comparar, data, perfil, perfil_id, marca_id, k, cursor,
+                                    modo, materializable, leer_fila)
+
+    async def reporte_perfil(self, peticion, perfil_id):
+        id = _id_o_none(perfil_id)
+        if id is None: return {"error": "Perfil no encontrado"}, 404
+        perfil, marcas, _ = await asyncio.gather(
+            self.repositorio.obtener("perfiles_uso", {"_id": id}, PROYECCION_PESOS),
+            self.repositorio.listar("marcas", None, PROYECCION_NOMBRE),
+            catalog_cache.version_vigente_async(self.repositorio),
+        )
+        preparado = (perfil, pesos_de(perfil), {str(m["_id"]): m for m in marcas}) if perfil else None
+        return await self._sincrono(rutas._reporte, perfil_id, preparado, self._modo(peticion))
+
+    # ASGI
+
+    def _resolver(self, metodo, ruta):
+        """(endpoint, handler, args) de la ruta; handler None si la ruta existe con otro método."""
+        coincidencia = self._reporte.match(ruta)
+        if coincidencia:
+            if metodo != "GET": return "public.reporte_analitico_perfil", None, ()
+            return "public.reporte_analitico_perfil", self.reporte_perfil, coincidencia.groups()
+        for (metodo_ruta, patron), (endpoint, handler) in self._rutas.items():
+            if patron == ruta:
+                return (endpoint, handler, ()) if metodo_ruta == metodo else (endpoint, None, ())
+        return None, None, ()
+
+    async def _leer_cuerpo(self, receive):
+        partes = []
+        tamano = 0
+        while True:
+            mensaje = await receive()
+            if mensaje["type"] == "http.disconnect": return None
+            partes.append(mensaje.get("body", b""))
+            tamano += len(partes[-1])
+            if tamano > MAX_CUERPO: return None
+            if not mensaje.get("more_body"): return b"".join(partes)
+
+    async def _responder(self, send, status, cuerpo, extra=(), accept_encoding=None):
+        datos = self.flask_app.json.codificar(cuerpo) + b"\n" if cuerpo is not None else b""
+        datos, codificacion = compresion.aplicar(datos, "application/json", accept_encoding)
+        if compresion.activa: extra = (*extra, (b"vary", b"Accept-Encoding"))
+        if codificacion: extra = (*extra, (b"content-encoding", codificacion.encode()))
+        encabezados = [(b"content-type", b"application/json"), (b"content-length", str(len(datos)).encode()),
+                       *ENCABEZADOS_CORS, *extra]
+        await send({"type": "http.response.start", "status": status, "headers": encabezados})
+        await send({"type": "http.response.body", "body": datos})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            mensaje = await receive()
+            if mensaje["type"] == "lifespan.startup":
+                self._iniciar()
+                await send({"type": "lifespan.startup.complete"})
+            elif mensaje["type"] == "lifespan.shutdown":
+                if self.repositorio is not None: await self.repositorio.cerrar()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] != "http": return
+        self._iniciar()
+
+        inicio = time.perf_counter()
+        metodo = scope["method"]
+        encabezados = dict(scope["headers"])
+        endpoint, handler, args = self._resolver(metodo, scope["path"])
+        if metodo == "OPTIONS" and endpoint:
+            # Preflight de CORS, como flask_cors en la app WSGI
+            solicitados = encabezados.get(b"access-control-request-headers", b"")
+            return await self._responder(send, 200, None, [
+                (b"access-control-allow-methods", b"GET, POST, OPTIONS"),
+                (b"access-control-allow-headers", solicitados),
+            ])
+        if endpoint is None:
+            return await self._responder(send, 404, {"error": "No encontrado"})
+        if handler is None:
+            return await self._responder(send, 405, {"error": "Método no permitido"})
+
+        cuerpo = await self._leer_cuerpo(receive)
+        if cuerpo is None:
+            return await self._responder(send, 413, {"error": "Cuerpo demasiado grande"})
+        peticion = Peticion(metodo, scope["path"], parse_qs(scope.get("query_string", b"").decode()), cuerpo)
+        try:
+            respuesta, status = await handler(peticion, *args)
+        except Exception:
+            self.flask_app.logger.exception("Error en %s %s", metodo, scope["path"])
+            respuesta, status = {"error": "Error interno"}, 500
+        await self._responder(send, status, respuesta,
+                              accept_encoding=encabezados.get(b"accept-encoding", b"").decode("latin-1"))
+        HTTP_LATENCIA.labels(endpoint, metodo, status).observe(time.perf_counter() - inicio)
+
+
+aplicacion = AplicacionAsync()
@@ -0,0 +1,88 @@
+import re
+import unicodedata
+from collections import defaultdict
+
+_NO_ALFANUMERICO = re.compile(r"[^a-z0-9]+")
+
+
+def normalizar(texto):
+    """Minúsculas, sin tildes y con cualquier separador reducido a un espacio."""
+    texto = unicodedata.normalize("NFKD", str(texto or "")).encode("ascii", "ignore").decode()
+    return _NO_ALFANUMERICO.sub(" ", texto.lower()).strip()
+
+
+def trigramas(texto):
+    """Trigramas de cada palabra, con relleno para que los prefijos pesen más."""
+    resultado = set()
+    for palabra in normalizar(texto).split():
+        relleno = f"  {palabra} "
+        resultado.update(relleno[i:i + 3] for i in range(len(relleno) - 2))
+    return resultado
+
+
+class IndiceTrigramas:
+    """
+    Índice invertido de trigramas sobre nombre y código de los modelos
+    (PCs y laptops). Tolera errores de tipeo porque compara trigramas y no
+    subcadenas exactas; se mantiene con agregar/quitar en cada escritura.
+    """
+
+    # Fracción mínima de trigramas de la consulta que debe compartir un modelo
+    COBERTURA_MINIMA = 0.34
+
+    def __init__(self):
+        self._postings = defaultdict(set)
+        self._docs = {}
+
+    def __len__(self):
+        return len(self._docs)
+
+    def agregar(self, modelo):
+        clave = str(modelo["_id"])
+        if clave in self._docs: self.quitar(modelo)
+        grams = trigramas(modelo.get("nombre")) | trigramas(modelo.get("codigo_modelo"))
+        self._docs[clave] = (modelo, grams)
+        for g in grams:
+            self._postings[g].add(clave)
+
+    def quitar(self, modelo):
+        clave = str(modelo["_id"])
+        entrada = self._docs.pop(clave, None)
+        if entrada is None: return
+        for g in entrada[1]:
+            claves = self._postings.get(g)
+            if claves is None: continue
+            claves.discard(clave)
+            if not claves: del self._postings[g]
+
+    def reconstruir(self, modelos):
+        self._postings = defaultdict(set)
+        self._docs = {}
+        for m in modelos:
+            self.agregar(m)
+
+    def buscar(self, consulta, limite=10):
+        """Devuelve [(modelo, puntaje)] ordenados por relevancia."""
+        q = normalizar(consulta)
+        grams = trigramas(q)
+        if not grams: return []
+
+        compartidos = defaultdict(int)
+        for g in grams:
+            for clave in self._postings.get(g, ()):
+                compartidos[clave] += 1
+
+        minimo = max(1, int(len(grams) * self.COBERTURA_MINIMA + 0.999))
+        resultados = []
+        for clave, n in compartidos.items():
+            if n < minimo: continue
+            modelo, grams_doc = self._docs[clave]
+            puntaje = n / (len(grams) + len(grams_doc) - n)
+            nombre = normalizar(modelo.get("nombre"))
+            if normalizar(modelo.get("codigo_modelo")) == q: puntaje += 1.0
+            if nombre.startswith(q): puntaje += 0.5
+            elif any(p.startswith(q) for p in nombre.split()): puntaje += 0.25
+            resultados.append((modelo, puntaje))
+
+        resultados.sort(key=lambda x: (-x[1], x[0].get("nombre") or ""))
+        return resultados[:limite]
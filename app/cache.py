@@ -0,0 +1,303 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from .models import (
+    get_all_modelos, get_all_laptops, get_catalog_version, registrar_observador_catalogo,
+    registrar_observador_perfiles, PROYECCION_CATALOGO
+)
+from .stats import NormalizationStats
+from .busqueda import IndiceTrigramas
+from .catalogo import CatalogoCompacto
+from .metricas import contar_cache
+
+TIPOS_POR_COLECCION = {
+    "modelos_computadora": "PC Escritorio",
+    "modelos_laptops": "Laptop",
+}
+
+
+def _entrada_indice(modelo):
+    """El índice de búsqueda solo necesita _id, nombre y código."""
+    return {"_id": modelo["_id"], "nombre": modelo.get("nombre"), "codigo_modelo": modelo.get("codigo_modelo")}
+
+
+class CatalogCache:
+    """
+    Snapshot en memoria (read-through) de modelos_computadora y modelos_laptops,
+    guardado como CatalogoCompacto (arreglos tipados + códigos enteros).
+    La validez se comprueba contra la versión del catálogo guardada en Mongo,
+    que create/update/delete_modelo incrementan. La versión solo se consulta
+    cada `ttl` segundos, así cada worker de gunicorn ve las escrituras de los
+    demás con un retraso máximo de `ttl`.
+    Junto al snapshot se mantienen los límites de normalización (NormalizationStats)
+    y el índice de búsqueda por trigramas: las escrituras del propio worker se
+    aplican de forma incremental, sin recargar.
+    """
+
+    def __init__(self, ttl=2.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._catalogo = None
+        self._version = None
+        self._verificado_en = 0.0
+        self._normalizacion = NormalizationStats()
+        self._indice = IndiceTrigramas()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.incrementales = 0
+
+    def configurar(self, ttl):
+        self.ttl = ttl
+
+    def invalidar(self):
+        """Fuerza la revalidación en la próxima lectura."""
+        with self._lock:
+            self._verificado_en = 0.0
+
+    def aplicar_cambio(self, version, coleccion, antes, despues):
+        """
+        Observador de escrituras del catálogo. Si la escritura es la única desde
+        nuestra versión, se aplica al snapshot (copy-on-write) y a los límites;
+        si no, se deja que la próxima lectura recargue todo.
+        """
+        tipo = TIPOS_POR_COLECCION[coleccion]
+        with self._lock:
+            masivo = antes is None and despues is None
+            if self._catalogo is None or masivo or version != self._version + 1 \
+                    or not self._catalogo.antes_de(antes, despues):
+                # Una recarga entre la escritura y el incremento de versión pudo
+                # leer ya los documentos nuevos: aplicarla otra vez la duplicaría
+                self._verificado_en = 0.0
+                return
+
+            if antes is not None:
+                antes = dict(antes, tipo_equipo=tipo)
+                self._normalizacion.quitar(antes)
+                self._indice.quitar(antes)
+            if despues is not None:
+                despues = {k: v for k, v in despues.items() if k == "_id" or k in PROYECCION_CATALOGO}
+                despues["tipo_equipo"] = tipo
+                self._normalizacion.agregar(despues)
+                self._indice.agregar(_entrada_indice(despues))
+
+            self._catalogo = self._catalogo.con_cambio(tipo, antes, despues)
+            self._version = version
+            self.incrementales += 1
+
+    def _vigente(self, ahora, version=None, ambitos=None):
+        """
+        Snapshot (o snapshot y límites) si sigue vigente: dentro del TTL, o con
+        la misma versión que `version` recién consultada. Si no, None.
+        """
+        with self._lock:
+            if self._catalogo is None: return None
+            if version is None and ahora - self._verificado_en >= self.ttl: return None
+            if version is not None:
+                if version != self._version: return None
+                self._verificado_en = ahora
+            self.hits += 1
+            contar_cache("catalogo", True)
+            return self._leer(ambitos)
+
+    def _instalar(self, version, pcs, laptops, ahora, ambitos=None, previa=None):
+        """
+        Construye el snapshot compacto, los límites y el índice a partir de los
+        documentos. `previa` es la versión instalada al empezar la recarga: si
+        mientras tanto se aplicó una escritura más nueva, no se pisa.
+        """
+        for p in pcs: p['tipo_equipo'] = 'PC Escritorio'
+        for l in laptops: l['tipo_equipo'] = 'Laptop'
+        normalizacion = NormalizationStats()
+        normalizacion.reconstruir(pcs + laptops)
+        indice = IndiceTrigramas()
+        indice.reconstruir(_entrada_indice(m) for m in pcs + laptops)
+        # Los dicts decodificados se descartan: solo queda la versión compacta
+        catalogo = CatalogoCompacto.desde_documentos(pcs, laptops)
+
+        with self._lock:
+            if self._version != previa and self._version is not None and version < self._version:
+                return self._leer(ambitos)
+            recarga = self._catalogo is not None
+            self._catalogo = catalogo
+            self._normalizacion = normalizacion
+            self._indice = indice
+            self._version = version
+            self._verificado_en = ahora
+            if recarga: self.refreshes += 1
+            else: self.misses += 1
+            contar_cache("catalogo", False)
+            return self._leer(ambitos)
+
+    def _snapshot(self, ambitos=None):
+        ahora = time.monotonic()
+        vigente = self._vigente(ahora, ambitos=ambitos)
+        if vigente is not None: return vigente
+
+        previa = self._version
+        version = get_catalog_version()
+        vigente = self._vigente(ahora, version, ambitos)
+        if vigente is not None: return vigente
+
+        pcs = get_all_modelos(PROYECCION_CATALOGO)
+        laptops = get_all_laptops(PROYECCION_CATALOGO)
+        return self._instalar(version, pcs, laptops, ahora, ambitos, previa)
+
+    async def version_vigente_async(self, repositorio):
+        """
+        version_vigente() para el modo asyncio (asgi.py): consulta la versión con
+        el repositorio asíncrono y, si cambió, trae PCs y laptops en paralelo y
+        construye el snapshot en un hilo para no bloquear el event loop.
+        """
+        ahora = time.monotonic()
+        if self._vigente(ahora) is not None: return self._version
+        previa = self._version
+        version = await repositorio.version_catalogo()
+        if self._vigente(ahora, version) is not None: return version
+        pcs, laptops = await asyncio.gather(
+            repositorio.listar("modelos_computadora", None, PROYECCION_CATALOGO),
+            repositorio.listar("modelos_laptops", None, PROYECCION_CATALOGO),
+        )
+        await asyncio.to_thread(self._instalar, version, pcs, laptops, ahora, None, previa)
+        return self._version
+
+    def _leer(self, ambitos):
+        if ambitos is None: return self._catalogo
+        return self._catalogo, {ambito: self._normalizacion.limites(*ambito) for ambito in ambitos}
+
+    def get_catalogo(self):
+        """CatalogoCompacto vigente (inmutable: se puede usar fuera del lock)."""
+        return self._snapshot()
+
+    def get_modelos(self):
+        """Vistas de las PCs, para las plantillas."""
+        catalogo = self._snapshot()
+        return catalogo.vistas(range(catalogo.n_pcs))
+
+    def get_con_limites(self, *ambito):
+        """
+        Devuelve (catalogo, limites) de forma atómica, donde limites es
+        (maximos, minimos) del ámbito o None si no tiene modelos.
+        Ámbitos: ("global",), ("marca", id), ("perfil", id), ("tipo", tipo),
+        ("tipo_perfil", tipo, id).
+        """
+        catalogo, limites = self._snapshot([ambito])
+        return catalogo, limites[ambito]
+
+    def get_con_varios_limites(self, ambitos):
+        """Como get_con_limites, pero con los límites de varios ámbitos sobre el mismo snapshot: {ambito: limites}."""
+        return self._snapshot(list(ambitos))
+
+    def buscar(self, texto, limite=10):
+        """Búsqueda por trigramas (tolerante a errores) en PCs y laptops: [(ModeloVista, puntaje)]."""
+        self._snapshot()
+        with self._lock:
+            catalogo = self._catalogo
+            encontrados = self._indice.buscar(texto, limite)
+        filas = [(catalogo.fila_de(m["_id"]), puntaje) for m, puntaje in encontrados]
+        return [(catalogo.vista(f), puntaje) for f, puntaje in filas if f is not None]
+
+    @property
+    def version(self):
+        return self._version
+
+    def version_vigente(self):
+        """Versión del catálogo tras revalidar el snapshot (respetando el TTL)."""
+        self._snapshot()
+        return self._version
+
+    def stats(self):
+        with self._lock:
+            lecturas = self.hits + self.misses + self.refreshes
+            return {
+                "version": self._version,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "incrementales": self.incrementales,
+                "hit_ratio": round(self.hits / lecturas, 4) if lecturas else 0.0,
+                "modelos": len(self._catalogo) if self._catalogo is not None else 0,
+                "bytes_arreglos": self._catalogo.nbytes() if self._catalogo is not None else 0,
+            }
+
+
+class LRUCache:
+    """
+    Caché LRU acotado en número de entradas, con estadísticas globales y por clave.
+    Las claves son tuplas; invalidar(predicado) elimina las entradas que cumplan
+    la condición (p. ej. todas las de un perfil).
+    """
+
+    def __init__(self, max_entradas=256, nombre="lru"):
+        self.max_entradas = max_entradas
+        self.nombre = nombre
+        self._lock = threading.Lock()
+        self._datos = OrderedDict()
+        self._hits_por_clave = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def configurar(self, max_entradas):
+        with self._lock:
+            self.max_entradas = max_entradas
+            self._recortar()
+
+    def _recortar(self):
+        while len(self._datos) > self.max_entradas:
+            clave, _ = self._datos.popitem(last=False)
+            self._hits_por_clave.pop(clave, None)
+            self.evictions += 1
+
+    def get(self, clave):
+        with self._lock:
+            valor = self._datos.get(clave)
+            if valor is None:
+                self.misses += 1
+                contar_cache(self.nombre, False)
+                return None
+            self._datos.move_to_end(clave)
+            self._hits_por_clave[clave] = self._hits_por_clave.get(clave, 0) + 1
+            self.hits += 1
+            contar_cache(self.nombre, True)
+            return valor
+
+    def put(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            self._recortar()
+
+    def invalidar(self, predicado=None):
+        with self._lock:
+            claves = [c for c in self._datos if predicado is None or predicado(c)]
+            for clave in claves:
+                del self._datos[clave]
+                self._hits_por_clave.pop(clave, None)
+
+    def stats(self, top=10):
+        with self._lock:
+            consultas = self.hits + self.misses
+            mas_usadas = sorted(self._hits_por_clave.items(), key=lambda x: -x[1])[:top]
+            return {
+                "entradas": len(self._datos),
+                "max_entradas": self.max_entradas,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / consultas, 4) if consultas else 0.0,
+                "claves_mas_usadas": [{"clave": [str(p) for p in c], "hits": n} for c, n in mas_usadas],
+            }
+
+
+catalog_cache = CatalogCache()
+registrar_observador_catalogo(catalog_cache.aplicar_cambio)
+
+# Resultados de /api/comparar_resultados. Clave: (perfil_id, marca_id, pesos, nombre
+# del perfil, versión del catálogo, k, modo). Las escrituras de este worker además
+# liberan de inmediato las entradas afectadas.
+resultados_cache = LRUCache(nombre="resultados")
+registrar_observador_catalogo(lambda *_: resultados_cache.invalidar())
+registrar_observador_perfiles(lambda perfil_id: resultados_cache.invalidar(lambda c: c[0] == perfil_id))
@@ -0,0 +1,284 @@
+"""
+Representación compacta del catálogo (PCs + laptops) que usa el caché.
+En lugar de listas de dicts BSON decodificados guarda:
+  - los atributos del IEG en arreglos float64 (ya limpios, como _safe_float),
+  - marca, perfil y tipo de equipo como códigos enteros con tablas de búsqueda,
+  - nombre, código e _id una sola vez por modelo.
+Los filtros comparan enteros sobre arreglos y el scoring toma las columnas sin
+recorrer documentos. ModeloVista expone una fila como dict de solo lectura
+para las plantillas y las respuestas JSON.
+"""
+import math
+import numpy as np
+from .dominancia import IndiceDominancia
+from .services import CoreService, CAMPOS_IEG
+
+CAMPOS_NUMERICOS = tuple(campo for _, campo in CAMPOS_IEG)
+TIPOS = ("PC Escritorio", "Laptop")
+SIN_CODIGO = -1
+
+
+class TablaCodigos:
+    """
+    Tabla valor <-> código entero. Solo crece (un código nunca cambia de valor),
+    así la comparten las versiones del catálogo derivadas con con_cambio.
+    """
+    __slots__ = ("valores", "_codigos")
+
+    def __init__(self):
+        self.valores = []
+        self._codigos = {}
+
+    def codificar(self, valor):
+        codigo = self._codigos.get(valor)
+        if codigo is None:
+            codigo = self._codigos[valor] = len(self.valores)
+            self.valores.append(valor)
+        return codigo
+
+    def codigo(self, valor):
+        return self._codigos.get(valor, SIN_CODIGO)
+
+
+class ModeloVista:
+    """Fila del catálogo compacto con interfaz de dict de solo lectura."""
+    __slots__ = ("_catalogo", "_fila")
+
+    CAMPOS = ("_id", "nombre", "codigo_modelo", "marca_id", "perfil_uso_id") + CAMPOS_NUMERICOS + ("tipo_equipo",)
+
+    def __init__(self, catalogo, fila):
+        self._catalogo = catalogo
+        self._fila = fila
+
+    def __getitem__(self, campo):
+        return self._catalogo.valor(self._fila, campo)
+
+    def get(self, campo, defecto=None):
+        try: valor = self._catalogo.valor(self._fila, campo)
+        except KeyError: return defecto
+        return defecto if valor is None else valor
+
+    def keys(self):
+        return self.CAMPOS
+
+    def __iter__(self):
+        return iter(self.CAMPOS)
+
+    def __contains__(self, campo):
+        return campo in self.CAMPOS
+
+    def __repr__(self):
+        return f"ModeloVista({self.get('nombre')!r})"
+
+
+class SeleccionFilas:
+    """Subconjunto de filas indexable como lista; crea las vistas solo al acceder."""
+    __slots__ = ("catalogo", "filas")
+
+    def __init__(self, catalogo, filas):
+        self.catalogo = catalogo
+        self.filas = filas
+
+    def __len__(self):
+        return len(self.filas)
+
+    def __getitem__(self, i):
+        return ModeloVista(self.catalogo, int(self.filas[i]))
+
+    def __iter__(self):
+        return (ModeloVista(self.catalogo, int(f)) for f in self.filas)
+
+
+def _clave_ref(valor):
+    """Las referencias se guardan como string u ObjectId: se comparan como str."""
+    return None if valor is None else str(valor)
+
+
+class CatalogoCompacto:
+    """
+    Catálogo inmutable: las escrituras producen una copia con con_cambio,
+    así los lectores que ya tomaron un snapshot no ven estados intermedios.
+    Las filas de PCs van primero (0 .. n_pcs-1) y luego las de laptops.
+    """
+
+    def __init__(self, n_pcs, ids, nombres, codigos, numericos, enteros, atipicos,
+                 marca, perfil, tipo, marcas, perfiles):
+        self.n_pcs = n_pcs
+        self._ids = ids
+        self._nombres = nombres
+        self._codigos = codigos
+        self._numericos = numericos  # campo -> float64[n]
+        self._enteros = enteros      # campo -> bool[n] (el valor original era int)
+        self._atipicos = atipicos    # campo -> {str(_id): valor original no numérico}
+        self._marca = marca          # int32[n] con códigos de `marcas`
+        self._perfil = perfil        # int32[n] con códigos de `perfiles`
+        self._tipo = tipo            # int8[n], índice en TIPOS
+        self._marcas = marcas
+        self._perfiles = perfiles
+        self._filas_por_id = None
+        self._dominancia = {}        # marca_id -> IndiceDominancia de este snapshot
+
+    @classmethod
+    def desde_documentos(cls, pcs, laptops):
+        marcas, perfiles = TablaCodigos(), TablaCodigos()
+        docs = list(pcs) + list(laptops)
+        n = len(docs)
+        numericos = {c: np.empty(n, dtype=np.float64) for c in CAMPOS_NUMERICOS}
+        enteros = {c: np.zeros(n, dtype=bool) for c in CAMPOS_NUMERICOS}
+        atipicos = {c: {} for c in CAMPOS_NUMERICOS}
+        marca = np.empty(n, dtype=np.int32)
+        perfil = np.empty(n, dtype=np.int32)
+
+        for i, m in enumerate(docs):
+            for c in CAMPOS_NUMERICOS:
+                numericos[c][i], enteros[c][i], atipico = cls._limpiar(m.get(c))
+                if atipico: atipicos[c][str(m["_id"])] = m.get(c)
+            marca[i] = cls._codificar(marcas, m.get("marca_id"))
+            perfil[i] = cls._codificar(perfiles, m.get("perfil_uso_id"))
+
+        tipo = np.zeros(n, dtype=np.int8)
+        tipo[len(pcs):] = TIPOS.index("Laptop")
+        return cls(len(pcs), [m["_id"] for m in docs], [m.get("nombre") for m in docs],
+                   [m.get("codigo_modelo") for m in docs], numericos, enteros, atipicos,
+                   marca, perfil, tipo, marcas, perfiles)
+
+    @staticmethod
+    def _limpiar(valor):
+        """(float limpio, era_entero, es_atipico) de un valor numérico del documento."""
+        if isinstance(valor, bool) or not isinstance(valor, (int, float)) or not math.isfinite(valor):
+            return CoreService._safe_float(valor), False, True
+        return float(valor), isinstance(valor, int), False
+
+    @staticmethod
+    def _codificar(tabla, valor):
+        clave = _clave_ref(valor)
+        return SIN_CODIGO if clave is None else tabla.codificar(clave)
+
+    def __len__(self):
+        return len(self._ids)
+
+    # LECTURA
+
+    def valor(self, fila, campo):
+        if campo in self._numericos:
+            atipicos = self._atipicos[campo]
+            if atipicos:
+                clave = str(self._ids[fila])
+                if clave in atipicos: return atipicos[clave]
+            v = float(self._numericos[campo][fila])
+            return int(v) if self._enteros[campo][fila] else v
+        if campo == "_id": return self._ids[fila]
+        if campo == "nombre": return self._nombres[fila]
+        if campo == "codigo_modelo": return self._codigos[fila]
+        if campo == "marca_id": return self._referencia(self._marcas, self._marca[fila])
+        if campo == "perfil_uso_id": return self._referencia(self._perfiles, self._perfil[fila])
+        if campo == "tipo_equipo": return TIPOS[self._tipo[fila]]
+        raise KeyError(campo)
+
+    @staticmethod
+    def _referencia(tabla, codigo):
+        return None if codigo == SIN_CODIGO else tabla.valores[codigo]
+
+    def vista(self, fila):
+        return ModeloVista(self, int(fila))
+
+    def vistas(self, filas=None):
+        if filas is None: filas = range(len(self))
+        return [ModeloVista(self, int(f)) for f in filas]
+
+    def seleccion(self, filas):
+        return SeleccionFilas(self, filas)
+
+    def filas(self, marca_id=None, perfil_id=None, tipo=None):
+        """Índices de las filas que cumplen los filtros (comparaciones de enteros)."""
+        if tipo == TIPOS[0]: inicio, fin = 0, self.n_pcs
+        elif tipo is not None: inicio, fin = self.n_pcs, len(self)
+        else: inicio, fin = 0, len(self)
+        mascara = np.ones(fin - inicio, dtype=bool)
+        if tipo is not None and tipo not in TIPOS: mascara[:] = False
+
+        for valor, tabla, codigos in ((marca_id, self._marcas, self._marca),
+                                      (perfil_id, self._perfiles, self._perfil)):
+            if not valor: continue
+            codigo = tabla.codigo(_clave_ref(valor))
+            if codigo == SIN_CODIGO: return np.empty(0, dtype=np.intp)
+            mascara &= codigos[inicio:fin] == codigo
+        return np.flatnonzero(mascara) + inicio
+
+    def columnas(self, filas):
+        """Columnas del IEG de esas filas, con el formato de CoreService.columnas_desde_modelos."""
+        return {c: self._numericos[c][filas] for c in CAMPOS_NUMERICOS}
+
+    def fila_de(self, id):
+        if self._filas_por_id is None:
+            self._filas_por_id = {str(i): f for f, i in enumerate(self._ids)}
+        return self._filas_por_id.get(str(id))
+
+    def antes_de(self, antes, despues):
+        """
+        ¿El catálogo está justo antes de esa escritura? La fila de `antes` existe
+        con sus valores (o, en un alta, `despues` aún no está).
+        """
+        if antes is None: return self.fila_de(despues["_id"]) is None
+        fila = self.fila_de(antes["_id"])
+        if fila is None: return False
+        if despues is None: return True
+        for campo in CAMPOS_NUMERICOS + ("nombre", "codigo_modelo"):
+            if self.valor(fila, campo) != antes.get(campo): return False
+        return all(_clave_ref(self.valor(fila, c)) == _clave_ref(antes.get(c)) for c in ("marca_id", "perfil_uso_id"))
+
+    def indice_dominancia(self, marca_id, columnas):
+        """Índice de dominancia (dominancia.py) del filtro de marca; vive lo que este snapshot."""
+        indice = self._dominancia.get(marca_id)
+        if indice is None:
+            indice = self._dominancia.setdefault(marca_id, IndiceDominancia(columnas))
+        return indice
+
+    def nbytes(self):
+        """Bytes de los arreglos numéricos y de códigos (sin contar los strings)."""
+        arreglos = list(self._numericos.values()) + list(self._enteros.values())
+        return sum(a.nbytes for a in arreglos + [self._marca, self._perfil, self._tipo])
+
+    # ESCRITURA (copy-on-write)
+
+    def con_cambio(self, tipo, antes, despues):
+        """
+        Nuevo catálogo tras una escritura: antes/despues son documentos (None en
+        altas/bajas). Las modificaciones conservan la posición de la fila y las
+        altas van al final de su tipo de equipo.
+        """
+        fila = self.fila_de(antes["_id"]) if antes is not None else None
+        ids, nombres, codigos = list(self._ids), list(self._nombres), list(self._codigos)
+        numericos = dict(self._numericos)
+        enteros = dict(self._enteros)
+        atipicos = {c: dict(v) for c, v in self._atipicos.items()}
+        marca, perfil, tipo_arr = self._marca, self._perfil, self._tipo
+        n_pcs = self.n_pcs
+
+        if fila is not None:
+            del ids[fila], nombres[fila], codigos[fila]
+            for c in CAMPOS_NUMERICOS:
+                numericos[c] = np.delete(numericos[c], fila)
+                enteros[c] = np.delete(enteros[c], fila)
+                atipicos[c].pop(str(antes["_id"]), None)
+            marca, perfil, tipo_arr = np.delete(marca, fila), np.delete(perfil, fila), np.delete(tipo_arr, fila)
+            if fila < n_pcs: n_pcs -= 1
+
+        if despues is not None:
+            codigo_tipo = TIPOS.index(tipo)
+            posicion = fila if fila is not None else (n_pcs if codigo_tipo == 0 else len(ids))
+            ids.insert(posicion, despues["_id"])
+            nombres.insert(posicion, despues.get("nombre"))
+            codigos.insert(posicion, despues.get("codigo_modelo"))
+            for c in CAMPOS_NUMERICOS:
+                limpio, entero, atipico = self._limpiar(despues.get(c))
+                numericos[c] = np.insert(numericos[c], posicion, limpio)
+                enteros[c] = np.insert(enteros[c], posicion, entero)
+                if atipico: atipicos[c][str(despues["_id"])] = despues.get(c)
+            marca = np.insert(marca, posicion, self._codificar(self._marcas, despues.get("marca_id")))
+            perfil = np.insert(perfil, posicion, self._codificar(self._perfiles, despues.get("perfil_uso_id")))
+            tipo_arr = np.insert(tipo_arr, posicion, codigo_tipo)
+            if codigo_tipo == 0: n_pcs += 1
+
+        return CatalogoCompacto(n_pcs, ids, nombres, codigos, numericos, enteros, atipicos,
+                                marca, perfil, tipo_arr, self._marcas, self._perfiles)
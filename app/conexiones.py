@@ -0,0 +1,199 @@
+"""
+Ciclo de vida de las conexiones a MongoDB.
+Reemplaza a flask_pymongo.PyMongo con la misma interfaz (mongo.db / mongo.cx):
+  - Un MongoClient por clase de ruta ("admin": escrituras del panel, "publico":
+    lecturas de la API), cada uno con su pool, timeouts y read preference.
+  - Los clientes se crean de forma perezosa en el proceso que los usa y se
+    descartan tras un fork, así cada worker de gunicorn abre los suyos.
+  - calentar() abre las conexiones mínimas antes de atender peticiones.
+  - Métricas de saturación de cada pool (conexiones en uso, esperas, fallos).
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import has_request_context, request
+from pymongo import MongoClient
+from pymongo.monitoring import ConnectionPoolListener
+
+CLASE_ADMIN = "admin"
+CLASE_PUBLICA = "publico"
+
+# Opciones de MongoClient por clase de ruta; create_app las ajusta con variables de entorno
+POOLS_POR_DEFECTO = {
+    CLASE_ADMIN: {"maxPoolSize": 10, "minPoolSize": 1, "readPreference": "primary"},
+    CLASE_PUBLICA: {"maxPoolSize": 50, "minPoolSize": 4, "readPreference": "primary"},
+}
+OPCIONES_COMUNES = {"serverSelectionTimeoutMS": 5000, "connectTimeoutMS": 5000, "waitQueueTimeoutMS": 2000}
+
+
+class MetricasPool(ConnectionPoolListener):
+    """Contadores de un pool, alimentados por los eventos de monitoreo de pymongo."""
+
+    def __init__(self, max_pool):
+        self.max_pool = max_pool
+        self._lock = threading.Lock()
+        self.abiertas = 0
+        self.en_uso = 0
+        self.max_en_uso = 0
+        self.esperando = 0
+        self.max_esperando = 0
+        self.checkouts = 0
+        self.fallos = 0
+        self.limpiezas = 0
+        self.espera_total_ms = 0.0
+        self.espera_max_ms = 0.0
+
+    def _espera(self, event):
+        duracion = getattr(event, "duration", None)
+        if duracion is None: return
+        ms = duracion * 1000
+        self.espera_total_ms += ms
+        self.espera_max_ms = max(self.espera_max_ms, ms)
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self.esperando += 1
+            self.max_esperando = max(self.max_esperando, self.esperando)
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.esperando -= 1
+            self.en_uso += 1
+            self.max_en_uso = max(self.max_en_uso, self.en_uso)
+            self.checkouts += 1
+            self._espera(event)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.esperando -= 1
+            self.fallos += 1
+            self._espera(event)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.en_uso -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.abiertas += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.abiertas -= 1
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.limpiezas += 1
+
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_ready(self, event): pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_pool": self.max_pool,
+                "abiertas": self.abiertas,
+                "en_uso": self.en_uso,
+                "max_en_uso": self.max_en_uso,
+                "saturacion": round(self.en_uso / self.max_pool, 4) if self.max_pool else 0.0,
+                "esperando": self.esperando,
+                "max_esperando": self.max_esperando,
+                "checkouts": self.checkouts,
+                "fallos": self.fallos,
+                "limpiezas": self.limpiezas,
+                "espera_media_ms": round(self.espera_total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "espera_max_ms": round(self.espera_max_ms, 3),
+            }
+
+
+class GestorMongo:
+    """
+    Punto único de acceso a MongoDB. mongo.db devuelve la base de datos del
+    cliente que corresponde a la petición en curso: las rutas del blueprint
+    público usan el pool "publico" y todo lo demás (panel admin, hilos en
+    segundo plano, CLI) el pool "admin".
+    """
+
+    def __init__(self):
+        self._uri = None
+        self._pools = POOLS_POR_DEFECTO
+        self._opciones = OPCIONES_COMUNES
+        self._blueprints_publicos = {"public"}
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._reiniciar()
+        if hasattr(os, "register_at_fork"):
+            # Un MongoClient no sobrevive a un fork: el hijo crea los suyos
+            os.register_at_fork(after_in_child=self._reiniciar)
+
+    def init_app(self, app):
+        self._uri = app.config["MONGO_URI"]
+        self._pools = app.config.get("MONGO_POOLS", POOLS_POR_DEFECTO)
+        self._opciones = {**OPCIONES_COMUNES, **app.config.get("MONGO_OPCIONES", {})}
+        self._reiniciar()
+        app.extensions["mongo"] = self
+
+    def registrar_listener(self, listener):
+        """Listener de monitoreo de pymongo para los clientes que se creen a partir de ahora."""
+        self._listeners.append(listener)
+
+    def _reiniciar(self):
+        self._clientes = {}
+        self._bases = {}
+        self._metricas = {}
+        self._pid = os.getpid()
+
+    def _clase_actual(self):
+        if has_request_context() and request.blueprint in self._blueprints_publicos:
+            return CLASE_PUBLICA
+        return CLASE_ADMIN
+
+    def cliente(self, clase=None):
+        clase = clase or self._clase_actual()
+        cliente = self._clientes.get(clase)
+        if cliente is not None and self._pid == os.getpid(): return cliente
+
+        with self._lock:
+            if self._pid != os.getpid(): self._reiniciar()
+            if clase not in self._clientes:
+                pool = self._pools[clase]
+                metricas = MetricasPool(pool.get("maxPoolSize"))
+                cliente = MongoClient(self._uri, event_listeners=[metricas, *self._listeners],
+                                      appname=f"techadvisor-{clase}", **self._opciones, **pool)
+                self._metricas[clase] = metricas
+                self._bases[clase] = cliente.get_default_database()
+                self._clientes[clase] = cliente
+            return self._clientes[clase]
+
+    @property
+    def cx(self):
+        return self.cliente()
+
+    @property
+    def db(self):
+        clase = self._clase_actual()
+        self.cliente(clase)
+        return self._bases[clase]
+
+    def calentar(self, logger=None):
+        """
+        Abre minPoolSize conexiones de cada pool (pings concurrentes) para que el
+        worker no pague el handshake/TLS en las primeras peticiones.
+        """
+        for clase, pool in self._pools.items():
+            cliente = self.cliente(clase)
+            n = max(1, pool.get("minPoolSize", 1))
+            try:
+                with ThreadPoolExecutor(max_workers=n) as ejecutor:
+                    list(ejecutor.map(lambda _: cliente.admin.command("ping"), range(n)))
+            except Exception as e:
+                if logger: logger.warning("No se pudo calentar el pool %s de MongoDB: %s", clase, e)
+
+    def stats(self):
+        return {
+            "pid": self._pid,
+            "pools": {clase: m.stats() for clase, m in self._metricas.items()},
+            "configuracion": self._pools,
+        }
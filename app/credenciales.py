@@ -0,0 +1,138 @@
+"""
+Hashing de contraseñas fuera del hilo de la petición.
+generate_password_hash / check_password_hash son KDFs lentos a propósito
+(scrypt por defecto, ~50 ms y 32 MB por hash). ServicioCredenciales los ejecuta
+en un pool de hilos acotado (hashlib libera el GIL mientras calcula):
+  - como mucho `hilos` hashes a la vez por proceso y `cola` más esperando; lo
+    que no entra se rechaza al momento con CredencialesSaturadas,
+  - cada operación espera como mucho `timeout` segundos (cola incluida), así la
+    latencia del login queda acotada sin bajar el costo del hash,
+  - el costo (PASSWORD_HASH_METODO) se mide con `python -m benchmarks.credenciales`,
+  - un login correcto con un hash de otro método o costo lo vuelve a hashear
+    con el configurado, en segundo plano.
+El pool se crea de forma perezosa en cada proceso (los hilos no sobreviven a un
+fork), igual que los clientes de conexiones.py.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as TimeoutFuturo
+from werkzeug.security import generate_password_hash, check_password_hash
+from .metricas import CREDENCIALES_LATENCIA, CREDENCIALES_RECHAZOS
+from .models import update_user_password
+
+METODO_POR_DEFECTO = "scrypt:32768:8:1"
+
+
+class CredencialesSaturadas(Exception):
+    """La cola de hashing está llena o la operación superó el timeout."""
+
+
+class ServicioCredenciales:
+
+    def __init__(self, metodo=METODO_POR_DEFECTO, hilos=2, cola=16, timeout=3.0):
+        self._lock = threading.Lock()
+        self.configurar(metodo, hilos, cola, timeout)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reiniciar)
+
+    def configurar(self, metodo, hilos, cola, timeout):
+        self.metodo = metodo
+        self.hilos = hilos
+        self.cola = cola
+        self.timeout = timeout
+        with self._lock:
+            anterior = getattr(self, "_ejecutor", None)
+            self._reiniciar()
+        if anterior is not None: anterior.shutdown(wait=False)
+
+    def _reiniciar(self):
+        self._ejecutor = None
+        self._cupos = threading.BoundedSemaphore(self.hilos + self.cola)
+        self._referencia = None
+        self._pid = os.getpid()
+        self.rehashes = 0
+
+    def _ejecutor_actual(self):
+        if self._ejecutor is not None and self._pid == os.getpid(): return self._ejecutor
+        with self._lock:
+            if self._pid != os.getpid(): self._reiniciar()
+            if self._ejecutor is None:
+                self._ejecutor = ThreadPoolExecutor(max_workers=self.hilos, thread_name_prefix="credenciales")
+            return self._ejecutor
+
+    def _enviar(self, operacion, funcion, *args):
+        """Encola funcion(*args) si hay cupo; devuelve el futuro."""
+        if not self._cupos.acquire(blocking=False):
+            CREDENCIALES_RECHAZOS.labels(operacion, "cola_llena").inc()
+            raise CredencialesSaturadas(f"Cola de hashing llena ({self.hilos + self.cola})")
+        inicio = time.perf_counter()
+        try:
+            futuro = self._ejecutor_actual().submit(funcion, *args)
+        except BaseException:
+            self._cupos.release()
+            raise
+
+        def _terminar(_):
+            self._cupos.release()
+            CREDENCIALES_LATENCIA.labels(operacion).observe(time.perf_counter() - inicio)
+        futuro.add_done_callback(_terminar)
+        return futuro
+
+    def _ejecutar(self, operacion, funcion, *args):
+        futuro = self._enviar(operacion, funcion, *args)
+        try:
+            return futuro.result(timeout=self.timeout)
+        except TimeoutFuturo:
+            # Si aún estaba en cola se descarta; si ya corría, termina y libera su cupo
+            futuro.cancel()
+            CREDENCIALES_RECHAZOS.labels(operacion, "timeout").inc()
+            raise CredencialesSaturadas(f"El hashing superó {self.timeout} s") from None
+
+    def _hash_referencia(self):
+        """Hash del método configurado: da su forma normalizada y sirve para usuarios inexistentes."""
+        if self._referencia is None:
+            self._referencia = generate_password_hash("", self.metodo)
+        return self._referencia
+
+    def necesita_rehash(self, hash_guardado):
+        return hash_guardado.split("$", 1)[0] != self._hash_referencia().split("$", 1)[0]
+
+    def hashear(self, password):
+        return self._ejecutar("hashear", generate_password_hash, password, self.metodo)
+
+    def verificar(self, hash_guardado, password):
+        return self._ejecutar("verificar", check_password_hash, hash_guardado, password)
+
+    def verificar_usuario(self, usuario, password):
+        """
+        Verifica la contraseña de `usuario` (None si el email no existe: se
+        compara contra un hash de referencia para que tarde lo mismo). Si es
+        correcta y el hash es de otro costo, lo reemplaza en segundo plano.
+        """
+        if usuario is None:
+            self._ejecutar("verificar", lambda: check_password_hash(self._hash_referencia(), password or ""))
+            return False
+        hash_guardado = usuario.get("password") or ""
+        if not self.verificar(hash_guardado, password or ""): return False
+        try:
+            self._enviar("rehash", self._rehashear, usuario["_id"], hash_guardado, password)
+        except CredencialesSaturadas:
+            pass  # se reintenta en el próximo login
+        return True
+
+    def _rehashear(self, id, hash_guardado, password):
+        if not self.necesita_rehash(hash_guardado): return
+        if update_user_password(id, hash_guardado, generate_password_hash(password, self.metodo)):
+            with self._lock:
+                self.rehashes += 1
+
+    def esperar(self):
+        """Espera a que terminen las operaciones encoladas (tests y benchmarks)."""
+        for _ in range(self.hilos + self.cola):
+            self._cupos.acquire()
+        for _ in range(self.hilos + self.cola):
+            self._cupos.release()
+
+
+servicio_credenciales = ServicioCredenciales()
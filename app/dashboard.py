@@ -0,0 +1,82 @@
+import threading
+import time
+from .models import (
+    contar_documentos, contar_modelos_por_perfil, get_mejor_relacion_rendimiento_precio,
+    get_all_perfiles, registrar_observador_catalogo, PROYECCION_NOMBRE
+)
+
+
+class DashboardStatsService:
+    """
+    Estadísticas del dashboard admin calculadas en MongoDB (count_documents,
+    $group por perfil y mejor ratio con $sort/$limit) y cacheadas con TTL.
+    Al vencer el TTL se sirve el último valor y se recalcula en segundo plano,
+    así el dashboard nunca espera por la agregación salvo en la primera carga.
+    """
+
+    def __init__(self, ttl=60.0):
+        self.ttl = ttl
+        self._app = None
+        self._lock = threading.Lock()
+        self._datos = None
+        self._calculado_en = 0.0
+        self._refrescando = False
+
+    def init_app(self, app, ttl=None):
+        self._app = app
+        if ttl is not None: self.ttl = ttl
+
+    def invalidar(self, *_):
+        with self._lock:
+            self._calculado_en = 0.0
+
+    def obtener(self):
+        with self._lock:
+            datos = self._datos
+            vencido = time.monotonic() - self._calculado_en >= self.ttl
+            lanzar = datos is not None and vencido and not self._refrescando
+            if lanzar: self._refrescando = True
+
+        if datos is None:
+            return self._refrescar()
+        if lanzar:
+            threading.Thread(target=self._refrescar_en_segundo_plano, daemon=True).start()
+        return datos
+
+    def _refrescar_en_segundo_plano(self):
+        with self._app.app_context():
+            self._refrescar()
+
+    def _refrescar(self):
+        try:
+            datos = self._calcular()
+            with self._lock:
+                self._datos = datos
+                self._calculado_en = time.monotonic()
+            return datos
+        finally:
+            with self._lock:
+                self._refrescando = False
+
+    def _calcular(self):
+        perfiles = {str(p["_id"]): p["nombre"] for p in get_all_perfiles(PROYECCION_NOMBRE, lazy=True)}
+
+        chart_labels = []
+        chart_values = []
+        for grupo in contar_modelos_por_perfil():
+            chart_labels.append(perfiles.get(str(grupo["_id"]), "Sin perfil"))
+            chart_values.append(grupo["total"])
+
+        return {
+            "total_perfiles": contar_documentos("perfiles_uso"),
+            "total_marcas": contar_documentos("marcas"),
+            "total_modelos": contar_documentos("modelos_computadora"),
+            "total_consultas": contar_documentos("consultas"),
+            "mejor_relacion": get_mejor_relacion_rendimiento_precio(),
+            "chart_labels": chart_labels,
+            "chart_values": chart_values,
+        }
+
+
+dashboard_stats = DashboardStatsService()
+registrar_observador_catalogo(dashboard_stats.invalidar)
@@ -0,0 +1,180 @@
+"""
+Índice de dominancia para el top-k del IEG con pesos arbitrarios.
+Con pesos no negativos el IEG es creciente en rendimiento y decreciente en
+precio, consumo y temperatura, así que un modelo dominado (igual o peor en los
+cuatro atributos, peor en alguno) nunca puntúa más que quien lo domina: un
+modelo con k o más dominadores solo entra en el top-k empatado con ellos.
+El índice guarda, por snapshot del catálogo y filtro de marca, los modelos con
+menos de K_MAXIMO + 1 dominadores (la "banda" de dominancia) y cuántos tiene
+cada uno; un top-k puntúa solo los que tienen k o menos.
+Para devolver exactamente lo mismo que el recorrido completo (empates por
+índice) el top-k es válido si el k-ésimo score supera estrictamente al
+(k+1)-ésimo; si empatan, top_k devuelve None y el llamador recorre todo.
+El snapshot es inmutable: un cambio del catálogo trae otro snapshot y el índice
+se reconstruye la primera vez que se consulta.
+"""
+import threading
+import numpy as np
+from .metricas import fase, IEG_INDICE
+from .services import CoreService
+
+K_MAXIMO = 5          # top-k servido por el índice; k mayores recorren todo el filtro
+MIN_MODELOS = 2000    # por debajo, puntuar todo el filtro es más barato que el índice
+MUESTRA = 4096        # modelos de mayor suma cuya banda sirve de pivotes
+BLOQUE = 512
+CAMPOS_PESOS = ("peso_rendimiento", "peso_precio", "peso_consumo", "peso_temperatura")
+
+
+def configurar(min_modelos, k_maximo=K_MAXIMO):
+    """Mínimo de modelos de un filtro para usar el índice (0 = desactivado) y k máximo servido."""
+    global MIN_MODELOS, K_MAXIMO
+    MIN_MODELOS = min_modelos
+    K_MAXIMO = k_maximo
+
+
+def _atributos(columnas):
+    """Matriz n x 4 en la que más es mejor: (rendimiento, -precio, -consumo, -temperatura)."""
+    return np.column_stack((columnas["rendimiento"], -columnas["precio"],
+                            -columnas["consumo"], -columnas["temperatura"]))
+
+
+def _dominancia(a, b):
+    """bool[len(b), len(a)]: [j, i] si a[i] domina a b[j]."""
+    mayor_igual = a[:, 0] >= b[:, 0, None]
+    mayor = a[:, 0] > b[:, 0, None]
+    for c in range(1, a.shape[1]):
+        mayor_igual &= a[:, c] >= b[:, c, None]
+        mayor |= a[:, c] > b[:, c, None]
+    return mayor_igual & mayor
+
+
+def _banda(x, limite):
+    """
+    (posiciones, dominadores) de las filas de x con menos de `limite`
+    dominadores. Las filas vienen en orden topológico (quien domina va antes),
+    así que basta contar los dominadores entre las anteriores que ya están en
+    la banda: si una fila tiene `limite` o más, al menos `limite` de ellos están.
+    """
+    banda = x[:0]
+    posiciones, dominadores = [], []
+    for inicio in range(0, len(x), BLOQUE):
+        bloque = x[inicio:inicio + BLOQUE]
+        cuenta = _dominancia(banda, bloque).sum(axis=1)
+        vivos = np.flatnonzero(cuenta < limite)
+        cuenta = cuenta[vivos] + _dominancia(bloque[vivos], bloque[vivos]).sum(axis=1)
+        entran = vivos[cuenta < limite]
+        banda = np.concatenate((banda, bloque[entran]))
+        posiciones.append(inicio + entran)
+        dominadores.append(cuenta[cuenta < limite])
+    return np.concatenate(posiciones), np.concatenate(dominadores)
+
+
+def _prefiltro(x, pivotes, limite):
+    """
+    Índices de x dominados por menos de `limite` pivotes (los demás no están en
+    la banda). Compara pivote a pivote sobre columnas contiguas y deja de mirar
+    un modelo en cuanto queda descartado.
+    """
+    restantes = np.arange(len(x))
+    columnas = [np.ascontiguousarray(x[:, c]) for c in range(x.shape[1])]
+    cuenta = np.zeros(len(x), dtype=np.int32)
+    for inicio in range(0, len(pivotes), 16):
+        for pivote in pivotes[inicio:inicio + 16]:
+            mayor_igual = columnas[0] <= pivote[0]
+            mayor = columnas[0] < pivote[0]
+            for c in range(1, len(columnas)):
+                mayor_igual &= columnas[c] <= pivote[c]
+                mayor |= columnas[c] < pivote[c]
+            cuenta += mayor_igual & mayor
+        vivos = cuenta < limite
+        restantes, cuenta = restantes[vivos], cuenta[vivos]
+        columnas = [columna[vivos] for columna in columnas]
+    return restantes
+
+
+def banda_dominancia(x, limite):
+    """
+    (indices, dominadores): filas de x con menos de `limite` dominadores, en
+    orden ascendente, y una cota inferior de cuántos tienen (cuenta solo los que
+    están en la banda, que basta para decidir quién puede entrar en un top-k).
+    Usa los modelos de mayor suma como pivotes: descartan de una pasada a casi
+    todos los que tienen `limite` o más dominadores.
+    """
+    rango = x.max(axis=0) - x.min(axis=0)
+    suma = ((x - x.min(axis=0)) / np.where(rango > 0, rango, 1)).sum(axis=1)
+    # Orden topológico: suma desc y, a igual suma, atributos desc
+    orden = np.lexsort(tuple(-x[:, c] for c in reversed(range(x.shape[1]))) + (-suma,))
+
+    if len(orden) > MUESTRA:
+        muestra = orden[:MUESTRA]
+        pivotes = x[muestra[_banda(x[muestra], limite)[0]]]
+        vivos = np.zeros(len(x), dtype=bool)
+        vivos[_prefiltro(x, pivotes, limite)] = True
+        orden = orden[vivos[orden]]
+
+    posiciones, dominadores = _banda(x[orden], limite)
+    indices = orden[posiciones]
+    ascendente = np.argsort(indices)
+    return indices[ascendente], dominadores[ascendente]
+
+
+class IndiceDominancia:
+    """
+    Banda de dominancia de un filtro del catálogo (las columnas de
+    candidatos_marca). Se construye la primera vez que se consulta; si el filtro
+    es pequeño o tiene valores no finitos top_k devuelve None.
+    """
+
+    def __init__(self, columnas):
+        self._columnas = columnas
+        self._lock = threading.Lock()
+        self._construido = False
+        self.k_maximo = K_MAXIMO
+        self.indices = None
+        self.dominadores = None
+        self._por_k = {}
+
+    def construir(self):
+        with self._lock:
+            if self._construido: return
+            x = _atributos(self._columnas)
+            if np.isfinite(x).all():
+                with fase("indice_dominancia"):
+                    self.indices, self.dominadores = banda_dominancia(x, self.k_maximo + 1)
+            self._construido = True
+
+    def _candidatos(self, k):
+        """Índices y columnas de los modelos con k o menos dominadores (memo por k)."""
+        if k not in self._por_k:
+            indices = self.indices[self.dominadores <= k]
+            self._por_k[k] = indices, {c: col[indices] for c, col in self._columnas.items()}
+        return self._por_k[k]
+
+    def top_k(self, pesos, maximos, minimos, k):
+        """
+        (índices, scores) del top-k en orden (score desc, índice asc), igual que
+        seleccionar_top_k sobre todo el filtro; None si el índice no lo garantiza
+        (filtro pequeño, k > k_maximo, pesos negativos o no finitos, empate en
+        el borde del top-k).
+        """
+        n = len(self._columnas["rendimiento"])
+        vector = [CoreService._safe_float(pesos.get(campo)) for campo in CAMPOS_PESOS]
+        if not MIN_MODELOS or n < MIN_MODELOS or not 0 < k <= self.k_maximo \
+                or not all(0 <= w < np.inf for w in vector):
+            IEG_INDICE.labels("recorrido").inc()
+            return None
+        if not self._construido: self.construir()
+        if self.indices is None:
+            IEG_INDICE.labels("recorrido").inc()
+            return None
+
+        indices, columnas = self._candidatos(k)
+        scores, _ = CoreService.calcular_scores_batch(columnas, pesos, maximos, minimos, ordenar=False)
+        orden = CoreService.seleccionar_top_k(scores, k + 1)
+        if len(orden) > k and scores[orden[k - 1]] == scores[orden[k]]:
+            # Un modelo fuera de la banda con el mismo score podría ir antes por índice
+            IEG_INDICE.labels("empate").inc()
+            return None
+        IEG_INDICE.labels("indice").inc()
+        elegidos = orden[:k]
+        return indices[elegidos], scores[elegidos]
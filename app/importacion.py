@@ -0,0 +1,170 @@
+"""
+Importación masiva de modelos (listas de precios de proveedores) desde CSV o
+JSON Lines hacia modelos_computadora o modelos_laptops.
+Las filas se leen en streaming, se validan con las mismas reglas que el
+formulario (validacion.py) y se guardan en lotes con un bulk upsert por
+codigo_modelo: una fila cuyo código ya existe actualiza ese modelo. Al final
+se avanza una sola vez la versión del catálogo.
+La marca y el perfil de uso pueden venir por id o por nombre.
+Devuelve un reporte con los conteos y los errores de cada fila rechazada.
+
+Uso por línea de comandos:
+  python -m app.importacion precios.csv --coleccion laptops
+  python -m app.importacion precios.jsonl --coleccion pcs --lote 1000
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+from .models import (
+    get_all_marcas, get_all_perfiles, importar_modelos, notificar_importacion, PROYECCION_NOMBRE
+)
+from .validacion import validar_modelo
+
+COLECCIONES = {"pcs": "modelos_computadora", "laptops": "modelos_laptops"}
+FORMATOS = ("csv", "jsonl")
+TAMANO_LOTE = 500
+MAX_ERRORES = 1000
+
+
+def formato_de(nombre_archivo, content_type=None):
+    """'csv' o 'jsonl' según la extensión o el Content-Type; None si no se reconoce."""
+    nombre = (nombre_archivo or "").lower()
+    tipo = (content_type or "").split(";")[0].strip().lower()
+    if nombre.endswith(".csv") or tipo in ("text/csv", "application/csv"):
+        return "csv"
+    if nombre.endswith((".jsonl", ".ndjson")) or tipo in ("application/x-ndjson", "application/jsonl"):
+        return "jsonl"
+    return None
+
+
+def leer_filas(flujo, formato):
+    """
+    Itera (línea, campos) sobre un flujo binario o de texto. Una línea JSON
+    inválida se entrega como (línea, None) para reportarla sin cortar la lectura.
+    """
+    texto = io.TextIOWrapper(flujo, encoding="utf-8-sig", newline="") if not isinstance(flujo, io.TextIOBase) else flujo
+    if formato == "csv":
+        lector = csv.DictReader(texto)
+        for campos in lector:
+            yield lector.line_num, campos
+        return
+    for linea, contenido in enumerate(texto, 1):
+        if not contenido.strip(): continue
+        try:
+            campos = json.loads(contenido)
+        except ValueError:
+            campos = None
+        yield linea, campos if isinstance(campos, dict) else None
+
+
+def _referencias(documentos):
+    """{id o nombre en minúsculas: id} de marcas o perfiles."""
+    ids = {}
+    for d in documentos:
+        ids[str(d["_id"])] = str(d["_id"])
+        ids.setdefault(str(d.get("nombre", "")).strip().lower(), str(d["_id"]))
+    return ids
+
+
+def _resolver(campos, campo, referencias):
+    valor = str(campos.get(campo) or "").strip()
+    return referencias.get(valor, referencias.get(valor.lower(), valor))
+
+
+class Importacion:
+    """Estado de una importación: lote pendiente, códigos vistos y reporte."""
+
+    def __init__(self, coleccion, tamano_lote=TAMANO_LOTE):
+        self.coleccion = coleccion
+        self.tamano_lote = tamano_lote
+        self.marcas = _referencias(get_all_marcas(PROYECCION_NOMBRE, lazy=True))
+        self.perfiles = _referencias(get_all_perfiles(PROYECCION_NOMBRE, lazy=True))
+        self._ids_marcas = set(self.marcas.values())
+        self._ids_perfiles = set(self.perfiles.values())
+        self._vistos = {}
+        self._lote = []
+        self._lineas = []
+        self.reporte = {"coleccion": coleccion, "filas": 0, "insertados": 0, "actualizados": 0,
+                        "rechazados": 0, "errores": [], "errores_omitidos": 0}
+
+    def _rechazar(self, linea, codigo, errores):
+        self.reporte["rechazados"] += 1
+        if len(self.reporte["errores"]) < MAX_ERRORES:
+            self.reporte["errores"].append({"linea": linea, "codigo_modelo": codigo, "errores": errores})
+        else:
+            self.reporte["errores_omitidos"] += 1
+
+    def agregar(self, linea, campos):
+        self.reporte["filas"] += 1
+        if campos is None:
+            self._rechazar(linea, None, {"fila": "La línea no es un objeto JSON válido."})
+            return
+        campos = dict(campos,
+                      marca_id=_resolver(campos, "marca_id", self.marcas),
+                      perfil_uso_id=_resolver(campos, "perfil_uso_id", self.perfiles))
+        data, errores = validar_modelo(campos, self._ids_marcas, self._ids_perfiles)
+        codigo = data["codigo_modelo"]
+        if not errores and codigo in self._vistos:
+            errores = {"codigo_modelo": f"Código repetido en el archivo (línea {self._vistos[codigo]})."}
+        if errores:
+            self._rechazar(linea, codigo or None, errores)
+            return
+        self._vistos[codigo] = linea
+        self._lote.append(data)
+        self._lineas.append(linea)
+        if len(self._lote) >= self.tamano_lote:
+            self.guardar_lote()
+
+    def guardar_lote(self):
+        if not self._lote: return
+        resultado = importar_modelos(self.coleccion, self._lote)
+        self.reporte["insertados"] += resultado["insertados"]
+        self.reporte["actualizados"] += resultado["actualizados"]
+        for posicion, mensaje in sorted(resultado["errores"].items()):
+            self._rechazar(self._lineas[posicion], self._lote[posicion]["codigo_modelo"], {"fila": mensaje})
+        self._lote = []
+        self._lineas = []
+
+    def terminar(self):
+        self.guardar_lote()
+        if self.reporte["insertados"] or self.reporte["actualizados"]:
+            notificar_importacion(self.coleccion)
+        return self.reporte
+
+
+def importar(filas, coleccion, tamano_lote=TAMANO_LOTE):
+    """Importa las (línea, campos) de filas en coleccion. Devuelve el reporte."""
+    importacion = Importacion(coleccion, tamano_lote)
+    for linea, campos in filas:
+        importacion.agregar(linea, campos)
+    return importacion.terminar()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importación masiva de modelos (CSV o JSON Lines)")
+    parser.add_argument("archivo", help="ruta del archivo o - para la entrada estándar")
+    parser.add_argument("--coleccion", choices=tuple(COLECCIONES), default="pcs")
+    parser.add_argument("--formato", choices=FORMATOS, help="por defecto según la extensión")
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE, help="filas por bulk_write")
+    args = parser.parse_args(argv)
+
+    formato = args.formato or formato_de(args.archivo)
+    if formato is None:
+        parser.error("No se reconoce el formato: indique --formato csv|jsonl")
+
+    from . import create_app
+    app = create_app()
+    with app.app_context():
+        if args.archivo == "-":
+            reporte = importar(leer_filas(sys.stdin.buffer, formato), COLECCIONES[args.coleccion], args.lote)
+        else:
+            with open(args.archivo, "rb") as flujo:
+                reporte = importar(leer_filas(flujo, formato), COLECCIONES[args.coleccion], args.lote)
+    print(json.dumps(reporte, indent=2, ensure_ascii=False))
+    return 1 if reporte["rechazados"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Índices que necesita la aplicación, declarados en un solo lugar.
+GestorIndices.asegurar() los crea al arrancar (create_index no hace nada si el
+índice ya existe) y reportar() compara los declarados con los existentes y
+ejecuta explain() sobre la consulta caliente de cada uno, así se detectan las
+consultas que siguen recorriendo la colección completa (COLLSCAN).
+Los índices únicos de email y codigo_modelo son los que garantizan que no haya
+duplicados: las altas insertan directamente y traducen el DuplicateKeyError.
+Mientras no conste que un índice único existe (asegurar falló o no se ejecutó,
+ASEGURAR_INDICES=0), unico_garantizado() es False y las altas comprueban antes
+el duplicado con una consulta.
+"""
+import threading
+from pymongo.errors import ConnectionFailure, OperationFailure
+from .models import repositorio
+
+
+class Indice:
+    """Índice declarado: colección, claves, si es único y una consulta que debería usarlo."""
+    __slots__ = ("coleccion", "claves", "unico", "consulta")
+
+    def __init__(self, coleccion, claves, unico=False, consulta=None):
+        self.coleccion = coleccion
+        self.claves = claves
+        self.unico = unico
+        self.consulta = consulta
+
+    @property
+    def nombre(self):
+        return "_".join(f"{c}_{d}" for c, d in self.claves)
+
+
+# Los filtros por marca/perfil llegan como {"$in": [str, ObjectId]} (pipelines.filtro_por_id)
+INDICES = (
+    Indice("usuarios", [("email", 1)], unico=True, consulta={"email": ""}),
+    Indice("modelos_computadora", [("codigo_modelo", 1)], unico=True, consulta={"codigo_modelo": ""}),
+    Indice("modelos_computadora", [("marca_id", 1), ("perfil_uso_id", 1)], consulta={"marca_id": {"$in": [""]}}),
+    Indice("modelos_computadora", [("perfil_uso_id", 1), ("nombre", 1)], consulta={"perfil_uso_id": {"$in": [""]}}),
+    # Sin unique: las laptops históricas no siempre tienen código; la importación hace upsert por él
+    Indice("modelos_laptops", [("codigo_modelo", 1)], consulta={"codigo_modelo": ""}),
+    Indice("modelos_laptops", [("marca_id", 1), ("perfil_uso_id", 1)], consulta={"marca_id": {"$in": [""]}}),
+    Indice("modelos_laptops", [("perfil_uso_id", 1)], consulta={"perfil_uso_id": {"$in": [""]}}),
+    Indice("consultas", [("perfil_uso_id", 1), ("_id", -1)], consulta={"perfil_uso_id": {"$in": [""]}}),
+    Indice("consultas", [("modelo_id", 1), ("_id", -1)], consulta={"modelo_id": {"$in": [""]}}),
+    Indice("recomendaciones_materializadas", [("perfil_id", 1)], consulta={"perfil_id": ""}),
+    Indice("recomendaciones_materializadas", [("version", 1), ("marca_id", 1)], consulta={"version": 0}),
+)
+
+
+class GestorIndices:
+
+    def __init__(self, indices=INDICES):
+        self.indices = indices
+        self._lock = threading.Lock()
+        self.errores = {}
+        self._unicos = {}
+
+    def asegurar(self, logger=None):
+        """
+        Crea los índices declarados. Un índice que no se puede crear (p. ej. un
+        único con duplicados ya guardados) se registra en `errores` y no detiene
+        el arranque; si no hay conexión se abandona sin esperar por cada índice.
+        """
+        errores, unicos = {}, {}
+        for indice in self.indices:
+            try:
+                repositorio().crear_indice(indice.coleccion, indice.claves, indice.unico)
+                if indice.unico: unicos[(indice.coleccion, indice.claves[0][0])] = True
+            except ConnectionFailure as e:
+                if logger: logger.warning("No se pudieron asegurar los índices: %s", e)
+                errores[f"{indice.coleccion}.{indice.nombre}"] = str(e)
+                break
+            except OperationFailure as e:
+                if logger: logger.error("No se pudo crear el índice %s.%s: %s", indice.coleccion, indice.nombre, e)
+                errores[f"{indice.coleccion}.{indice.nombre}"] = str(e)
+        with self._lock:
+            self.errores = errores
+            self._unicos = unicos
+        return errores
+
+    def unico_garantizado(self, coleccion, campo):
+        """
+        ¿Existe el índice único de `campo`? Si asegurar no lo creó se consulta una
+        vez listar_indices; sin conexión se responde False sin recordarlo.
+        """
+        clave = (coleccion, campo)
+        with self._lock:
+            if clave in self._unicos: return self._unicos[clave]
+        try:
+            existe = any(e["unique"] and [c for c, _ in e["key"]] == [campo]
+                         for e in repositorio().listar_indices(coleccion).values())
+        except ConnectionFailure:
+            return False
+        with self._lock:
+            self._unicos[clave] = existe
+        return existe
+
+    def reportar(self):
+        """Estado de cada índice declarado: si existe y qué plan usa su consulta."""
+        existentes = {}
+        reporte = []
+        for indice in self.indices:
+            if indice.coleccion not in existentes:
+                existentes[indice.coleccion] = {
+                    tuple((c, int(d)) for c, d in e["key"]): e
+                    for e in repositorio().listar_indices(indice.coleccion).values()
+                }
+            actual = existentes[indice.coleccion].get(tuple(indice.claves))
+            plan = repositorio().plan_consulta(indice.coleccion, indice.consulta) if indice.consulta else None
+            reporte.append({
+                "coleccion": indice.coleccion,
+                "indice": indice.nombre,
+                "unico": indice.unico,
+                "existe": actual is not None and (actual["unique"] or not indice.unico),
+                "consulta": str(indice.consulta),
+                "plan": plan,
+                "collscan": bool(plan) and "COLLSCAN" in plan["etapas"],
+                "error": self.errores.get(f"{indice.coleccion}.{indice.nombre}"),
+            })
+        return {"indices": reporte, "faltantes": [f"{r['coleccion']}.{r['indice']}" for r in reporte
+                                                  if not r["existe"] or r["collscan"]]}
+
+
+gestor_indices = GestorIndices()
@@ -0,0 +1,143 @@
+import threading
+from datetime import datetime
+from .cache import catalog_cache
+from .metricas import contar_cache
+from .recomendador import pesos_de, ambito_marca, candidatos_marca, recomendar
+from .models import (
+    get_all_perfiles, get_all_marcas, repositorio,
+    registrar_observador_catalogo, registrar_observador_perfiles,
+    PROYECCION_NOMBRE, PROYECCION_PESOS
+)
+
+
+class RecomendacionesMaterializadas:
+    """
+    Top-3 + narrativa precalculados para cada par (perfil, marca) y para
+    (perfil, todas las marcas), guardados en la colección COLECCION con
+    _id "<perfil_id>:<marca_id|*>", así /api/comparar_resultados los sirve con
+    una sola lectura por _id.
+    Cada fila guarda la versión del catálogo y el nombre y los pesos del perfil
+    con los que se calculó: una fila de otra versión o de un perfil que cambió
+    no se sirve (se recalcula y se guarda al leerla). Solo se guardan pares de
+    marcas con modelos en el catálogo: un marca_id inventado se calcula sin
+    persistirlo. Las escrituras no recalculan nada dentro de la petición: solo
+    quedan obsoletos los pares afectados (los de las marcas del modelo y los de
+    "todas las marcas"), el resto se avanza de versión, y cada par obsoleto se
+    recalcula en su próxima lectura. POST /admin/recomendaciones/materializar
+    los recalcula todos de una vez.
+    """
+
+    COLECCION = "recomendaciones_materializadas"
+    K = 3
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.recalculos = 0
+
+    @staticmethod
+    def clave(perfil_id, marca_id):
+        return f"{perfil_id}:{marca_id or '*'}"
+
+    def _contar(self, atributo, n=1):
+        with self._lock:
+            setattr(self, atributo, getattr(self, atributo) + n)
+
+    @staticmethod
+    def _firma(perfil):
+        """Lo que del perfil entra en la respuesta: nombre (narrativa) y pesos."""
+        return {"nombre": perfil.get("nombre"), **pesos_de(perfil)}
+
+    def obtener(self, perfil, marca_id, version):
+        """Fila materializada del par si corresponde a esa versión del catálogo y del perfil, o None."""
+        doc = repositorio().obtener(self.COLECCION, {"_id": self.clave(perfil["_id"], marca_id)})
+        return self.vigente(doc, version, perfil)
+
+    def vigente(self, doc, version, perfil):
+        """
+        doc si es de esa versión del catálogo y de los pesos actuales del perfil,
+        o None; cuenta el hit/miss (también para lecturas asíncronas).
+        """
+        vigente = doc is not None and perfil is not None and doc.get("version") == version \
+            and doc.get("perfil") == self._firma(perfil)
+        self._contar("hits" if vigente else "misses")
+        contar_cache("materializadas", vigente)
+        return doc if vigente else None
+
+    def materializar(self, perfiles, marcas):
+        """
+        Recalcula los pares perfiles x marcas ("" = todas) sobre un único snapshot
+        del catálogo y guarda con un bulk upsert los de marcas con modelos.
+        Devuelve todos los documentos.
+        """
+        marcas = list(marcas)
+        catalogo, limites = catalog_cache.get_con_varios_limites(ambito_marca(m) for m in marcas)
+        version = catalog_cache.version
+        ahora = datetime.utcnow()
+
+        docs, guardar = [], []
+        for marca_id in marcas:
+            candidatos = candidatos_marca(catalogo, limites[ambito_marca(marca_id)], marca_id)
+            for perfil in perfiles:
+                respuesta, estado = recomendar(perfil, marca_id, pesos_de(perfil), self.K, candidatos)
+                docs.append({
+                    "_id": self.clave(perfil["_id"], marca_id),
+                    "perfil_id": str(perfil["_id"]),
+                    "marca_id": marca_id or "",
+                    "perfil": self._firma(perfil),
+                    "version": version,
+                    "respuesta": respuesta,
+                    "cursor": estado,
+                    "actualizado": ahora,
+                })
+                if not marca_id or candidatos[0]: guardar.append(docs[-1])
+
+        if guardar:
+            repositorio().reemplazar_varios(self.COLECCION, guardar)
+            self._contar("recalculos", len(guardar))
+        return docs
+
+    def materializar_todo(self):
+        """Recalcula todos los pares y elimina los de perfiles o marcas que ya no existen."""
+        perfiles = get_all_perfiles(PROYECCION_PESOS)
+        marcas = [""] + [str(m["_id"]) for m in get_all_marcas(PROYECCION_NOMBRE, lazy=True)]
+        docs = self.materializar(perfiles, marcas)
+        vigentes = [d["_id"] for d in docs]
+        repositorio().eliminar_donde(self.COLECCION, {"_id": {"$nin": vigentes}})
+        return {"pares": len(docs), "version": docs[0]["version"] if docs else catalog_cache.version}
+
+    def al_cambiar_perfil(self, perfil_id):
+        """Observador de perfiles: borra las filas del perfil (se recalculan al leerlas)."""
+        repositorio().eliminar_donde(self.COLECCION, {"perfil_id": perfil_id})
+
+    def al_cambiar_catalogo(self, version, coleccion, antes, despues):
+        """
+        Observador del catálogo: solo cambian los pares de las marcas del modelo
+        (antes y después) y los de todas las marcas, que quedan con la versión
+        anterior y se recalculan al leerlos. Los demás siguen siendo válidos y,
+        si estaban al día, se avanzan a la nueva versión. Tras un cambio masivo
+        (antes y despues None) todos quedan obsoletos.
+        """
+        if antes is None and despues is None: return
+        afectadas = {""} | {str(d["marca_id"]) for d in (antes, despues) if d and d.get("marca_id")}
+        repositorio().actualizar_donde(
+            self.COLECCION,
+            {"version": version - 1, "marca_id": {"$nin": list(afectadas)}},
+            {"version": version},
+        )
+
+    def stats(self):
+        with self._lock:
+            lecturas = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "recalculos": self.recalculos,
+                "hit_ratio": round(self.hits / lecturas, 4) if lecturas else 0.0,
+            }
+
+
+recomendaciones_materializadas = RecomendacionesMaterializadas()
+registrar_observador_catalogo(recomendaciones_materializadas.al_cambiar_catalogo)
+registrar_observador_perfiles(recomendaciones_materializadas.al_cambiar_perfil)
@@ -0,0 +1,136 @@
+"""
+Métricas de Prometheus expuestas en /metrics:
+  - http_request_duration_seconds: latencia por endpoint, método y status.
+  - mongo_command_duration_seconds / mongo_command_documents_total: cada comando
+    de MongoDB (command monitoring de pymongo) etiquetado por colección.
+  - ieg_fase_duration_seconds / ieg_candidatos_total: tiempo del motor IEG en
+    normalización, scoring, top-k y narrativa, y modelos evaluados.
+  - cache_consultas_total: hits/misses de cada caché (el ratio se calcula en
+    Prometheus: rate(hit) / rate(total)).
+  - credenciales_duration_seconds / credenciales_rechazos_total: hashing de
+    contraseñas (espera en cola incluida) y peticiones rechazadas por cola llena
+    o timeout.
+Con varios workers de gunicorn se usa el modo multiproceso de prometheus_client:
+si PROMETHEUS_MULTIPROC_DIR está definido, cada worker escribe sus valores en
+ese directorio y /metrics agrega los de todos.
+"""
+import os
+import threading
+import time
+from flask import Response, g, request
+from prometheus_client import (
+    CollectorRegistry, Counter, Histogram, REGISTRY, CONTENT_TYPE_LATEST, generate_latest, multiprocess
+)
+from pymongo.monitoring import CommandListener
+
+BUCKETS_HTTP = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_RAPIDOS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+
+HTTP_LATENCIA = Histogram(
+    "http_request_duration_seconds", "Latencia de las peticiones HTTP",
+    ("endpoint", "method", "status"), buckets=BUCKETS_HTTP)
+MONGO_LATENCIA = Histogram(
+    "mongo_command_duration_seconds", "Duración de los comandos de MongoDB",
+    ("command", "collection", "resultado"), buckets=BUCKETS_RAPIDOS)
+MONGO_DOCUMENTOS = Counter(
+    "mongo_command_documents_total", "Documentos devueltos o afectados por comandos de MongoDB",
+    ("command", "collection"))
+IEG_FASE = Histogram(
+    "ieg_fase_duration_seconds", "Tiempo del motor IEG por fase",
+    ("fase",), buckets=BUCKETS_RAPIDOS)
+IEG_CANDIDATOS = Counter("ieg_candidatos_total", "Modelos evaluados por el motor IEG")
+IEG_INDICE = Counter(
+    "ieg_indice_dominancia_total", "Top-k resueltos con el índice de dominancia o por recorrido completo",
+    ("resultado",))
+IEG_ERRORES = Counter("ieg_errores_total", "Errores en el cálculo individual del IEG")
+RESPUESTAS_BYTES = Counter(
+    "http_respuesta_bytes_total", "Bytes de las respuestas comprimidas antes y después de comprimir",
+    ("codificacion", "etapa"))
+CACHE_CONSULTAS = Counter(
+    "cache_consultas_total", "Consultas a los cachés por resultado", ("cache", "resultado"))
+CREDENCIALES_LATENCIA = Histogram(
+    "credenciales_duration_seconds", "Duración del hashing de contraseñas, con la espera en cola",
+    ("operacion",), buckets=BUCKETS_HTTP)
+CREDENCIALES_RECHAZOS = Counter(
+    "credenciales_rechazos_total", "Operaciones de hashing rechazadas", ("operacion", "motivo"))
+
+
+def fase(nombre):
+    """Context manager que mide una fase del motor IEG."""
+    return IEG_FASE.labels(fase=nombre).time()
+
+
+def contar_cache(cache, hit):
+    CACHE_CONSULTAS.labels(cache=cache, resultado="hit" if hit else "miss").inc()
+
+
+class MetricasComandos(CommandListener):
+    """Listener de pymongo: duración y documentos de cada comando, por colección."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._colecciones = {}
+
+    @staticmethod
+    def _coleccion(event):
+        if event.command_name == "getMore":
+            return event.command.get("collection", "")
+        valor = event.command.get(event.command_name)
+        return valor if isinstance(valor, str) else ""
+
+    @staticmethod
+    def _documentos(reply):
+        cursor = reply.get("cursor")
+        if isinstance(cursor, dict):
+            return len(cursor.get("firstBatch", cursor.get("nextBatch", ())))
+        n = reply.get("n")
+        return n if isinstance(n, int) else 0
+
+    def started(self, event):
+        with self._lock:
+            self._colecciones[(event.request_id, event.connection_id)] = self._coleccion(event)
+
+    def _terminar(self, event, resultado, reply=None):
+        with self._lock:
+            coleccion = self._colecciones.pop((event.request_id, event.connection_id), "")
+        MONGO_LATENCIA.labels(event.command_name, coleccion, resultado).observe(event.duration_micros / 1e6)
+        if reply is not None:
+            MONGO_DOCUMENTOS.labels(event.command_name, coleccion).inc(self._documentos(reply))
+
+    def succeeded(self, event):
+        self._terminar(event, "ok", event.reply)
+
+    def failed(self, event):
+        self._terminar(event, "fallo")
+
+
+def _registro():
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registro = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registro)
+        return registro
+    return REGISTRY
+
+
+def init_app(app, mongo):
+    """Instrumenta las peticiones, registra el listener de comandos y publica /metrics."""
+    mongo.registrar_listener(MetricasComandos())
+    token = os.getenv("METRICS_TOKEN")
+
+    @app.before_request
+    def _iniciar_cronometro():
+        g._inicio_peticion = time.perf_counter()
+
+    @app.after_request
+    def _medir_peticion(response):
+        inicio = g.pop("_inicio_peticion", None)
+        if inicio is not None and request.endpoint != "metricas":
+            HTTP_LATENCIA.labels(request.endpoint or "desconocido", request.method,
+                                 response.status_code).observe(time.perf_counter() - inicio)
+        return response
+
+    @app.route("/metrics", endpoint="metricas")
+    def metricas():
+        if token and request.headers.get("Authorization") != f"Bearer {token}":
+            return Response("No autorizado\n", status=401)
+        return Response(generate_latest(_registro()), mimetype=CONTENT_TYPE_LATEST)
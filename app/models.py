@@ -1,94 +1,210 @@
 from . import mongo
+from .repositorios import RepositorioMongo
 from bson.objectid import ObjectId 
 
+#  PROYECCIONES
+#  Los accesores aceptan `proyeccion` (campos a traer) y `lazy=True` para devolver
+#  el cursor sin materializar la lista cuando el llamador solo recorre los datos.
+
+PROYECCION_ID = {"_id": 1}
+PROYECCION_NOMBRE = {"nombre": 1}
+PROYECCION_PESOS = {"nombre": 1, "descripcion": 1, "peso_rendimiento": 1, "peso_precio": 1,
+                    "peso_consumo": 1, "peso_temperatura": 1}
+PROYECCION_SCORING = {"rendimiento": 1, "precio": 1, "consumo": 1, "temperatura": 1}
+PROYECCION_CATALOGO = {**PROYECCION_SCORING, "nombre": 1, "codigo_modelo": 1,
+                       "marca_id": 1, "perfil_uso_id": 1}
+
+#  ALMACENAMIENTO
+#  Todas las funciones pasan por el repositorio configurado (repositorios.py):
+#  MongoDB por defecto, en memoria o réplica en memoria según STORAGE_BACKEND.
+
+_repositorio = RepositorioMongo(mongo)
+
+def configurar_repositorio(repositorio):
+    global _repositorio
+    _repositorio = repositorio
+
+def repositorio():
+    return _repositorio
+
+def _buscar(coleccion, filtro=None, proyeccion=None, lazy=False):
+    return _repositorio.listar(coleccion, filtro, proyeccion, lazy)
+
 #  USUARIOS
 
 def create_user(data):
-    return mongo.db.usuarios.insert_one(data)
+    return _repositorio.insertar("usuarios", data)
 
-def get_user_by_email(email):
-    return mongo.db.usuarios.find_one({"email": email})
+def get_user_by_email(email, proyeccion=None):
+    return _repositorio.obtener("usuarios", {"email": email}, proyeccion)
+
+def update_user_password(id, anterior, nuevo):
+    """Reemplaza el hash solo si sigue siendo `anterior` (no pisa un cambio concurrente)."""
+    return _repositorio.actualizar_donde("usuarios", {"_id": ObjectId(id), "password": anterior},
+                                         {"password": nuevo})
 
 #  PERFILES DE USO
 
 def create_perfil(data):
-    return mongo.db.perfiles_uso.insert_one(data)
+    return _repositorio.insertar("perfiles_uso", data)
 
-def get_all_perfiles():
-    return list(mongo.db.perfiles_uso.find())
+def get_all_perfiles(proyeccion=None, lazy=False):
+    return _buscar("perfiles_uso", None, proyeccion, lazy)
 
-def get_perfil_by_id(id):
+def get_perfil_by_id(id, proyeccion=None):
     try:
-        return mongo.db.perfiles_uso.find_one({"_id": ObjectId(id)})
+        return _repositorio.obtener("perfiles_uso", {"_id": ObjectId(id)}, proyeccion)
     except:
         return None
 
+def get_perfiles_by_ids(ids, proyeccion=None):
+    """Varios perfiles en una sola consulta $in. Devuelve {id (str): perfil}; omite ids inválidos."""
+    validos = [ObjectId(i) for i in set(ids) if ObjectId.is_valid(i)]
+    if not validos: return {}
+    return {str(p["_id"]): p for p in _buscar("perfiles_uso", {"_id": {"$in": validos}}, proyeccion, lazy=True)}
+
+_observadores_perfiles = []
+
+def registrar_observador_perfiles(callback):
+    """Registra callback(perfil_id), que se ejecuta tras modificar o eliminar un perfil."""
+    _observadores_perfiles.append(callback)
+
+def _notificar_cambio_perfil(id):
+    for callback in _observadores_perfiles:
+        callback(str(id))
+
 def update_perfil(id, data):
-    return mongo.db.perfiles_uso.update_one({"_id": ObjectId(id)}, {"$set": data})
+    resultado = _repositorio.actualizar("perfiles_uso", id, data)
+    _notificar_cambio_perfil(id)
+    return resultado
 
 def delete_perfil(id):
-    return mongo.db.perfiles_uso.delete_one({"_id": ObjectId(id)})
+    resultado = _repositorio.eliminar("perfiles_uso", id)
+    _notificar_cambio_perfil(id)
+    return resultado
 
 #  MARCAS
 
 def create_marca(data):
-    return mongo.db.marcas.insert_one(data)
+    return _repositorio.insertar("marcas", data)
 
-def get_all_marcas():
-    return list(mongo.db.marcas.find())
+def get_all_marcas(proyeccion=None, lazy=False):
+    return _buscar("marcas", None, proyeccion, lazy)
 
 def get_marca_by_id(id):
     try:
-        return mongo.db.marcas.find_one({"_id": ObjectId(id)})
+        return _repositorio.obtener("marcas", {"_id": ObjectId(id)})
     except:
         return None
 
 def update_marca(id, data):
-    return mongo.db.marcas.update_one({"_id": ObjectId(id)}, {"$set": data})
+    return _repositorio.actualizar("marcas", id, data)
 
 def delete_marca(id):
-    return mongo.db.marcas.delete_one({"_id": ObjectId(id)})
+    return _repositorio.eliminar("marcas", id)
+
+
+#  VERSIÓN DEL CATÁLOGO
+
+_observadores_catalogo = []
+
+def registrar_observador_catalogo(callback):
+    """
+    Registra callback(version, coleccion, antes, despues), que se ejecuta tras
+    cada escritura del catálogo. antes/despues son None en altas/bajas; ambos
+    None indican un cambio masivo (importación): no hay nada incremental que aplicar.
+    """
+    _observadores_catalogo.append(callback)
+
+def get_catalog_version():
+    return _repositorio.version_catalogo()
+
+def bump_catalog_version():
+    return _repositorio.incrementar_version_catalogo()
+
+def _notificar_cambio_catalogo(coleccion, antes, despues):
+    version = bump_catalog_version()
+    for callback in _observadores_catalogo:
+        callback(version, coleccion, antes, despues)
 
 
 #  MODELOS 
 
 def create_modelo(data):
-    return mongo.db.modelos_computadora.insert_one(data)
+    resultado = _repositorio.insertar("modelos_computadora", data)
+    _notificar_cambio_catalogo("modelos_computadora", None, dict(data))
+    return resultado
 
-def get_all_modelos():
-    return list(mongo.db.modelos_computadora.find())
+def get_all_modelos(proyeccion=None, lazy=False):
+    return _buscar("modelos_computadora", None, proyeccion, lazy)
 
 def get_modelo_by_id(id):
     try:
-        return mongo.db.modelos_computadora.find_one({"_id": ObjectId(id)})
+        return _repositorio.obtener("modelos_computadora", {"_id": ObjectId(id)})
     except:
         return None
 
 def get_modelo_by_codigo(codigo):
-    return mongo.db.modelos_computadora.find_one({"codigo_modelo": codigo})
+    return _repositorio.obtener("modelos_computadora", {"codigo_modelo": codigo})
 
 def update_modelo(id, data):
-    return mongo.db.modelos_computadora.update_one({"_id": ObjectId(id)}, {"$set": data})
+    antes = _repositorio.actualizar("modelos_computadora", id, data)
+    if antes:
+        _notificar_cambio_catalogo("modelos_computadora", antes, {**antes, **data})
+    return antes
 
 def delete_modelo(id):
-    return mongo.db.modelos_computadora.delete_one({"_id": ObjectId(id)})
+    antes = _repositorio.eliminar("modelos_computadora", id)
+    if antes:
+        _notificar_cambio_catalogo("modelos_computadora", antes, None)
+    return antes
 
-def get_all_laptops():
+def importar_modelos(coleccion, docs):
+    """Upsert por codigo_modelo de un lote. No notifica: se llama a notificar_importacion al final."""
+    return _repositorio.upsert_varios(coleccion, "codigo_modelo", docs)
+
+def notificar_importacion(coleccion):
+    _notificar_cambio_catalogo(coleccion, None, None)
+
+def get_all_laptops(proyeccion=None, lazy=False):
     """
     Trae los datos de la segunda colección.
     """
-    return list(mongo.db.modelos_laptops.find())
+    return _buscar("modelos_laptops", None, proyeccion, lazy)
 
-def get_all_consultas():
+def get_all_consultas(proyeccion=None, lazy=False):
+    return _buscar("consultas", None, proyeccion, lazy)
 
-    return list(mongo.db.consultas.find())
-
-def buscar_modelos_por_nombre(texto):
+def buscar_modelos_por_nombre(texto, proyeccion=None):
     query = {"nombre": {"$regex": texto, "$options": "i"}}
-    return list(mongo.db.modelos_computadora.find(query))
+    return _buscar("modelos_computadora", query, proyeccion)
 
 def obtener_perfil_por_id(perfil_id):
-    return mongo.db.perfiles_uso.find_one({"_id": ObjectId(perfil_id)})
+    return _repositorio.obtener("perfiles_uso", {"_id": ObjectId(perfil_id)})
 
 def obtener_modelos():
-    return list(mongo.db.modelos_computadora.find())
\ No newline at end of file
+    return _buscar("modelos_computadora")
+
+
+#  RANKING IEG EN MONGODB (pushdown; los backends en memoria lo calculan en el proceso)
+
+def limites_ieg_mongo(filtro, incluir_laptops=True):
+    """(maximos, minimos) calculados con $group, o None si no hay modelos."""
+    return _repositorio.limites_ieg(filtro, incluir_laptops)
+
+def ranking_ieg_mongo(pesos, maximos, minimos, filtro, incluir_laptops=True, limite=None):
+    """Cursor con los modelos ordenados por IEG, calculado dentro de MongoDB."""
+    return _repositorio.ranking_ieg(pesos, maximos, minimos, filtro, incluir_laptops, limite)
+
+
+#  ESTADÍSTICAS DEL DASHBOARD (conteos y agregaciones en el servidor)
+
+def contar_documentos(coleccion):
+    return _repositorio.contar(coleccion)
+
+def contar_modelos_por_perfil():
+    return _repositorio.modelos_por_perfil()
+
+def get_mejor_relacion_rendimiento_precio():
+    """Modelo con mayor rendimiento/precio (solo precios numéricos > 0)."""
+    return _repositorio.mejor_relacion_rendimiento_precio()
@@ -0,0 +1,141 @@
+import base64
+import re
+from bson import json_util
+from bson.objectid import ObjectId
+from . import mongo
+
+
+def _lookup_nombre(coleccion, campo_local, alias):
+    """$lookup que resuelve el nombre de una referencia guardada como string u ObjectId."""
+    return [
+        {"$lookup": {
+            "from": coleccion,
+            "let": {"ref": f"${campo_local}"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$_id", {"$convert": {
+                    "input": "$$ref", "to": "objectId", "onError": None, "onNull": None}}]}}},
+                {"$project": {"nombre": 1}},
+            ],
+            "as": f"_{alias}",
+        }},
+        {"$addFields": {alias: {"$ifNull": [{"$arrayElemAt": [f"$_{alias}.nombre", 0]}, "N/A"]}}},
+        {"$project": {f"_{alias}": 0}},
+    ]
+
+
+class ListadoPaginado:
+    """
+    Motor genérico de listados del admin con paginación por cursor (keyset).
+    Filtra y ordena en MongoDB, continúa la página con una condición sobre
+    (columna de orden, _id) en lugar de skip, y resuelve los nombres de marcas,
+    perfiles o modelos con $lookup solo para las filas de la página.
+    """
+
+    def __init__(self, coleccion, columnas_orden, filtros, lookups=(), orden_defecto="_id",
+                 dir_defecto="asc", proyeccion=None, limite_defecto=25, limite_maximo=100):
+        self.coleccion = coleccion
+        self.columnas_orden = set(columnas_orden) | {"_id"}
+        self.filtros = filtros  # nombre -> "igual" | "prefijo"
+        self.lookups = lookups  # (coleccion, campo_local, alias)
+        self.orden_defecto = orden_defecto
+        self.dir_defecto = dir_defecto
+        self.proyeccion = proyeccion
+        self.limite_defecto = limite_defecto
+        self.limite_maximo = limite_maximo
+
+    @staticmethod
+    def codificar_cursor(datos):
+        return base64.urlsafe_b64encode(json_util.dumps(datos).encode()).decode()
+
+    @staticmethod
+    def decodificar_cursor(cursor):
+        try:
+            return json_util.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError):
+            return None
+
+    def _match_filtros(self, valores):
+        match = {}
+        for campo, tipo in self.filtros.items():
+            valor = (valores.get(campo) or "").strip()
+            if not valor: continue
+            if tipo == "prefijo":
+                # Prefijo anclado y sensible a mayúsculas: puede usar el índice del campo
+                match[campo] = {"$regex": "^" + re.escape(valor)}
+            else:
+                candidatos = [valor]
+                if ObjectId.is_valid(valor): candidatos.append(ObjectId(valor))
+                match[campo] = {"$in": candidatos}
+        return match
+
+    @staticmethod
+    def _match_keyset(orden, direccion, estado):
+        op = "$gt" if direccion == 1 else "$lt"
+        if orden == "_id":
+            return {"_id": {op: estado["id"]}}
+        if estado["valor"] is None:
+            # Los nulos ordenan antes que cualquier valor: en ascendente siguen
+            # los demás nulos y luego todo lo no nulo; en descendente solo nulos.
+            siguientes_nulos = {orden: None, "_id": {op: estado["id"]}}
+            if direccion == -1: return siguientes_nulos
+            return {"$or": [siguientes_nulos, {orden: {"$ne": None}}]}
+        return {"$or": [
+            {orden: {op: estado["valor"]}},
+            {orden: estado["valor"], "_id": {op: estado["id"]}},
+        ]}
+
+    def pagina(self, parametros):
+        """
+        parametros: dict con orden, dir ("asc"/"desc"), limite, cursor y los filtros.
+        Devuelve {"items", "siguiente_cursor", "orden", "dir"} o None si el cursor no es válido.
+        """
+        orden = parametros.get("orden") or self.orden_defecto
+        if orden not in self.columnas_orden: orden = self.orden_defecto
+        direccion = -1 if (parametros.get("dir") or self.dir_defecto) == "desc" else 1
+        try:
+            limite = max(1, min(int(parametros.get("limite") or self.limite_defecto), self.limite_maximo))
+        except (TypeError, ValueError):
+            limite = self.limite_defecto
+
+        match = self._match_filtros(parametros)
+        cursor = parametros.get("cursor")
+        if cursor:
+            estado = self.decodificar_cursor(cursor)
+            if not estado or estado.get("orden") != orden or estado.get("dir") != direccion:
+                return None
+            match = {"$and": [match, self._match_keyset(orden, direccion, estado)]}
+
+        pipeline = [{"$match": match}, {"$sort": {orden: direccion, "_id": direccion}}, {"$limit": limite + 1}]
+        if self.proyeccion:
+            pipeline.append({"$project": self.proyeccion})
+        for coleccion, campo_local, alias in self.lookups:
+            pipeline.extend(_lookup_nombre(coleccion, campo_local, alias))
+
+        items = list(mongo.db[self.coleccion].aggregate(pipeline))
+        siguiente = None
+        if len(items) > limite:
+            items = items[:limite]
+            ultimo = items[-1]
+            siguiente = self.codificar_cursor({"orden": orden, "dir": direccion,
+                                               "valor": ultimo.get(orden), "id": ultimo["_id"]})
+
+        return {"items": items, "siguiente_cursor": siguiente,
+                "orden": orden, "dir": "desc" if direccion == -1 else "asc"}
+
+
+listado_modelos = ListadoPaginado(
+    "modelos_computadora",
+    columnas_orden=("nombre", "codigo_modelo", "precio", "rendimiento", "consumo", "temperatura"),
+    filtros={"nombre": "prefijo", "codigo_modelo": "prefijo", "marca_id": "igual", "perfil_uso_id": "igual"},
+    lookups=(("marcas", "marca_id", "marca_nombre"), ("perfiles_uso", "perfil_uso_id", "perfil_nombre")),
+    orden_defecto="nombre",
+)
+
+listado_consultas = ListadoPaginado(
+    "consultas",
+    columnas_orden=("fecha",),
+    filtros={"perfil_uso_id": "igual", "modelo_id": "igual"},
+    lookups=(("perfiles_uso", "perfil_uso_id", "perfil_nombre"), ("modelos_computadora", "modelo_id", "modelo_nombre")),
+    orden_defecto="_id",
+    dir_defecto="desc",
+)
@@ -0,0 +1,94 @@
+"""
+Pipelines de agregación para calcular el ranking IEG dentro de MongoDB.
+Replican la fórmula de CoreService.calcular_score:
+  - Los valores se limpian con $convert y $cond (nulos, no numéricos, NaN e
+    infinitos -> 0.0, como _safe_float).
+  - Los límites se calculan con $group y se inyectan como literales en el $project.
+"""
+from bson.objectid import ObjectId
+from .services import CoreService, CAMPOS_IEG
+
+TIPO_PC = "PC Escritorio"
+TIPO_LAPTOP = "Laptop"
+
+
+INFINITO = float("inf")
+
+
+def _valor_limpio(campo):
+    # En BSON NaN es menor que cualquier número (incluido -inf): queda fuera del rango
+    convertido = {"$convert": {"input": f"${campo}", "to": "double", "onError": 0.0, "onNull": 0.0}}
+    finito = {"$and": [{"$gt": ["$$v", -INFINITO]}, {"$lt": ["$$v", INFINITO]}]}
+    return {"$let": {"vars": {"v": convertido}, "in": {"$cond": [finito, "$$v", 0.0]}}}
+
+
+def filtro_por_id(campo, valor):
+    """Coincide tanto si el id se guardó como string como si se guardó como ObjectId."""
+    if not valor: return {}
+    candidatos = [valor]
+    if ObjectId.is_valid(valor): candidatos.append(ObjectId(valor))
+    return {campo: {"$in": candidatos}}
+
+
+def _origen(filtro, incluir_laptops):
+    """Etapas iniciales: PCs filtradas + (opcional) laptops vía $unionWith."""
+    etapas = [{"$match": filtro}, {"$addFields": {"tipo_equipo": TIPO_PC}}]
+    if incluir_laptops:
+        etapas.append({"$unionWith": {
+            "coll": "modelos_laptops",
+            "pipeline": [{"$match": filtro}, {"$addFields": {"tipo_equipo": TIPO_LAPTOP}}],
+        }})
+    return etapas
+
+
+def pipeline_limites(filtro, incluir_laptops=True):
+    grupo = {"_id": None, "total": {"$sum": 1}}
+    for clave, campo in CAMPOS_IEG:
+        grupo[f"max_{clave}"] = {"$max": _valor_limpio(campo)}
+        grupo[f"min_{clave}"] = {"$min": _valor_limpio(campo)}
+    return _origen(filtro, incluir_laptops) + [{"$group": grupo}]
+
+
+def _normalizado(campo, min_v, max_v):
+    rango = max_v - min_v
+    if rango == 0: return 0.0
+    return {"$divide": [{"$subtract": [_valor_limpio(campo), min_v]}, rango]}
+
+
+def pipeline_ranking(pesos, maximos, minimos, filtro, incluir_laptops=True, limite=None):
+    """
+    IEG por documento con $project, ordenado con $sort (empates por _id) y,
+    si se indica, recortado con $limit (MongoDB aplica un top-k en el sort).
+    """
+    def peso(clave): return CoreService._safe_float(pesos.get(clave))
+
+    Rn = _normalizado("rendimiento", minimos['rend'], maximos['rend'])
+    Pn = _normalizado("precio", minimos['prec'], maximos['prec'])
+    Cn = _normalizado("consumo", minimos['cons'], maximos['cons'])
+    Tn = _normalizado("temperatura", minimos['temp'], maximos['temp'])
+
+    score = {"$add": [
+        {"$multiply": [peso("peso_rendimiento"), Rn]},
+        {"$multiply": [peso("peso_precio"), {"$subtract": [1, Pn]}]},
+        {"$multiply": [peso("peso_consumo"), {"$subtract": [1, Cn]}]},
+        {"$multiply": [peso("peso_temperatura"), {"$subtract": [1, Tn]}]},
+    ]}
+
+    etapas = _origen(filtro, incluir_laptops) + [
+        {"$project": {
+            "nombre": 1, "precio": 1, "rendimiento": 1, "consumo": 1, "temperatura": 1,
+            "marca_id": 1, "tipo_equipo": 1, "score": score,
+        }},
+        {"$sort": {"score": -1, "_id": 1}},
+    ]
+    if limite:
+        etapas.append({"$limit": int(limite)})
+    return etapas
+
+
+def limites_desde_grupo(doc):
+    """Convierte la salida del $group en (maximos, minimos) como los de CoreService."""
+    if not doc or not doc.get("total"): return None
+    maximos = {clave: float(doc[f"max_{clave}"]) for clave, _ in CAMPOS_IEG}
+    minimos = {clave: float(doc[f"min_{clave}"]) for clave, _ in CAMPOS_IEG}
+    return maximos, minimos
@@ -1,11 +1,25 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify, current_app
+from flask import Response, stream_with_context
 import os
-from werkzeug.security import generate_password_hash, check_password_hash
+import io
+import csv
+import json
+import base64
+from functools import partial
+from pymongo.errors import DuplicateKeyError
 from .services import CoreService
+from .credenciales import servicio_credenciales, CredencialesSaturadas
+from .cache import catalog_cache, resultados_cache
+from .materializacion import recomendaciones_materializadas
+from .pipelines import filtro_por_id
+from .recomendador import (
+    pesos_de, fila_comparacion, ambito_marca, candidatos_marca, scores_catalogo, estado_cursor, recomendar
+)
 from .models import (
-    create_user, get_user_by_email, get_all_modelos, get_all_marcas, 
-    buscar_modelos_por_nombre, get_all_perfiles, get_perfil_by_id, 
-    get_all_laptops
+    create_user, get_user_by_email, get_all_marcas, 
+    get_all_perfiles, get_perfil_by_id, get_perfiles_by_ids,
+    limites_ieg_mongo, ranking_ieg_mongo,
+    PROYECCION_ID, PROYECCION_NOMBRE, PROYECCION_PESOS
 )
 
 public_bp = Blueprint("public", __name__)
@@ -13,6 +27,62 @@ public_bp = Blueprint("public", __name__)
 ADMIN_USER = os.getenv("ADMIN_USER")
 ADMIN_PASS = os.getenv("ADMIN_PASS")
 
+TOP_K_DEFECTO = 3
+TOP_K_MAXIMO = 50
+LIMITE_PAGINA_DEFECTO = 20
+LIMITE_PAGINA_MAXIMO = 100
+MODOS_RANKING = ("python", "mongo", "verificar")
+LIMITE_BUSQUEDA = 50
+LIMITE_AUTOCOMPLETE = 10
+LIMITE_BATCH = 50
+COLUMNAS_REPORTE_CSV = ("modelo", "marca", "precio", "rendimiento", "score")
+
+
+def _codificar_cursor(datos):
+    return base64.urlsafe_b64encode(json.dumps(datos).encode()).decode()
+
+def _decodificar_cursor(cursor):
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        return None
+
+def _entero_acotado(valor, defecto, maximo):
+    try:
+        return max(1, min(int(valor), maximo))
+    except (TypeError, ValueError):
+        return defecto
+
+def _modo_ranking(data=None):
+    """Modo del ranking: parámetro 'modo' de la petición o RANKING_MODE de la app."""
+    modo = (data or {}).get("modo") or request.args.get("modo") or current_app.config.get("RANKING_MODE")
+    return modo if modo in MODOS_RANKING else "python"
+
+def _ranking_en_mongo(pesos, filtro, incluir_laptops, limite, ambito, verificar=False, lazy=False):
+    """
+    Ranking IEG calculado dentro de MongoDB: límites con $group y score con
+    $project/$sort/$limit. Devuelve solo los documentos ganadores con su 'score'
+    (lazy=True: iterador sobre el cursor, sin materializar la lista).
+    """
+    limites = limites_ieg_mongo(filtro, incluir_laptops)
+    if not limites: return []
+    maximos, minimos = limites
+    filas = ranking_ieg_mongo(pesos, maximos, minimos, filtro, incluir_laptops, limite)
+    if verificar: filas = _verificar_pushdown(filas, pesos, limites, ambito)
+    return filas if lazy else list(filas)
+
+def _verificar_pushdown(filas, pesos, limites, ambito):
+    """Contrasta el resultado de MongoDB con los límites del caché y con CoreService.calcular_score."""
+    _, limites_python = catalog_cache.get_con_limites(*ambito)
+    if limites_python != limites:
+        current_app.logger.warning("Pushdown IEG: límites %s difieren de Python %s", limites, limites_python)
+    maximos, minimos = limites
+    for f in filas:
+        esperado = CoreService.calcular_score(f, pesos, maximos, minimos)
+        if abs(esperado - f["score"]) > 1e-9:
+            current_app.logger.warning("Pushdown IEG: %s score %s, Python %s", f.get("_id"), f["score"], esperado)
+        yield f
+
 
 @public_bp.route("/")
 def index():
@@ -32,12 +102,22 @@ def registro():
         if password != confirm_password:
             flash("Las contraseñas no coinciden.", "danger")
             return redirect(url_for("public.registro"))
-        if get_user_by_email(email):
+
+        # Antes de ocupar el pool de hashing: un correo repetido no cuesta un scrypt
+        if get_user_by_email(email, PROYECCION_ID):
+            flash("El correo electrónico ya está registrado.", "warning")
+            return redirect(url_for("public.registro"))
+        try:
+            hashed_password = servicio_credenciales.hashear(password)
+        except CredencialesSaturadas:
+            flash("Hay muchas solicitudes en este momento, intente de nuevo en unos segundos.", "warning")
+            return redirect(url_for("public.registro"))
+        # El índice único de email sigue detectando la carrera entre dos altas
+        try:
+            create_user({"nombre": nombre, "email": email, "password": hashed_password, "role": "usuario"})
+        except DuplicateKeyError:
             flash("El correo electrónico ya está registrado.", "warning")
             return redirect(url_for("public.registro"))
-
-        hashed_password = generate_password_hash(password)
-        create_user({"nombre": nombre, "email": email, "password": hashed_password, "role": "usuario"})
         flash("Cuenta creada exitosamente.", "success")
         return redirect(url_for("public.login"))
     return render_template("registro.html")
@@ -54,7 +134,12 @@ def login():
             return redirect(url_for("admin.home"))
 
         user_db = get_user_by_email(usuario_input)
-        if user_db and check_password_hash(user_db["password"], password_input):
+        try:
+            valido = servicio_credenciales.verificar_usuario(user_db, password_input)
+        except CredencialesSaturadas:
+            flash("Hay muchas solicitudes en este momento, intente de nuevo en unos segundos.", "warning")
+            return redirect(url_for("public.login"))
+        if valido:
             session["user_role"] = "usuario"
             session["user_name"] = user_db["nombre"]
             session["user_id"] = str(user_db["_id"])
@@ -76,77 +161,206 @@ def home_usuario():
     if session["user_role"] == "admin": return redirect(url_for("admin.home"))
 
     query = request.args.get("q")
-    if query: modelos = buscar_modelos_por_nombre(query)
-    else: modelos = get_all_modelos()
+    if query: modelos = [m for m, _ in catalog_cache.buscar(query, LIMITE_BUSQUEDA)]
+    else: modelos = catalog_cache.get_modelos()
 
-    marcas = {str(m["_id"]): m["nombre"] for m in get_all_marcas()}
-    for m in modelos:
-        m["nombre_marca"] = marcas.get(str(m.get("marca_id")), "Desconocida")
+    # Las vistas del catálogo son de solo lectura: se copian a dicts
+    marcas = {str(m["_id"]): m["nombre"] for m in get_all_marcas(PROYECCION_NOMBRE, lazy=True)}
+    modelos = [dict(m, nombre_marca=marcas.get(str(m.get("marca_id")), "Desconocida")) for m in modelos]
     
     return render_template("usuario_home.html", 
                            modelos=modelos, 
                            usuario=session.get("user_name"),
                            busqueda=query, 
-                           perfiles_disponibles=get_all_perfiles())
+                           perfiles_disponibles=get_all_perfiles(PROYECCION_NOMBRE))
+
+@public_bp.route("/api/autocomplete", methods=["GET"])
+def autocomplete():
+    texto = request.args.get("q", "")
+    limite = _entero_acotado(request.args.get("limite"), LIMITE_AUTOCOMPLETE, LIMITE_BUSQUEDA)
+    sugerencias = [{
+        "id": str(m["_id"]),
+        "nombre": m.get("nombre"),
+        "codigo_modelo": m.get("codigo_modelo"),
+        "tipo": m.get("tipo_equipo"),
+        "puntaje": round(puntaje, 4),
+    } for m, puntaje in catalog_cache.buscar(texto, limite)]
+    return jsonify({"sugerencias": sugerencias})
 
 @public_bp.route("/api/get_marcas", methods=["GET"])
 def get_marcas_api():
-    marcas = get_all_marcas()
+    marcas = get_all_marcas(PROYECCION_NOMBRE, lazy=True)
     data = [{"id": str(m["_id"]), "nombre": m["nombre"]} for m in marcas]
     return jsonify({"marcas": data})
 
+def _cursor(perfil_id, marca_id, estado, version=None):
+    """
+    El cursor es la última posición (score, índice) servida; solo es válido
+    para la misma versión del catálogo y el mismo perfil/marca.
+    """
+    if estado is None: return None
+    v = catalog_cache.version if version is None else version
+    return _codificar_cursor({"v": v, "p": perfil_id, "m": marca_id or "", **estado})
+
+def _cursor_tras(perfil_id, marca_id, scores, indices, servidos):
+    return _cursor(perfil_id, marca_id, estado_cursor(indices, scores[indices], servidos, len(scores)))
+
+def _recomendar(perfil, perfil_id, marca_id, pesos, k, modo, candidatos=None):
+    """Top-k + narrativa para un perfil y un filtro de marca. Devuelve el cuerpo JSON."""
+    if modo != "python":
+        # Pushdown: MongoDB devuelve solo el top-k
+        ganadores = _ranking_en_mongo(pesos, filtro_por_id("marca_id", marca_id), True, k,
+                                      ambito_marca(marca_id), verificar=(modo == "verificar"))
+        if not ganadores: return {"top3": [], "mensaje": "No hay modelos disponibles."}
+        top3 = [fila_comparacion(m, m["score"]) for m in ganadores]
+        recomendacion = CoreService.generar_narrativa_avanzada(perfil['nombre'], top3, pesos)
+        return {"top3": top3, "recomendacion": recomendacion, "siguiente_cursor": None}
+
+    respuesta, estado = recomendar(perfil, marca_id, pesos, k, candidatos)
+    if "siguiente_cursor" in respuesta:
+        respuesta["siguiente_cursor"] = _cursor(perfil_id, marca_id, estado)
+    return respuesta
+
+def _materializada(perfil, perfil_id, marca_id, version, leer_fila=None):
+    """
+    Top-3 por defecto desde la fila materializada del par (perfil, marca), una
+    lectura por _id. Si falta o es de otra versión del catálogo o del perfil, se
+    recalcula y se guarda (si la marca tiene modelos).
+    """
+    if leer_fila is None: doc = recomendaciones_materializadas.obtener(perfil, marca_id, version)
+    else: doc = recomendaciones_materializadas.vigente(leer_fila(), version, perfil)
+    if doc is None: doc, = recomendaciones_materializadas.materializar([perfil], [marca_id or ""])
+    return _respuesta_materializada(doc, perfil_id, marca_id)
+
+def _respuesta_materializada(doc, perfil_id, marca_id):
+    respuesta = dict(doc["respuesta"])
+    if "siguiente_cursor" in respuesta:
+        respuesta["siguiente_cursor"] = _cursor(perfil_id, marca_id, doc["cursor"], doc["version"])
+    return respuesta
+
+def _clave_resultado(perfil_id, marca_id, pesos, perfil, version, k, modo):
+    """
+    Clave de resultados_cache: la versión del catálogo, los pesos y el nombre del
+    perfil forman parte de ella, así los cambios hechos en otros workers también la invalidan.
+    """
+    return (perfil_id, marca_id or "", tuple(pesos.values()), perfil.get("nombre"), version, k, modo)
+
+def _error_ids(perfil_id, marca_id):
+    """Mensaje de error si falta el perfil o los ids no son strings; None si son válidos."""
+    if not perfil_id: return "Seleccione un perfil"
+    if not isinstance(perfil_id, str) or not isinstance(marca_id, (str, type(None))):
+        return "perfil_id y marca_id deben ser strings"
+    return None
+
 @public_bp.route("/api/comparar_resultados", methods=["POST"])
 def comparar_resultados():
     data = request.get_json()
     perfil_id = data.get("perfil_id")
     marca_id = data.get("marca_id") 
+    k = _entero_acotado(data.get("k"), TOP_K_DEFECTO, TOP_K_MAXIMO)
+    cursor = data.get("cursor")
     
-    if not perfil_id: return jsonify({"error": "Seleccione un perfil"}), 400
-
-    perfil = get_perfil_by_id(perfil_id)
-    pesos = {
-        "peso_rendimiento": float(perfil.get("peso_rendimiento", 0)),
-        "peso_precio": float(perfil.get("peso_precio", 0)),
-        "peso_consumo": float(perfil.get("peso_consumo", 0)),
-        "peso_temperatura": float(perfil.get("peso_temperatura", 0)),
-    }
-
-    pcs = get_all_modelos()
-    laptops = get_all_laptops()
-    
-    for p in pcs: p['tipo_equipo'] = 'PC Escritorio'
-    for l in laptops: l['tipo_equipo'] = 'Laptop'
-    
-    todos = pcs + laptops
-    
-    filtrados = [m for m in todos if not marca_id or str(m.get("marca_id")) == marca_id]
-
-    if not filtrados: return jsonify({"top3": [], "mensaje": "No hay modelos disponibles."})
-
-    try:
-        def sf(v): return CoreService._safe_float(v)
-        maximos = {k: max(sf(m.get(l)) for m in filtrados) for k, l in [('rend','rendimiento'),('prec','precio'),('cons','consumo'),('temp','temperatura')]}
-        minimos = {k: min(sf(m.get(l)) for m in filtrados) for k, l in [('rend','rendimiento'),('prec','precio'),('cons','consumo'),('temp','temperatura')]}
-    except:
-        return jsonify({"top3": [], "mensaje": "Datos insuficientes para calcular."})
-
-    rankings = []
-    for m in filtrados:
-        score = CoreService.calcular_score(m, pesos, maximos, minimos)
-        rankings.append({
-            "nombre": m["nombre"],
-            "precio": m["precio"],
-            "rendimiento": m["rendimiento"],
-            "score": round(score, 4),
-            "tipo": m["tipo_equipo"]
-        })
-
-    rankings.sort(key=lambda x: x['score'], reverse=True)
-    top3 = rankings[:3]
-    
-    recomendacion = CoreService.generar_narrativa_avanzada(perfil['nombre'], top3, pesos)
-
-    return jsonify({"top3": top3, "recomendacion": recomendacion})
+    error = _error_ids(perfil_id, marca_id)
+    if error: return jsonify({"error": error}), 400
+
+    perfil = get_perfil_by_id(perfil_id, PROYECCION_PESOS)
+    modo = _modo_ranking(data)
+    materializable = not cursor and modo == "python" and k == recomendaciones_materializadas.K
+    cuerpo, status = _comparar(data, perfil, perfil_id, marca_id, k, cursor, modo, materializable)
+    return jsonify(cuerpo), status
+
+def _comparar(data, perfil, perfil_id, marca_id, k, cursor, modo, materializable, leer_fila=None):
+    """
+    Resto de /api/comparar_resultados una vez leído el perfil (compartido con el
+    modo asyncio, asgi.py). leer_fila devuelve la fila materializada ya leída;
+    sin ella se lee aquí. Devuelve (cuerpo, status).
+    """
+    if not perfil: return {"error": "Perfil no encontrado"}, 404
+    pesos = pesos_de(perfil)
+
+    # Paginación del resto del ranking (sin narrativa, siempre con el motor Python)
+    if cursor:
+        estado = _decodificar_cursor(cursor)
+        if not estado or estado.get("p") != perfil_id or estado.get("m") != (marca_id or ""):
+            return {"error": "Cursor inválido"}, 400
+        filtrados, scores = scores_catalogo(marca_id, pesos)
+        if not filtrados: return {"ranking": [], "siguiente_cursor": None, "total": 0}, 200
+        if estado.get("v") != catalog_cache.version:
+            return {"error": "El catálogo cambió, vuelva a consultar el ranking."}, 409
+        limite = _entero_acotado(data.get("limite"), LIMITE_PAGINA_DEFECTO, LIMITE_PAGINA_MAXIMO)
+        pagina = CoreService.seleccionar_top_k(scores, limite, despues_de=(estado["s"], estado["i"]))
+        return {"ranking": [fila_comparacion(filtrados[i], scores[i]) for i in pagina],
+                "siguiente_cursor": _cursor_tras(perfil_id, marca_id, scores, pagina, estado["n"] + len(pagina)),
+                "total": len(filtrados)}, 200
+
+    version = catalog_cache.version_vigente()
+    clave = _clave_resultado(perfil_id, marca_id, pesos, perfil, version, k, modo)
+    respuesta = resultados_cache.get(clave)
+    if respuesta is None:
+        if materializable:
+            respuesta = _materializada(perfil, perfil_id, marca_id, version, leer_fila)
+        else:
+            respuesta = _recomendar(perfil, perfil_id, marca_id, pesos, k, modo)
+        resultados_cache.put(clave, respuesta)
+
+    return respuesta, 200
+
+@public_bp.route("/api/comparar_resultados/batch", methods=["POST"])
+def comparar_resultados_batch():
+    """
+    Varias recomendaciones en una sola llamada. Cuerpo:
+      {"solicitudes": [{"perfil_id", "marca_id", "k"} | [perfil_id, marca_id], ...], "k", "modo"}
+    Los perfiles se leen con un solo $in y el catálogo con un solo snapshot; las
+    solicitudes con la misma marca comparten candidatos y límites de normalización.
+    Cada resultado es el mismo cuerpo de /api/comparar_resultados (o un error propio).
+    """
+    data = request.get_json(silent=True) or {}
+    solicitudes = data.get("solicitudes")
+    if not isinstance(solicitudes, list) or not solicitudes:
+        return jsonify({"error": "Envíe una lista de solicitudes"}), 400
+    if len(solicitudes) > LIMITE_BATCH:
+        return jsonify({"error": f"Máximo {LIMITE_BATCH} solicitudes por llamada"}), 400
+
+    k_defecto = _entero_acotado(data.get("k"), TOP_K_DEFECTO, TOP_K_MAXIMO)
+    normalizadas = []
+    for s in solicitudes:
+        if isinstance(s, (list, tuple)): s = dict(zip(("perfil_id", "marca_id"), s))
+        if not isinstance(s, dict): s = {}
+        normalizadas.append((s.get("perfil_id") or "", s.get("marca_id") or "",
+                             _entero_acotado(s.get("k"), k_defecto, TOP_K_MAXIMO)))
+
+    errores = [_error_ids(p, m or None) for p, m, _ in normalizadas]
+    perfiles = get_perfiles_by_ids([p for (p, _, _), e in zip(normalizadas, errores) if not e], PROYECCION_PESOS)
+    modo = _modo_ranking(data)
+
+    # Un único snapshot para todas las marcas pedidas
+    marcas = {m for (p, m, _), e in zip(normalizadas, errores) if not e and p in perfiles}
+    catalogo, limites = catalog_cache.get_con_varios_limites(ambito_marca(m) for m in marcas)
+    version = catalog_cache.version
+    candidatos = {}
+
+    resultados = []
+    for (perfil_id, marca_id, k), error in zip(normalizadas, errores):
+        item = {"perfil_id": perfil_id, "marca_id": marca_id or None, "k": k}
+        if error:
+            resultados.append(dict(item, error=error, status=400))
+            continue
+        perfil = perfiles.get(perfil_id)
+        if not perfil:
+            resultados.append(dict(item, error="Perfil no encontrado", status=404))
+            continue
+
+        pesos = pesos_de(perfil)
+        clave = _clave_resultado(perfil_id, marca_id, pesos, perfil, version, k, modo)
+        respuesta = resultados_cache.get(clave)
+        if respuesta is None:
+            if modo == "python" and marca_id not in candidatos:
+                candidatos[marca_id] = candidatos_marca(catalogo, limites[ambito_marca(marca_id)], marca_id)
+            respuesta = _recomendar(perfil, perfil_id, marca_id, pesos, k, modo, candidatos.get(marca_id))
+            resultados_cache.put(clave, respuesta)
+        resultados.append(dict(item, **respuesta))
+
+    return jsonify({"resultados": resultados})
 
 @public_bp.route("/api/get_tiendas", methods=["POST"])
 def get_tiendas():
@@ -160,78 +374,169 @@ def get_tiendas():
 
 @public_bp.route("/api/get_perfiles", methods=["GET"])
 def get_perfiles_api():
-    perfiles = get_all_perfiles()
+    perfiles = get_all_perfiles(PROYECCION_NOMBRE, lazy=True)
     data = [{"id": str(p["_id"]), "nombre": p["nombre"]} for p in perfiles]
     return jsonify({"perfiles": data})
 
 
-@public_bp.route("/api/reporte/perfil/<perfil_id>", methods=["GET"])
-def reporte_analitico_perfil(perfil_id):
-    perfil = get_perfil_by_id(perfil_id)
-    if not perfil:
-        return jsonify({"error": "Perfil no encontrado"}), 404
-
-    modelos = get_all_modelos()
-    marcas = {str(m["_id"]): m for m in get_all_marcas()}
+def _ranking_perfil(perfil_id, pesos, modo):
+    """
+    Genera (modelo, score) de las PCs del perfil en orden de IEG, sin construir
+    la lista del ranking: en modo mongo recorre el cursor de la agregación y en
+    modo python recorre el snapshot según el argsort de los scores.
+    """
+    ambito = ("tipo_perfil", "PC Escritorio", str(perfil_id))
+    if modo != "python":
+        for m in _ranking_en_mongo(pesos, filtro_por_id("perfil_uso_id", str(perfil_id)), False, None,
+                                   ambito, verificar=(modo == "verificar"), lazy=True):
+            yield m, m["score"]
+        return
+
+    catalogo, limites = catalog_cache.get_con_limites(*ambito)
+    if not limites: return
+    filas = catalogo.filas(perfil_id=str(perfil_id), tipo="PC Escritorio")
+    if not len(filas): return
+
+    # Normalización (límites incrementales) + IEG vectorizado
+    maximos, minimos = limites
+    scores, orden = CoreService.calcular_scores_batch(catalogo.columnas(filas), pesos, maximos, minimos)
+    for i in orden:
+        yield catalogo.vista(filas[i]), float(scores[i])
+
+def _fila_reporte(m, score, marcas):
+    marca = marcas.get(str(m.get("marca_id")))
+    return {
+        "modelo": m["nombre"],
+        "marca": marca["nombre"] if marca else "N/A",
+        "precio": m["precio"],
+        "rendimiento": m["rendimiento"],
+        "score": round(score, 4)
+    }
 
-    # Pesos del perfil
-    pesos = {
-        "peso_rendimiento": float(perfil.get("peso_rendimiento", 0)),
-        "peso_precio": float(perfil.get("peso_precio", 0)),
-        "peso_consumo": float(perfil.get("peso_consumo", 0)),
-        "peso_temperatura": float(perfil.get("peso_temperatura", 0)),
+def _perfil_reporte(perfil, pesos):
+    return {
+        "id": str(perfil["_id"]),
+        "nombre": perfil["nombre"],
+        "descripcion": perfil.get("descripcion", ""),
+        "pesos": pesos
     }
 
-    modelos_filtrados = [
-        m for m in modelos if str(m.get("perfil_uso_id")) == str(perfil_id)
-    ]
+class _ResumenRanking:
+    """Acumula el bloque 'analisis' fila a fila, en memoria constante."""
 
-    if not modelos_filtrados:
-        return jsonify({"mensaje": "No hay modelos asociados a este perfil."})
+    def __init__(self):
+        self.total = 0
+        self.mejor = None
+        self.score_min = None
+
+    def agregar(self, fila):
+        if self.mejor is None: self.mejor = fila
+        self.total += 1
+        self.score_min = fila["score"]
+
+    def analisis(self):
+        if not self.total: return None
+        return {
+            "total_modelos": self.total,
+            "mejor_modelo": self.mejor,
+            "score_max": self.mejor["score"],
+            "score_min": self.score_min
+        }
+
+def _preparar_reporte(perfil_id):
+    """(perfil, pesos, marcas) o None si el perfil no existe."""
+    perfil = get_perfil_by_id(perfil_id, PROYECCION_PESOS)
+    if not perfil: return None
+    marcas = {str(m["_id"]): m for m in get_all_marcas(PROYECCION_NOMBRE, lazy=True)}
+    return perfil, pesos_de(perfil), marcas
 
-    # Normalización
-    def sf(v): return CoreService._safe_float(v)
-    maximos = {
-        'rend': max(sf(m.get('rendimiento')) for m in modelos_filtrados),
-        'prec': max(sf(m.get('precio')) for m in modelos_filtrados),
-        'cons': max(sf(m.get('consumo')) for m in modelos_filtrados),
-        'temp': max(sf(m.get('temperatura')) for m in modelos_filtrados)
-    }
-    minimos = {
-        'rend': min(sf(m.get('rendimiento')) for m in modelos_filtrados),
-        'prec': min(sf(m.get('precio')) for m in modelos_filtrados),
-        'cons': min(sf(m.get('consumo')) for m in modelos_filtrados),
-        'temp': min(sf(m.get('temperatura')) for m in modelos_filtrados)
-    }
 
+@public_bp.route("/api/reporte/perfil/<perfil_id>", methods=["GET"])
+def reporte_analitico_perfil(perfil_id):
+    cuerpo, status = _reporte(perfil_id, _preparar_reporte(perfil_id), _modo_ranking())
+    return jsonify(cuerpo), status
+
+def _reporte(perfil_id, preparado, modo):
+    """Cuerpo de /api/reporte/perfil/<id> a partir de _preparar_reporte (compartido con asgi.py)."""
+    if not preparado:
+        return {"error": "Perfil no encontrado"}, 404
+    perfil, pesos, marcas = preparado
+
+    resumen = _ResumenRanking()
     ranking = []
-    for m in modelos_filtrados:
-        score = CoreService.calcular_score(m, pesos, maximos, minimos)
-        marca = marcas.get(str(m.get("marca_id")))
-        ranking.append({
-            "modelo": m["nombre"],
-            "marca": marca["nombre"] if marca else "N/A",
-            "precio": m["precio"],
-            "rendimiento": m["rendimiento"],
-            "score": round(score, 4)
-        })
-
-    ranking.sort(key=lambda x: x["score"], reverse=True)
+    for m, score in _ranking_perfil(perfil_id, pesos, modo):
+        fila = _fila_reporte(m, score, marcas)
+        resumen.agregar(fila)
+        ranking.append(fila)
+
+    if not ranking:
+        return {"mensaje": "No hay modelos asociados a este perfil."}, 200
 
     response = {
-        "perfil": {
-            "id": str(perfil["_id"]),
-            "nombre": perfil["nombre"],
-            "descripcion": perfil.get("descripcion", ""),
-            "pesos": pesos
-        },
-        "analisis": {
-            "total_modelos": len(ranking),
-            "mejor_modelo": ranking[0],
-            "score_max": ranking[0]["score"],
-            "score_min": ranking[-1]["score"]
-        },
+        "perfil": _perfil_reporte(perfil, pesos),
+        "analisis": resumen.analisis(),
         "ranking": ranking
     }
 
-    return jsonify(response)
+    return response, 200
+
+@public_bp.route("/api/reporte/perfil/<perfil_id>/resumen", methods=["GET"])
+def reporte_analitico_resumen(perfil_id):
+    """Solo 'perfil' y 'analisis' del reporte, recorriendo el ranking sin guardarlo."""
+    preparado = _preparar_reporte(perfil_id)
+    if not preparado:
+        return jsonify({"error": "Perfil no encontrado"}), 404
+    perfil, pesos, marcas = preparado
+
+    resumen = _ResumenRanking()
+    for m, score in _ranking_perfil(perfil_id, pesos, _modo_ranking()):
+        resumen.agregar(_fila_reporte(m, score, marcas))
+
+    if not resumen.total:
+        return jsonify({"mensaje": "No hay modelos asociados a este perfil."})
+    return jsonify({"perfil": _perfil_reporte(perfil, pesos), "analisis": resumen.analisis()})
+
+@public_bp.route("/api/reporte/perfil/<perfil_id>/export", methods=["GET"])
+def reporte_analitico_export(perfil_id):
+    """
+    Reporte en streaming, fila a fila y en memoria constante.
+      ?formato=ndjson (defecto): una línea {"tipo": "perfil"}, una {"tipo": "fila"}
+        por modelo y al final {"tipo": "analisis"} como trailer.
+      ?formato=csv: cabecera + filas; el resumen se pide a /resumen.
+    """
+    formato = request.args.get("formato", "ndjson")
+    if formato not in ("ndjson", "csv"):
+        return jsonify({"error": "Formato no soportado (ndjson o csv)"}), 400
+    preparado = _preparar_reporte(perfil_id)
+    if not preparado:
+        return jsonify({"error": "Perfil no encontrado"}), 404
+    perfil, pesos, marcas = preparado
+    filas = _ranking_perfil(perfil_id, pesos, _modo_ranking())
+
+    # Una línea por fila con el proveedor JSON de la app (orjson), en el orden de los campos
+    codificar = partial(current_app.json.codificar, sort_keys=False, ensure_ascii=False)
+
+    def ndjson():
+        yield codificar({"tipo": "perfil", **_perfil_reporte(perfil, pesos)}) + b"\n"
+        resumen = _ResumenRanking()
+        for m, score in filas:
+            fila = _fila_reporte(m, score, marcas)
+            resumen.agregar(fila)
+            yield codificar({"tipo": "fila", **fila}) + b"\n"
+        yield codificar({"tipo": "analisis", **(resumen.analisis() or {"total_modelos": 0})}) + b"\n"
+
+    def csv_():
+        buffer = io.StringIO()
+        escritor = csv.DictWriter(buffer, fieldnames=COLUMNAS_REPORTE_CSV)
+        escritor.writeheader()
+        for m, score in filas:
+            escritor.writerow(_fila_reporte(m, score, marcas))
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    if formato == "csv":
+        return Response(stream_with_context(csv_()), mimetype="text/csv",
+                        headers={"Content-Disposition": f"attachment; filename=reporte_{perfil_id}.csv"})
+    return Response(stream_with_context(ndjson()), mimetype="application/x-ndjson")
@@ -0,0 +1,87 @@
+"""
+Motor de recomendación en Python (top-k por IEG + narrativa) sobre el snapshot
+del catálogo. Lo comparten las rutas públicas y la materialización de
+recomendaciones por (perfil, marca).
+"""
+from .services import CoreService
+from .cache import catalog_cache
+
+
+def pesos_de(perfil):
+    return {
+        "peso_rendimiento": float(perfil.get("peso_rendimiento", 0)),
+        "peso_precio": float(perfil.get("peso_precio", 0)),
+        "peso_consumo": float(perfil.get("peso_consumo", 0)),
+        "peso_temperatura": float(perfil.get("peso_temperatura", 0)),
+    }
+
+def fila_comparacion(m, score):
+    return {
+        "nombre": m["nombre"],
+        "precio": m["precio"],
+        "rendimiento": m["rendimiento"],
+        "score": round(float(score), 4),
+        "tipo": m["tipo_equipo"]
+    }
+
+def ambito_marca(marca_id):
+    return ("marca", marca_id) if marca_id else ("global",)
+
+def candidatos_marca(catalogo, limites, marca_id):
+    """
+    (filtrados, columnas, limites, indice) de un filtro de marca; reutilizable
+    entre perfiles. indice: índice de dominancia del snapshot (dominancia.py).
+    """
+    filas = catalogo.filas(marca_id=marca_id)
+    if not len(filas) or not limites: return [], None, None, None
+    columnas = catalogo.columnas(filas)
+    return catalogo.seleccion(filas), columnas, limites, catalogo.indice_dominancia(marca_id, columnas)
+
+def candidatos_de(marca_id):
+    catalogo, limites = catalog_cache.get_con_limites(*ambito_marca(marca_id))
+    return candidatos_marca(catalogo, limites, marca_id)
+
+def scores_catalogo(marca_id, pesos, candidatos=None):
+    """
+    Candidatos filtrados por marca y sus scores (motor Python vectorizado).
+    candidatos: resultado de candidatos_marca ya calculado sobre un snapshot (batch).
+    """
+    if candidatos is None: candidatos = candidatos_de(marca_id)
+    filtrados, columnas, limites, _ = candidatos
+    if not filtrados: return [], None
+
+    maximos, minimos = limites
+    scores, _ = CoreService.calcular_scores_batch(columnas, pesos, maximos, minimos, ordenar=False)
+    return filtrados, scores
+
+def estado_cursor(indices, puntajes, servidos, total):
+    """
+    Última posición (score, índice) servida del ranking, o None si ya no quedan
+    modelos. Las rutas la codifican en el cursor junto a la versión del catálogo.
+    puntajes: scores de `indices`; total: modelos del filtro.
+    """
+    if len(indices) == 0 or servidos >= total: return None
+    return {"s": float(puntajes[-1]), "i": int(indices[-1]), "n": servidos}
+
+def recomendar(perfil, marca_id, pesos, k, candidatos=None):
+    """
+    Top-k + narrativa para un perfil y un filtro de marca.
+    Devuelve (cuerpo JSON sin cursor, estado del cursor).
+    """
+    if candidatos is None: candidatos = candidatos_de(marca_id)
+    filtrados, _, limites, indice = candidatos
+    if not filtrados: return {"top3": [], "mensaje": "No hay modelos disponibles."}, None
+
+    # Con el índice de dominancia solo se puntúan sus candidatos; None -> recorrido completo
+    elegidos = indice.top_k(pesos, *limites, k)
+    if elegidos is None:
+        _, scores = scores_catalogo(marca_id, pesos, candidatos)
+        top_k = CoreService.seleccionar_top_k(scores, k)
+        puntajes = scores[top_k]
+    else:
+        top_k, puntajes = elegidos
+    top3 = [fila_comparacion(filtrados[i], s) for i, s in zip(top_k, puntajes)]
+    recomendacion = CoreService.generar_narrativa_avanzada(perfil['nombre'], top3, pesos)
+
+    return ({"top3": top3, "recomendacion": recomendacion, "siguiente_cursor": None, "total": len(filtrados)},
+            estado_cursor(top_k, puntajes, len(top_k), len(filtrados)))
@@ -0,0 +1,699 @@
+"""
+Almacenamiento detrás de las funciones de models.py. Tres implementaciones:
+  - RepositorioMongo: MongoDB vía mongo.db (la de siempre).
+  - RepositorioMemoria: colecciones en memoria del proceso con índices de
+    igualdad; no necesita servidor (desarrollo local, benchmarks, tests).
+  - RepositorioReplica: lee catálogo, perfiles y marcas de una copia en memoria
+    y escribe en MongoDB (y en la copia). La copia se resincroniza cada `ttl`
+    segundos y en cuanto cambia la versión del catálogo: capa de lectura de
+    baja latencia para la API pública.
+Se elige con STORAGE_BACKEND (mongo | memoria | replica). Los listados
+paginados del admin (paginacion.py) siguen consultando MongoDB directamente.
+Los filtros son documentos de consulta de MongoDB; RepositorioMemoria entiende
+igualdad, $in, $nin, $ne y $regex, que es lo que usa la aplicación.
+"""
+import heapq
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from bson import json_util
+from bson.objectid import ObjectId
+from pymongo import ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from .pipelines import pipeline_limites, pipeline_ranking, limites_desde_grupo, TIPO_PC, TIPO_LAPTOP
+from .services import CoreService
+
+COLECCION_PCS = "modelos_computadora"
+COLECCION_LAPTOPS = "modelos_laptops"
+CAMPOS_RANKING = ("nombre", "precio", "rendimiento", "consumo", "temperatura", "marca_id", "tipo_equipo")
+
+
+class Repositorio(ABC):
+    """Operaciones de datos que usa models.py."""
+
+    @abstractmethod
+    def listar(self, coleccion, filtro=None, proyeccion=None, lazy=False): pass
+
+    @abstractmethod
+    def obtener(self, coleccion, filtro, proyeccion=None): pass
+
+    @abstractmethod
+    def contar(self, coleccion, filtro=None): pass
+
+    @abstractmethod
+    def insertar(self, coleccion, data):
+        """Inserta data (le asigna _id si no tiene, como insert_one) y devuelve el _id."""
+
+    @abstractmethod
+    def actualizar(self, coleccion, id, data):
+        """$set de data sobre el documento id. Devuelve el documento anterior o None."""
+
+    @abstractmethod
+    def eliminar(self, coleccion, id):
+        """Elimina el documento id. Devuelve el documento eliminado o None."""
+
+    @abstractmethod
+    def reemplazar_varios(self, coleccion, docs):
+        """Upsert de cada documento por su _id."""
+
+    @abstractmethod
+    def upsert_varios(self, coleccion, clave, docs):
+        """
+        $set de cada documento sobre el que tenga el mismo valor de `clave`, o
+        alta si no existe. Un documento que falla no detiene al resto.
+        Devuelve {"insertados": n, "actualizados": n, "errores": {posición: mensaje}}.
+        """
+
+    @abstractmethod
+    def actualizar_donde(self, coleccion, filtro, data): pass
+
+    @abstractmethod
+    def eliminar_donde(self, coleccion, filtro): pass
+
+    @abstractmethod
+    def crear_indice(self, coleccion, claves, unico=False):
+        """claves: campo o [(campo, 1 | -1), ...], como create_index."""
+
+    @abstractmethod
+    def listar_indices(self, coleccion):
+        """{nombre: {"key": [(campo, dirección)], "unique": bool}}"""
+
+    @abstractmethod
+    def plan_consulta(self, coleccion, filtro):
+        """Plan ganador de find(filtro): {"etapas": [...], "indice": nombre o None}."""
+
+    @abstractmethod
+    def version_catalogo(self): pass
+
+    @abstractmethod
+    def incrementar_version_catalogo(self): pass
+
+    @abstractmethod
+    def limites_ieg(self, filtro, incluir_laptops=True):
+        """(maximos, minimos) de los modelos del filtro, o None si no hay modelos."""
+
+    @abstractmethod
+    def ranking_ieg(self, pesos, maximos, minimos, filtro, incluir_laptops=True, limite=None):
+        """Iterable de modelos (CAMPOS_RANKING + score) ordenados por IEG desc y _id."""
+
+    @abstractmethod
+    def modelos_por_perfil(self):
+        """[{"_id": perfil_uso_id, "total": n}] de las PCs con perfil."""
+
+    @abstractmethod
+    def mejor_relacion_rendimiento_precio(self): pass
+
+
+#  MONGODB
+
+class RepositorioMongo(Repositorio):
+
+    def __init__(self, mongo):
+        self._mongo = mongo
+
+    @property
+    def _db(self):
+        return self._mongo.db
+
+    def listar(self, coleccion, filtro=None, proyeccion=None, lazy=False):
+        cursor = self._db[coleccion].find(filtro or {}, proyeccion)
+        return cursor if lazy else list(cursor)
+
+    def obtener(self, coleccion, filtro, proyeccion=None):
+        return self._db[coleccion].find_one(filtro, proyeccion)
+
+    def contar(self, coleccion, filtro=None):
+        return self._db[coleccion].count_documents(filtro or {})
+
+    def insertar(self, coleccion, data):
+        return self._db[coleccion].insert_one(data).inserted_id
+
+    def actualizar(self, coleccion, id, data):
+        return self._db[coleccion].find_one_and_update(
+            {"_id": ObjectId(id)}, {"$set": data}, return_document=ReturnDocument.BEFORE
+        )
+
+    def eliminar(self, coleccion, id):
+        return self._db[coleccion].find_one_and_delete({"_id": ObjectId(id)})
+
+    def reemplazar_varios(self, coleccion, docs):
+        if docs:
+            self._db[coleccion].bulk_write([ReplaceOne({"_id": d["_id"]}, d, upsert=True) for d in docs],
+                                           ordered=False)
+
+    def upsert_varios(self, coleccion, clave, docs):
+        if not docs: return {"insertados": 0, "actualizados": 0, "errores": {}}
+        operaciones = [UpdateOne({clave: d[clave]}, {"$set": d}, upsert=True) for d in docs]
+        try:
+            detalle = self._db[coleccion].bulk_write(operaciones, ordered=False).bulk_api_result
+        except BulkWriteError as e:
+            detalle = e.details
+        return {
+            "insertados": detalle.get("nUpserted", 0),
+            "actualizados": detalle.get("nMatched", 0),
+            "errores": {w["index"]: w["errmsg"] for w in detalle.get("writeErrors", ())},
+        }
+
+    def actualizar_donde(self, coleccion, filtro, data):
+        return self._db[coleccion].update_many(filtro, {"$set": data}).modified_count
+
+    def eliminar_donde(self, coleccion, filtro):
+        return self._db[coleccion].delete_many(filtro).deleted_count
+
+    def crear_indice(self, coleccion, claves, unico=False):
+        self._db[coleccion].create_index(_normalizar_claves(claves), unique=unico)
+
+    def listar_indices(self, coleccion):
+        return {n: {"key": list(i["key"]), "unique": bool(i.get("unique"))}
+                for n, i in self._db[coleccion].index_information().items()}
+
+    def plan_consulta(self, coleccion, filtro):
+        explain = self._db[coleccion].find(filtro).explain()
+        plan = explain["queryPlanner"]["winningPlan"]
+        etapas, indice = [], None
+        while plan:
+            plan = plan.get("queryPlan", plan)  # motor SBE (MongoDB 7+)
+            etapas.append(plan.get("stage"))
+            indice = indice or plan.get("indexName")
+            plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+        return {"etapas": etapas, "indice": indice}
+
+    def version_catalogo(self):
+        doc = self._db.catalogo_meta.find_one({"_id": "version"})
+        return doc["version"] if doc else 0
+
+    def incrementar_version_catalogo(self):
+        doc = self._db.catalogo_meta.find_one_and_update(
+            {"_id": "version"}, {"$inc": {"version": 1}},
+            upsert=True, return_document=ReturnDocument.AFTER
+        )
+        return doc["version"]
+
+    def limites_ieg(self, filtro, incluir_laptops=True):
+        doc = next(self._db[COLECCION_PCS].aggregate(pipeline_limites(filtro, incluir_laptops)), None)
+        return limites_desde_grupo(doc)
+
+    def ranking_ieg(self, pesos, maximos, minimos, filtro, incluir_laptops=True, limite=None):
+        pipeline = pipeline_ranking(pesos, maximos, minimos, filtro, incluir_laptops, limite)
+        return self._db[COLECCION_PCS].aggregate(pipeline, allowDiskUse=True)
+
+    def modelos_por_perfil(self):
+        pipeline = [
+            {"$match": {"perfil_uso_id": {"$nin": [None, ""]}}},
+            {"$group": {"_id": "$perfil_uso_id", "total": {"$sum": 1}}},
+        ]
+        return list(self._db[COLECCION_PCS].aggregate(pipeline))
+
+    def mejor_relacion_rendimiento_precio(self):
+        """Modelo con mayor rendimiento/precio (solo precios numéricos > 0)."""
+        rendimiento = {"$convert": {"input": "$rendimiento", "to": "double", "onError": 0.0, "onNull": 0.0}}
+        pipeline = [
+            {"$match": {"precio": {"$gt": 0}}},
+            {"$project": {"nombre": 1, "rendimiento": 1, "precio": 1,
+                          "ratio": {"$divide": [rendimiento, {"$toDouble": "$precio"}]}}},
+            {"$sort": {"ratio": -1, "_id": 1}},
+            {"$limit": 1},
+        ]
+        return next(self._db[COLECCION_PCS].aggregate(pipeline), None)
+
+
+#  MEMORIA
+
+_SIN_INDICE = object()
+
+
+def _clave_indice(valor):
+    try:
+        hash(valor)
+        return valor
+    except TypeError:
+        return _SIN_INDICE
+
+
+def _coincide(doc, filtro):
+    for campo, condicion in filtro.items():
+        valor = doc.get(campo)
+        if not (isinstance(condicion, dict) and condicion and all(k.startswith("$") for k in condicion)):
+            if valor != condicion: return False
+            continue
+        for op, arg in condicion.items():
+            if op == "$in": ok = valor in arg
+            elif op == "$nin": ok = valor not in arg
+            elif op == "$ne": ok = valor != arg
+            elif op == "$regex":
+                banderas = re.IGNORECASE if "i" in condicion.get("$options", "") else 0
+                ok = isinstance(valor, str) and re.search(arg, valor, banderas) is not None
+            elif op == "$options": continue
+            else: raise ValueError(f"Operador no soportado en memoria: {op}")
+            if not ok: return False
+    return True
+
+
+def _proyectar(doc, proyeccion):
+    if not proyeccion: return dict(doc)
+    incluidos = {c for c, v in proyeccion.items() if v}
+    if not incluidos:
+        return {c: v for c, v in doc.items() if c not in proyeccion}
+    con_id = proyeccion.get("_id", 1)
+    return {c: v for c, v in doc.items() if c in incluidos or (c == "_id" and con_id)}
+
+
+def _normalizar_claves(claves):
+    return [(claves, 1)] if isinstance(claves, str) else [(c, d) for c, d in claves]
+
+
+def _nombre_indice(claves):
+    """Mismo nombre que genera MongoDB: campo_1_otro_-1."""
+    return "_".join(f"{c}_{d}" for c, d in claves)
+
+
+def _error_duplicado(coleccion, campo, valor):
+    return DuplicateKeyError(f"E11000 duplicate key error collection: {coleccion} index: {campo}_1 "
+                             f"dup key: {{ {campo}: {valor!r} }}", 11000,
+                             {"keyPattern": {campo: 1}, "keyValue": {campo: valor}})
+
+
+class _Coleccion:
+    """
+    Documentos por _id (en orden de inserción) e índices campo -> valor -> {_id}.
+    Un índice compuesto se indexa por su primer campo (solo hay búsquedas por
+    igualdad); los únicos de un campo rechazan valores repetidos como MongoDB.
+    """
+    __slots__ = ("nombre", "docs", "indices", "especificaciones", "unicos")
+
+    def __init__(self, nombre, campos_indice=()):
+        self.nombre = nombre
+        self.docs = {}
+        self.indices = {}
+        self.especificaciones = {"_id_": {"key": [("_id", 1)], "unique": True}}
+        self.unicos = set()
+        for campo in campos_indice:
+            self.crear_indice([(campo, 1)])
+
+    def crear_indice(self, claves, unico=False):
+        campo = claves[0][0]
+        if campo != "_id" and campo not in self.indices:
+            indice = self.indices[campo] = {}
+            for id, doc in self.docs.items():
+                indice.setdefault(_clave_indice(doc.get(campo)), {})[id] = None
+        if unico and len(claves) == 1 and campo != "_id":
+            for valor, ids in self.indices[campo].items():
+                if len(ids) > 1: raise _error_duplicado(self.nombre, campo, valor)
+            self.unicos.add(campo)
+        nombre = _nombre_indice(claves)
+        unico = unico or self.especificaciones.get(nombre, {}).get("unique", False)
+        self.especificaciones[nombre] = {"key": list(claves), "unique": unico}
+
+    def agregar(self, doc):
+        for campo in self.unicos:
+            valor = doc.get(campo)
+            if any(i != doc["_id"] for i in self.indices[campo].get(_clave_indice(valor), ())):
+                raise _error_duplicado(self.nombre, campo, valor)
+        self.docs[doc["_id"]] = doc
+        for campo, indice in self.indices.items():
+            indice.setdefault(_clave_indice(doc.get(campo)), {})[doc["_id"]] = None
+
+    def quitar(self, id):
+        doc = self.docs.pop(id, None)
+        if doc is None: return None
+        for campo, indice in self.indices.items():
+            clave = _clave_indice(doc.get(campo))
+            ids = indice.get(clave)
+            if ids is not None:
+                ids.pop(id, None)
+                if not ids: del indice[clave]
+        return doc
+
+    def reemplazar(self, antes, despues):
+        """Cambia antes por despues (mismo _id); si viola un índice único se conserva antes."""
+        self.quitar(antes["_id"])
+        try:
+            self.agregar(despues)
+        except DuplicateKeyError:
+            self.agregar(antes)
+            raise
+
+    @staticmethod
+    def _valores_indexables(condicion):
+        """Valores buscables en un índice para la condición, o None si no sirve."""
+        if not isinstance(condicion, dict): return [condicion]
+        if set(condicion) == {"$in"}: return list(condicion["$in"])
+        return None
+
+    def _indice_para(self, filtro):
+        """(campo, valores) del primer campo del filtro que puede usar un índice, o None."""
+        for campo, condicion in (filtro or {}).items():
+            valores = self._valores_indexables(condicion)
+            if valores is not None and (campo == "_id" or campo in self.indices):
+                return campo, valores
+        return None
+
+    def buscar(self, filtro):
+        if not filtro: return list(self.docs.values())
+        elegido = self._indice_para(filtro)
+        if elegido is None:
+            docs = self.docs.values()
+        elif elegido[0] == "_id":
+            docs = [self.docs[i] for i in dict.fromkeys(_clave_indice(v) for v in elegido[1]) if i in self.docs]
+        else:
+            campo, valores = elegido
+            ids = {}
+            for v in valores + [_SIN_INDICE]:
+                ids.update(self.indices[campo].get(_clave_indice(v), {}))
+            docs = [self.docs[i] for i in ids]
+        return [d for d in docs if _coincide(d, filtro)]
+
+    def plan(self, filtro):
+        elegido = self._indice_para(filtro)
+        if elegido is None: return {"etapas": ["COLLSCAN"], "indice": None}
+        if elegido[0] == "_id": return {"etapas": ["IDHACK"], "indice": "_id_"}
+        nombre = next(n for n, e in self.especificaciones.items() if e["key"][0][0] == elegido[0])
+        return {"etapas": ["FETCH", "IXSCAN"], "indice": nombre}
+
+
+class RepositorioMemoria(Repositorio):
+    """
+    Repositorio en memoria del proceso. Cada worker tiene su propia copia: sirve
+    para un solo proceso o para datos de solo lectura. Los documentos devueltos
+    son copias, como los que decodifica pymongo.
+    """
+
+    INDICES = {
+        "usuarios": ("email",),
+        COLECCION_PCS: ("codigo_modelo", "marca_id", "perfil_uso_id"),
+        COLECCION_LAPTOPS: ("codigo_modelo", "marca_id", "perfil_uso_id"),
+    }
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._colecciones = {}
+        self._version = 0
+
+    def _coleccion(self, nombre):
+        coleccion = self._colecciones.get(nombre)
+        if coleccion is None:
+            coleccion = self._colecciones[nombre] = _Coleccion(nombre, self.INDICES.get(nombre, ()))
+        return coleccion
+
+    def cargar(self, nombre, docs):
+        """Reemplaza la colección completa por docs (se copian)."""
+        with self._lock:
+            anterior = self._colecciones.get(nombre)
+            especificaciones = dict(anterior.especificaciones) if anterior is not None else {}
+        nueva = _Coleccion(nombre, self.INDICES.get(nombre, ()))
+        for e in especificaciones.values():
+            nueva.crear_indice(e["key"])
+        for d in docs:
+            d = dict(d)
+            d.setdefault("_id", ObjectId())
+            nueva.agregar(d)
+        for e in especificaciones.values():
+            if e["unique"]: nueva.crear_indice(e["key"], unico=True)
+        with self._lock:
+            self._colecciones[nombre] = nueva
+
+    def cargar_archivo(self, ruta):
+        """Carga un JSON extendido {coleccion: [documentos]} (formato de bson.json_util)."""
+        with open(ruta, encoding="utf-8") as f:
+            datos = json_util.loads(f.read())
+        for nombre, docs in datos.items():
+            self.cargar(nombre, docs)
+
+    def listar(self, coleccion, filtro=None, proyeccion=None, lazy=False):
+        with self._lock:
+            docs = [_proyectar(d, proyeccion) for d in self._coleccion(coleccion).buscar(filtro)]
+        return iter(docs) if lazy else docs
+
+    def obtener(self, coleccion, filtro, proyeccion=None):
+        with self._lock:
+            docs = self._coleccion(coleccion).buscar(filtro)
+            return _proyectar(docs[0], proyeccion) if docs else None
+
+    def contar(self, coleccion, filtro=None):
+        with self._lock:
+            c = self._coleccion(coleccion)
+            return len(c.buscar(filtro)) if filtro else len(c.docs)
+
+    def insertar(self, coleccion, data):
+        data.setdefault("_id", ObjectId())
+        with self._lock:
+            c = self._coleccion(coleccion)
+            if data["_id"] in c.docs:
+                raise DuplicateKeyError(f"_id duplicado en {coleccion}: {data['_id']}")
+            c.agregar(dict(data))
+        return data["_id"]
+
+    def actualizar(self, coleccion, id, data):
+        id = ObjectId(id)
+        with self._lock:
+            c = self._coleccion(coleccion)
+            antes = c.docs.get(id)
+            if antes is None: return None
+            c.reemplazar(antes, {**antes, **data})
+            return dict(antes)
+
+    def eliminar(self, coleccion, id):
+        id = ObjectId(id)
+        with self._lock:
+            return self._coleccion(coleccion).quitar(id)
+
+    def reemplazar_varios(self, coleccion, docs):
+        with self._lock:
+            c = self._coleccion(coleccion)
+            for d in docs:
+                antes = c.docs.get(d["_id"])
+                if antes is None: c.agregar(dict(d))
+                else: c.reemplazar(antes, dict(d))
+
+    def upsert_varios(self, coleccion, clave, docs):
+        resultado = {"insertados": 0, "actualizados": 0, "errores": {}}
+        with self._lock:
+            c = self._coleccion(coleccion)
+            for i, d in enumerate(docs):
+                existentes = c.buscar({clave: d[clave]})
+                try:
+                    if existentes:
+                        c.reemplazar(existentes[0], {**existentes[0], **d})
+                        resultado["actualizados"] += 1
+                    else:
+                        c.agregar({"_id": ObjectId(), **d})
+                        resultado["insertados"] += 1
+                except DuplicateKeyError as e:
+                    resultado["errores"][i] = str(e)
+        return resultado
+
+    def actualizar_donde(self, coleccion, filtro, data):
+        with self._lock:
+            c = self._coleccion(coleccion)
+            docs = c.buscar(filtro)
+            for d in docs:
+                c.reemplazar(d, {**d, **data})
+            return len(docs)
+
+    def eliminar_donde(self, coleccion, filtro):
+        with self._lock:
+            c = self._coleccion(coleccion)
+            docs = c.buscar(filtro)
+            for d in docs:
+                c.quitar(d["_id"])
+            return len(docs)
+
+    def crear_indice(self, coleccion, claves, unico=False):
+        with self._lock:
+            self._coleccion(coleccion).crear_indice(_normalizar_claves(claves), unico)
+
+    def listar_indices(self, coleccion):
+        with self._lock:
+            return {n: dict(e) for n, e in self._coleccion(coleccion).especificaciones.items()}
+
+    def plan_consulta(self, coleccion, filtro):
+        with self._lock:
+            return self._coleccion(coleccion).plan(filtro)
+
+    def version_catalogo(self):
+        return self._version
+
+    def incrementar_version_catalogo(self):
+        with self._lock:
+            self._version += 1
+            return self._version
+
+    def _modelos(self, filtro, incluir_laptops):
+        """PCs y (opcional) laptops del filtro, con tipo_equipo como en pipelines._origen."""
+        with self._lock:
+            pcs = self._coleccion(COLECCION_PCS).buscar(filtro)
+            laptops = self._coleccion(COLECCION_LAPTOPS).buscar(filtro) if incluir_laptops else []
+        return [{**d, "tipo_equipo": TIPO_PC} for d in pcs] + [{**d, "tipo_equipo": TIPO_LAPTOP} for d in laptops]
+
+    def limites_ieg(self, filtro, incluir_laptops=True):
+        modelos = self._modelos(filtro, incluir_laptops)
+        if not modelos: return None
+        return CoreService.calcular_limites(CoreService.columnas_desde_modelos(modelos))
+
+    def ranking_ieg(self, pesos, maximos, minimos, filtro, incluir_laptops=True, limite=None):
+        modelos = self._modelos(filtro, incluir_laptops)
+        if not modelos: return iter(())
+        columnas = CoreService.columnas_desde_modelos(modelos)
+        scores, _ = CoreService.calcular_scores_batch(columnas, pesos, maximos, minimos, ordenar=False)
+        # Mismo orden que {"$sort": {"score": -1, "_id": 1}}
+        def clave(i): return (-scores[i], modelos[i]["_id"])
+        orden = heapq.nsmallest(int(limite), range(len(modelos)), key=clave) if limite else \
+            sorted(range(len(modelos)), key=clave)
+        return ({"_id": modelos[i]["_id"], **{c: modelos[i][c] for c in CAMPOS_RANKING if c in modelos[i]},
+                 "score": float(scores[i])} for i in orden)
+
+    def modelos_por_perfil(self):
+        totales = {}
+        for d in self.listar(COLECCION_PCS, {"perfil_uso_id": {"$nin": [None, ""]}}, {"perfil_uso_id": 1}):
+            totales[d["perfil_uso_id"]] = totales.get(d["perfil_uso_id"], 0) + 1
+        return [{"_id": perfil, "total": total} for perfil, total in totales.items()]
+
+    def mejor_relacion_rendimiento_precio(self):
+        mejor, clave_mejor = None, None
+        for d in self.listar(COLECCION_PCS, None, {"nombre": 1, "rendimiento": 1, "precio": 1}):
+            precio = d.get("precio")
+            if isinstance(precio, bool) or not isinstance(precio, (int, float)) or precio <= 0: continue
+            ratio = CoreService._safe_float(d.get("rendimiento")) / float(precio)
+            clave = (-ratio, d["_id"])
+            if clave_mejor is None or clave < clave_mejor:
+                mejor, clave_mejor = {**d, "ratio": ratio}, clave
+        return mejor
+
+
+#  RÉPLICA EN MEMORIA
+
+class RepositorioReplica(Repositorio):
+    """
+    Lecturas de COLECCIONES_REPLICADAS desde una copia en memoria; el resto de
+    lecturas y todas las escrituras van a `primario`. Las escrituras del propio
+    proceso se aplican también a la copia. La copia se resincroniza a lo sumo
+    cada `ttl` segundos (perfiles y marcas siempre; los modelos solo si cambió
+    la versión del catálogo) y en cuanto version_catalogo() ve una versión nueva.
+    """
+
+    COLECCIONES_CATALOGO = (COLECCION_PCS, COLECCION_LAPTOPS)
+    COLECCIONES_REPLICADAS = ("perfiles_uso", "marcas") + COLECCIONES_CATALOGO
+
+    def __init__(self, primario, ttl=5.0):
+        self.primario = primario
+        self.memoria = RepositorioMemoria()
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._sincronizado_en = None
+        self._version = None
+
+    def _sincronizar(self):
+        with self._lock:
+            ahora = time.monotonic()
+            if self._sincronizado_en is not None and ahora - self._sincronizado_en < self.ttl: return
+            version = self.primario.version_catalogo()
+            colecciones = ["perfiles_uso", "marcas"]
+            if version != self._version: colecciones += self.COLECCIONES_CATALOGO
+            for nombre in colecciones:
+                self.memoria.cargar(nombre, self.primario.listar(nombre, lazy=True))
+            self._version = version
+            self._sincronizado_en = ahora
+
+    def _lectura(self, coleccion):
+        if coleccion not in self.COLECCIONES_REPLICADAS: return self.primario
+        self._sincronizar()
+        return self.memoria
+
+    def _replicada(self, coleccion):
+        return coleccion in self.COLECCIONES_REPLICADAS and self._version is not None
+
+    def listar(self, coleccion, filtro=None, proyeccion=None, lazy=False):
+        return self._lectura(coleccion).listar(coleccion, filtro, proyeccion, lazy)
+
+    def obtener(self, coleccion, filtro, proyeccion=None):
+        return self._lectura(coleccion).obtener(coleccion, filtro, proyeccion)
+
+    def contar(self, coleccion, filtro=None):
+        return self._lectura(coleccion).contar(coleccion, filtro)
+
+    def insertar(self, coleccion, data):
+        id = self.primario.insertar(coleccion, data)
+        if self._replicada(coleccion): self.memoria.reemplazar_varios(coleccion, [data])
+        return id
+
+    def actualizar(self, coleccion, id, data):
+        antes = self.primario.actualizar(coleccion, id, data)
+        if antes is not None and self._replicada(coleccion): self.memoria.actualizar(coleccion, id, data)
+        return antes
+
+    def eliminar(self, coleccion, id):
+        antes = self.primario.eliminar(coleccion, id)
+        if antes is not None and self._replicada(coleccion): self.memoria.eliminar(coleccion, id)
+        return antes
+
+    def reemplazar_varios(self, coleccion, docs):
+        self.primario.reemplazar_varios(coleccion, docs)
+        if self._replicada(coleccion): self.memoria.reemplazar_varios(coleccion, docs)
+
+    def upsert_varios(self, coleccion, clave, docs):
+        # Las altas necesitan el _id del primario: la copia se recarga con el cambio de versión del catálogo
+        return self.primario.upsert_varios(coleccion, clave, docs)
+
+    def actualizar_donde(self, coleccion, filtro, data):
+        n = self.primario.actualizar_donde(coleccion, filtro, data)
+        if self._replicada(coleccion): self.memoria.actualizar_donde(coleccion, filtro, data)
+        return n
+
+    def eliminar_donde(self, coleccion, filtro):
+        n = self.primario.eliminar_donde(coleccion, filtro)
+        if self._replicada(coleccion): self.memoria.eliminar_donde(coleccion, filtro)
+        return n
+
+    def crear_indice(self, coleccion, claves, unico=False):
+        self.primario.crear_indice(coleccion, claves, unico)
+
+    def listar_indices(self, coleccion):
+        return self.primario.listar_indices(coleccion)
+
+    def plan_consulta(self, coleccion, filtro):
+        return self.primario.plan_consulta(coleccion, filtro)
+
+    def version_catalogo(self):
+        version = self.primario.version_catalogo()
+        if version != self._version:
+            # Que la siguiente lectura recargue: el caché del catálogo lee los
+            # modelos justo después de ver la versión nueva
+            with self._lock:
+                self._sincronizado_en = None
+        return version
+
+    def incrementar_version_catalogo(self):
+        return self.primario.incrementar_version_catalogo()
+
+    def limites_ieg(self, filtro, incluir_laptops=True):
+        self._sincronizar()
+        return self.memoria.limites_ieg(filtro, incluir_laptops)
+
+    def ranking_ieg(self, pesos, maximos, minimos, filtro, incluir_laptops=True, limite=None):
+        self._sincronizar()
+        return self.memoria.ranking_ieg(pesos, maximos, minimos, filtro, incluir_laptops, limite)
+
+    def modelos_por_perfil(self):
+        self._sincronizar()
+        return self.memoria.modelos_por_perfil()
+
+    def mejor_relacion_rendimiento_precio(self):
+        self._sincronizar()
+        return self.memoria.mejor_relacion_rendimiento_precio()
+
+
+BACKENDS = ("mongo", "memoria", "replica")
+
+
+def crear_repositorio(backend, mongo, datos=None, ttl=5.0):
+    """Repositorio para STORAGE_BACKEND; `datos` (JSON extendido) precarga el backend en memoria."""
+    if backend == "mongo":
+        return RepositorioMongo(mongo)
+    if backend == "memoria":
+        repositorio = RepositorioMemoria()
+        if datos: repositorio.cargar_archivo(datos)
+        return repositorio
+    if backend == "replica":
+        return RepositorioReplica(RepositorioMongo(mongo), ttl)
+    raise ValueError(f"STORAGE_BACKEND debe ser uno de {BACKENDS}, no {backend!r}")
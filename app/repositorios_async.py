@@ -0,0 +1,69 @@
+"""
+Lecturas asíncronas para el modo asyncio de la API pública (asgi.py). Solo
+cubren lo que esos endpoints leen: obtener, listar y la versión del catálogo.
+  - RepositorioAsyncMongo: AsyncMongoClient de pymongo (sin hilos).
+  - RepositorioAsyncHilos: envuelve un repositorio síncrono (memoria o réplica,
+    que no hacen E/S en sus lecturas) con asyncio.to_thread.
+"""
+import asyncio
+import os
+from pymongo import AsyncMongoClient
+
+
+class RepositorioAsyncMongo:
+
+    def __init__(self, uri, opciones=None):
+        self._uri = uri
+        self._opciones = opciones or {}
+        self._cliente = None
+        self._db = None
+        self._pid = None
+
+    @property
+    def db(self):
+        # El cliente queda ligado al event loop y al proceso que lo crean (un worker)
+        if self._cliente is None or self._pid != os.getpid():
+            self._cliente = AsyncMongoClient(self._uri, appname="techadvisor-async", **self._opciones)
+            self._db = self._cliente.get_default_database()
+            self._pid = os.getpid()
+        return self._db
+
+    async def obtener(self, coleccion, filtro, proyeccion=None):
+        return await self.db[coleccion].find_one(filtro, proyeccion)
+
+    async def listar(self, coleccion, filtro=None, proyeccion=None):
+        return await self.db[coleccion].find(filtro or {}, proyeccion).to_list(None)
+
+    async def version_catalogo(self):
+        doc = await self.db.catalogo_meta.find_one({"_id": "version"})
+        return doc["version"] if doc else 0
+
+    async def cerrar(self):
+        if self._cliente is not None and self._pid == os.getpid():
+            await self._cliente.close()
+        self._cliente = None
+
+
+class RepositorioAsyncHilos:
+
+    def __init__(self, repositorio):
+        self._repositorio = repositorio
+
+    async def obtener(self, coleccion, filtro, proyeccion=None):
+        return await asyncio.to_thread(self._repositorio.obtener, coleccion, filtro, proyeccion)
+
+    async def listar(self, coleccion, filtro=None, proyeccion=None):
+        return await asyncio.to_thread(self._repositorio.listar, coleccion, filtro, proyeccion)
+
+    async def version_catalogo(self):
+        return await asyncio.to_thread(self._repositorio.version_catalogo)
+
+    async def cerrar(self):
+        pass
+
+
+def crear_repositorio_async(backend, uri, opciones, repositorio):
+    """Cliente asíncrono para "mongo"; los backends en memoria reutilizan `repositorio`."""
+    if backend == "mongo":
+        return RepositorioAsyncMongo(uri, opciones)
+    return RepositorioAsyncHilos(repositorio)
@@ -0,0 +1,134 @@
+"""
+Capa de respuestas HTTP:
+  - ProveedorJSON: el JSON de Flask (jsonify, tojson, app.json) con orjson si
+    está instalado y soporte nativo de ObjectId (como str), datetime/date (ISO
+    8601) y tipos de NumPy; sin orjson usa el módulo json con las mismas reglas.
+  - Compresión: gzip o brotli (si está instalado) según Accept-Encoding para
+    respuestas JSON y HTML de al menos `minimo` bytes. La comparten la app Flask
+    (after_request) y el modo asyncio (asgi.py).
+Las respuestas en streaming (exportación del reporte) no se comprimen aquí.
+"""
+import gzip
+from datetime import date, datetime
+from bson.objectid import ObjectId
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import parse_accept_header
+import numpy as np
+from .metricas import RESPUESTAS_BYTES
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende del entorno
+    brotli = None
+
+COMPRIMIBLES = ("application/json", "text/html")
+MINIMO_BYTES = 1024
+NIVEL_GZIP = 6
+CALIDAD_BROTLI = 5
+
+
+def _por_defecto(valor):
+    """Tipos que ni orjson ni json serializan solos."""
+    if isinstance(valor, ObjectId): return str(valor)
+    if isinstance(valor, (datetime, date)): return valor.isoformat()
+    if isinstance(valor, np.generic): return valor.item()
+    if isinstance(valor, np.ndarray): return valor.tolist()
+    return DefaultJSONProvider.default(valor)
+
+
+class ProveedorJSON(DefaultJSONProvider):
+    """Proveedor JSON de la app: orjson si está disponible (claves ordenadas, como Flask)."""
+
+    default = staticmethod(_por_defecto)
+
+    def _opciones(self, sort_keys=None, indent=None):
+        opciones = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if self.sort_keys if sort_keys is None else sort_keys: opciones |= orjson.OPT_SORT_KEYS
+        if indent: opciones |= orjson.OPT_INDENT_2
+        return opciones
+
+    def codificar(self, obj, **kwargs):
+        """JSON en bytes UTF-8 (sin pasar por str con orjson)."""
+        if orjson is None: return self.dumps(obj, **kwargs).encode()
+        return orjson.dumps(obj, default=_por_defecto,
+                            option=self._opciones(kwargs.get("sort_keys"), kwargs.get("indent")))
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None: return super().dumps(obj, **kwargs)
+        return self.codificar(obj, **kwargs).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs: return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if self.compact is False or (self.compact is None and self._app.debug) else None
+        return self._app.response_class(self.codificar(obj, indent=indent) + b"\n", mimetype=self.mimetype)
+
+
+# COMPRESIÓN
+
+def negociar(accept_encoding):
+    """'br', 'gzip' o None según la cabecera Accept-Encoding (calidades incluidas)."""
+    if not accept_encoding: return None
+    ofrecidas = ("br", "gzip") if brotli is not None else ("gzip",)
+    return parse_accept_header(accept_encoding).best_match(ofrecidas)
+
+
+def comprimir(datos, codificacion, nivel_gzip=NIVEL_GZIP, calidad_brotli=CALIDAD_BROTLI):
+    if codificacion == "br": return brotli.compress(datos, quality=calidad_brotli)
+    return gzip.compress(datos, compresslevel=nivel_gzip, mtime=0)
+
+
+class Compresion:
+    """Compresión de respuestas; create_app la activa y configura (COMPRESION_*)."""
+
+    def __init__(self):
+        self.activa = False
+        self.minimo = MINIMO_BYTES
+        self.nivel_gzip = NIVEL_GZIP
+        self.calidad_brotli = CALIDAD_BROTLI
+
+    def init_app(self, app, minimo=MINIMO_BYTES, nivel_gzip=NIVEL_GZIP, calidad_brotli=CALIDAD_BROTLI):
+        self.activa = True
+        self.minimo = minimo
+        self.nivel_gzip = nivel_gzip
+        self.calidad_brotli = calidad_brotli
+        app.after_request(self._despues)
+
+    def aplicar(self, datos, mimetype, accept_encoding):
+        """
+        (datos, codificación o None) para un cuerpo ya generado. Solo comprime
+        tipos COMPRIMIBLES de al menos `minimo` bytes cuando el cliente lo acepta.
+        """
+        if not self.activa or mimetype not in COMPRIMIBLES or len(datos) < self.minimo: return datos, None
+        codificacion = negociar(accept_encoding)
+        if codificacion is None: return datos, None
+        comprimidos = comprimir(datos, codificacion, self.nivel_gzip, self.calidad_brotli)
+        RESPUESTAS_BYTES.labels(codificacion, "original").inc(len(datos))
+        RESPUESTAS_BYTES.labels(codificacion, "enviado").inc(len(comprimidos))
+        return comprimidos, codificacion
+
+    def _despues(self, response):
+        if response.mimetype not in COMPRIMIBLES: return response
+        response.vary.add("Accept-Encoding")
+        if response.direct_passthrough or response.is_streamed or "Content-Encoding" in response.headers \
+                or response.status_code < 200 or response.status_code in (204, 304):
+            return response
+
+        datos, codificacion = self.aplicar(response.get_data(), response.mimetype,
+                                           request.headers.get("Accept-Encoding"))
+        if codificacion:
+            response.set_data(datos)
+            response.headers["Content-Encoding"] = codificacion
+        return response
+
+
+compresion = Compresion()
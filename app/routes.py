@@ -1,11 +1,25 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
 from flask import jsonify
 import json 
+from pymongo.errors import DuplicateKeyError
+from . import mongo
+from .cache import catalog_cache, resultados_cache
+from .dashboard import dashboard_stats
+from .indices import gestor_indices
+from .materializacion import recomendaciones_materializadas
+from .paginacion import listado_modelos, listado_consultas
+from .services import CoreService
+from .validacion import validar_modelo
+from .importacion import COLECCIONES, FORMATOS, formato_de, leer_filas, importar
+from .sensibilidad import (
+    ORDEN_PESOS, MAX_CELDAS, analizar_barrido, pesos_rejilla, pesos_aleatorios, tamano_rejilla
+)
 from .models import (
     get_all_perfiles, get_perfil_by_id, create_perfil, update_perfil, delete_perfil,
     get_all_marcas, get_marca_by_id, create_marca, update_marca, delete_marca,
-    get_all_modelos, get_modelo_by_id, get_modelo_by_codigo,
-    create_modelo, update_modelo, delete_modelo, get_all_consultas
+    get_modelo_by_id, get_modelo_by_codigo,
+    create_modelo, update_modelo, delete_modelo,
+    PROYECCION_NOMBRE, PROYECCION_PESOS
 )
 
 admin_bp = Blueprint("admin", __name__)
@@ -50,71 +64,45 @@ def calcular_ieg_avanzado(modelo, pesos, maximos, minimos):
 
 @admin_bp.route("/")
 def home():
-    perfiles = get_all_perfiles()
-    marcas = get_all_marcas()
-    modelos = get_all_modelos()
-    consultas = get_all_consultas()
-
-    total_perfiles = len(perfiles)
-    total_marcas = len(marcas)
-    total_modelos = len(modelos)
-    total_consultas = len(consultas)
-
-    mejor_relacion = None
-    mejor_ratio = None
-    for m in modelos:
-        precio = m.get("precio") or 0
-        rendimiento = m.get("rendimiento") or 0
-        try:
-            if precio and precio > 0:
-                ratio = float(rendimiento) / float(precio)
-                if mejor_ratio is None or ratio > mejor_ratio:
-                    mejor_ratio = ratio
-                    mejor_relacion = m
-        except (TypeError, ValueError):
-            continue
-
-    modelos_por_perfil = {}
-    perfiles_dict = {str(p["_id"]): p for p in perfiles}
-
-    for m in modelos:
-        perfil_id = m.get("perfil_uso_id")
-        if perfil_id:
-            modelos_por_perfil[perfil_id] = modelos_por_perfil.get(perfil_id, 0) + 1
-
-    chart_labels = []
-    chart_values = []
-    for perfil_id, count in modelos_por_perfil.items():
-        perfil = perfiles_dict.get(str(perfil_id))
-        nombre = perfil["nombre"] if perfil else "Sin perfil"
-        chart_labels.append(nombre)
-        chart_values.append(count)
+    return render_template("home.html", **dashboard_stats.obtener())
 
-    return render_template(
-        "home.html",
-        total_perfiles=total_perfiles,
-        total_marcas=total_marcas,
-        total_modelos=total_modelos,
-        total_consultas=total_consultas,
-        mejor_relacion=mejor_relacion,
-        chart_labels=chart_labels,
-        chart_values=chart_values,
-    )
+
+@admin_bp.route("/cache/stats")
+def cache_stats():
+    return jsonify({"catalogo": catalog_cache.stats(), "resultados": resultados_cache.stats(),
+                    "materializadas": recomendaciones_materializadas.stats()})
+
+
+@admin_bp.route("/conexiones/stats")
+def conexiones_stats():
+    return jsonify(mongo.stats())
+
+@admin_bp.route("/indices")
+def indices_estado():
+    """Índices declarados: si existen y el plan (explain) de la consulta que deben servir."""
+    return jsonify(gestor_indices.reportar())
+
+
+@admin_bp.route("/recomendaciones/materializar", methods=["POST"])
+def materializar_recomendaciones():
+    """Recalcula el top-3 materializado de todos los pares (perfil, marca)."""
+    return jsonify(recomendaciones_materializadas.materializar_todo())
 
 
 @admin_bp.route("/consultas")
 def listar_consultas():
-    consultas = get_all_consultas()
-    perfiles = {str(p["_id"]): p for p in get_all_perfiles()}
-    modelos = {str(m["_id"]): m for m in get_all_modelos()}
+    pagina = listado_consultas.pagina(request.args)
+    if pagina is None:
+        flash("El cursor de paginación no es válido.", "warning")
+        return redirect(url_for("admin.listar_consultas"))
+    return render_template("consultas/listar.html", consultas=pagina["items"], pagina=pagina)
 
-    for c in consultas:
-        perfil = perfiles.get(str(c.get("perfil_uso_id")))
-        modelo = modelos.get(str(c.get("modelo_id")))
-        c["perfil_nombre"] = perfil["nombre"] if perfil else "N/A"
-        c["modelo_nombre"] = modelo["nombre"] if modelo else "N/A"
 
-    return render_template("consultas/listar.html", consultas=consultas)
+@admin_bp.route("/api/consultas")
+def api_consultas():
+    pagina = listado_consultas.pagina(request.args)
+    if pagina is None: return jsonify({"error": "Cursor inválido"}), 400
+    return jsonify(pagina)
 
 
 # PERFILES DE USO
@@ -300,91 +288,85 @@ def eliminar_marca(id):
 
 @admin_bp.route("/modelos")
 def listar_modelos():
-    modelos = get_all_modelos()
-    marcas = {str(m["_id"]): m for m in get_all_marcas()}
-    perfiles = {str(p["_id"]): p for p in get_all_perfiles()}
+    pagina = listado_modelos.pagina(request.args)
+    if pagina is None:
+        flash("El cursor de paginación no es válido.", "warning")
+        return redirect(url_for("admin.listar_modelos"))
+    return render_template("modelos/listar.html", modelos=pagina["items"], pagina=pagina,
+                           marcas=get_all_marcas(PROYECCION_NOMBRE),
+                           perfiles=get_all_perfiles(PROYECCION_NOMBRE))
 
-    modelos_enriquecidos = []
-    for m in modelos:
-        marca = marcas.get(str(m.get("marca_id")))
-        perfil = perfiles.get(str(m.get("perfil_uso_id")))
-        m["marca_nombre"] = marca["nombre"] if marca else "N/A"
-        m["perfil_nombre"] = perfil["nombre"] if perfil else "N/A"
-        modelos_enriquecidos.append(m)
 
-    return render_template("modelos/listar.html", modelos=modelos_enriquecidos)
+@admin_bp.route("/api/modelos")
+def api_modelos():
+    pagina = listado_modelos.pagina(request.args)
+    if pagina is None: return jsonify({"error": "Cursor inválido"}), 400
+    return jsonify(pagina)
 
 
 @admin_bp.route("/modelos/nuevo", methods=["GET", "POST"])
 def nuevo_modelo():
-    marcas = get_all_marcas()
-    perfiles = get_all_perfiles()
+    marcas = get_all_marcas(PROYECCION_NOMBRE)
+    perfiles = get_all_perfiles(PROYECCION_NOMBRE)
     errors = {}
 
     if request.method == "POST":
-        nombre = request.form.get("nombre", "").strip()
-        codigo_modelo = request.form.get("codigo_modelo", "").strip()
-        marca_id = request.form.get("marca_id")
-        perfil_uso_id = request.form.get("perfil_uso_id")
-
-        precio = request.form.get("precio")
-        rendimiento = request.form.get("rendimiento")
-        consumo = request.form.get("consumo")
-        temperatura = request.form.get("temperatura")
-
-        if not nombre:
-            errors["nombre"] = "El nombre del modelo es obligatorio."
+        data, errors = validar_modelo(request.form,
+                                      marcas={str(m["_id"]) for m in marcas},
+                                      perfiles={str(p["_id"]) for p in perfiles})
 
-        if not codigo_modelo:
-            errors["codigo_modelo"] = "El código del modelo es obligatorio."
-        else:
-            existente = get_modelo_by_codigo(codigo_modelo)
-            if existente:
-                errors["codigo_modelo"] = "Ya existe un modelo con ese código."
-
-        try:
-            precio_val = float(precio)
-            if precio_val <= 0 or precio_val > 10000:
-                errors["precio"] = "El precio debe ser mayor a 0 y razonable (<= 10000)."
-        except (TypeError, ValueError):
-            errors["precio"] = "El precio debe ser numérico."
+        if not errors and not gestor_indices.unico_garantizado("modelos_computadora", "codigo_modelo") \
+                and get_modelo_by_codigo(data["codigo_modelo"]):
+            errors["codigo_modelo"] = "Ya existe un modelo con ese código."
 
-        def validar_num_pos(nombre_campo, valor_raw, minimo=0):
+        if not errors:
+            # El índice único de codigo_modelo detecta el duplicado en el mismo insert
             try:
-                v = float(valor_raw)
-                if v < minimo:
-                    errors[nombre_campo] = f"{nombre_campo.capitalize()} debe ser ≥ {minimo}."
-                return v
-            except (TypeError, ValueError):
-                errors[nombre_campo] = f"{nombre_campo.capitalize()} debe ser numérico."
-                return None
-
-        rendimiento_val = validar_num_pos("rendimiento", rendimiento, 0)
-        consumo_val = validar_num_pos("consumo", consumo, 0)
-        temperatura_val = validar_num_pos("temperatura", temperatura, 0)
-
-        if not marca_id:
-            errors["marca_id"] = "Debes seleccionar una marca."
+                create_modelo(data)
+            except DuplicateKeyError:
+                errors["codigo_modelo"] = "Ya existe un modelo con ese código."
+            else:
+                flash("Modelo creado correctamente.", "success")
+                return redirect(url_for("admin.listar_modelos"))
 
-        if not perfil_uso_id:
-            errors["perfil_uso_id"] = "Debes seleccionar un perfil de uso."
+    return render_template("modelos/nuevo.html", marcas=marcas, perfiles=perfiles, errors=errors)
 
-        if not errors:
-            data = {
-                "nombre": nombre,
-                "codigo_modelo": codigo_modelo,
-                "marca_id": marca_id,
-                "perfil_uso_id": perfil_uso_id,
-                "precio": precio_val,
-                "rendimiento": rendimiento_val,
-                "consumo": consumo_val,
-                "temperatura": temperatura_val,
-            }
-            create_modelo(data)
-            flash("Modelo creado correctamente.", "success")
-            return redirect(url_for("admin.listar_modelos"))
 
-    return render_template("modelos/nuevo.html", marcas=marcas, perfiles=perfiles, errors=errors)
+@admin_bp.route("/modelos/importar", methods=["GET", "POST"])
+def importar_modelos():
+    """
+    Importación masiva desde CSV o JSON Lines: archivo del formulario (muestra
+    el reporte) o el cuerpo de la petición con Content-Type text/csv o
+    application/x-ndjson y ?coleccion=pcs|laptops (responde el reporte en JSON).
+    """
+    if request.method == "GET":
+        return render_template("modelos/importar.html", reporte=None)
+
+    archivo = request.files.get("archivo")
+    if archivo:
+        nombre_coleccion = request.form.get("coleccion", "pcs")
+        formato = request.form.get("formato") or formato_de(archivo.filename, archivo.mimetype)
+        flujo = archivo.stream
+    else:
+        nombre_coleccion = request.args.get("coleccion", "pcs")
+        formato = request.args.get("formato") or formato_de(None, request.content_type)
+        flujo = request.stream
+
+    error = None
+    if nombre_coleccion not in COLECCIONES:
+        error = "La colección debe ser pcs o laptops."
+    elif formato not in FORMATOS:
+        error = "El archivo debe ser CSV o JSON Lines."
+    if error:
+        if archivo:
+            flash(error, "danger")
+            return redirect(url_for("admin.importar_modelos"))
+        return jsonify({"error": error}), 400
+
+    reporte = importar(leer_filas(flujo, formato), COLECCIONES[nombre_coleccion])
+    if archivo:
+        return render_template("modelos/importar.html", reporte=reporte)
+    return jsonify(reporte)
 
 
 @admin_bp.route("/modelos/editar/<id>", methods=["GET", "POST"])
@@ -394,72 +376,28 @@ def editar_modelo(id):
         flash("Modelo no encontrado.", "danger")
         return redirect(url_for("admin.listar_modelos"))
 
-    marcas = get_all_marcas()
-    perfiles = get_all_perfiles()
+    marcas = get_all_marcas(PROYECCION_NOMBRE)
+    perfiles = get_all_perfiles(PROYECCION_NOMBRE)
     errors = {}
 
     if request.method == "POST":
-        nombre = request.form.get("nombre", "").strip()
-        codigo_modelo = request.form.get("codigo_modelo", "").strip()
-        marca_id = request.form.get("marca_id")
-        perfil_uso_id = request.form.get("perfil_uso_id")
-
-        precio = request.form.get("precio")
-        rendimiento = request.form.get("rendimiento")
-        consumo = request.form.get("consumo")
-        temperatura = request.form.get("temperatura")
+        data, errors = validar_modelo(request.form,
+                                      marcas={str(m["_id"]) for m in marcas},
+                                      perfiles={str(p["_id"]) for p in perfiles})
 
-        if not nombre:
-            errors["nombre"] = "El nombre del modelo es obligatorio."
-
-        if not codigo_modelo:
-            errors["codigo_modelo"] = "El código del modelo es obligatorio."
-        else:
-            existente = get_modelo_by_codigo(codigo_modelo)
+        if not errors and not gestor_indices.unico_garantizado("modelos_computadora", "codigo_modelo"):
+            existente = get_modelo_by_codigo(data["codigo_modelo"])
             if existente and str(existente["_id"]) != str(modelo["_id"]):
                 errors["codigo_modelo"] = "Ya existe otro modelo con ese código."
 
-        try:
-            precio_val = float(precio)
-            if precio_val <= 0 or precio_val > 10000:
-                errors["precio"] = "El precio debe ser mayor a 0 y razonable (<= 10000)."
-        except (TypeError, ValueError):
-            errors["precio"] = "El precio debe ser numérico."
-
-        def validar_num_pos(nombre_campo, valor_raw, minimo=0):
-            try:
-                v = float(valor_raw)
-                if v < minimo:
-                    errors[nombre_campo] = f"{nombre_campo.capitalize()} debe ser ≥ {minimo}."
-                return v
-            except (TypeError, ValueError):
-                errors[nombre_campo] = f"{nombre_campo.capitalize()} debe ser numérico."
-                return None
-
-        rendimiento_val = validar_num_pos("rendimiento", rendimiento, 0)
-        consumo_val = validar_num_pos("consumo", consumo, 0)
-        temperatura_val = validar_num_pos("temperatura", temperatura, 0)
-
-        if not marca_id:
-            errors["marca_id"] = "Debes seleccionar una marca."
-
-        if not perfil_uso_id:
-            errors["perfil_uso_id"] = "Debes seleccionar un perfil de uso."
-
         if not errors:
-            data = {
-                "nombre": nombre,
-                "codigo_modelo": codigo_modelo,
-                "marca_id": marca_id,
-                "perfil_uso_id": perfil_uso_id,
-                "precio": precio_val,
-                "rendimiento": rendimiento_val,
-                "consumo": consumo_val,
-                "temperatura": temperatura_val,
-            }
-            update_modelo(id, data)
-            flash("Modelo actualizado correctamente.", "success")
-            return redirect(url_for("admin.listar_modelos"))
+            try:
+                update_modelo(id, data)
+            except DuplicateKeyError:
+                errors["codigo_modelo"] = "Ya existe otro modelo con ese código."
+            else:
+                flash("Modelo actualizado correctamente.", "success")
+                return redirect(url_for("admin.listar_modelos"))
 
     return render_template("modelos/editar.html",
                            modelo=modelo,
@@ -475,15 +413,68 @@ def eliminar_modelo(id):
     return redirect(url_for("admin.listar_modelos"))
 
 
+def _barrido_pesos(modelos, columnas, maximos, minimos, pesos_base, opciones):
+    """
+    Barrido de sensibilidad para el calibrador: rejilla sobre el símplex con el
+    paso indicado o muestra aleatoria. Se acota a MAX_CELDAS modelos x vectores.
+    """
+    limite_vectores = max(1, MAX_CELDAS // len(modelos))
+    if opciones["modo"] == "aleatorio":
+        try:
+            muestras = max(1, int(opciones["muestras"]))
+            semilla = int(opciones["semilla"]) if opciones["semilla"] else None
+        except ValueError:
+            flash("Las muestras y la semilla deben ser enteros.", "danger")
+            return None
+        if muestras > limite_vectores:
+            flash(f"Se limitó el barrido a {limite_vectores} vectores.", "warning")
+            muestras = limite_vectores
+        matriz = pesos_aleatorios(muestras, semilla)
+    else:
+        try:
+            paso = float(opciones["paso"])
+        except ValueError:
+            paso = 0
+        if not 0 < paso <= 0.5:
+            flash("El paso de la rejilla debe estar entre 0 y 0.5.", "danger")
+            return None
+        if tamano_rejilla(paso) > limite_vectores:
+            flash(f"La rejilla supera {limite_vectores} vectores: usa un paso mayor.", "danger")
+            return None
+        matriz = pesos_rejilla(paso)
+
+    barrido = analizar_barrido(columnas, matriz, maximos, minimos, pesos_base)
+
+    def nombre(i): return modelos[i].get("nombre")
+    for fila in barrido["modelos"] + barrido["regiones"]:
+        fila["nombre"] = nombre(fila["indice"])
+    for fila in barrido["fronteras"]:
+        fila["nombre"] = nombre(fila["indice"])
+        fila["nombre_retador"] = nombre(fila["retador"])
+    estabilidad = barrido["estabilidad"]
+    if estabilidad:
+        estabilidad["nombre_base"] = nombre(estabilidad["indice_base"])
+        if estabilidad["cambio_mas_cercano"]:
+            estabilidad["cambio_mas_cercano"]["nombre"] = nombre(estabilidad["cambio_mas_cercano"]["indice"])
+    return barrido
+
+
 @admin_bp.route("/calibracion_core", methods=["GET", "POST"])
 def calibracion_core():
-    perfiles = get_all_perfiles()
+    perfiles = get_all_perfiles(PROYECCION_NOMBRE)
     perfil_id = request.values.get("perfil_id") 
 
-    perfil = get_perfil_by_id(perfil_id) if perfil_id else None
+    perfil = get_perfil_by_id(perfil_id, PROYECCION_PESOS) if perfil_id else None
     errores = {}
     pesos_form = {}
     resultados = []
+    barrido = None
+    opciones_barrido = {
+        "modo": request.form.get("modo_barrido", "rejilla"),
+        "paso": request.form.get("paso", "0.05"),
+        "muestras": request.form.get("muestras", "2000"),
+        "semilla": request.form.get("semilla", ""),
+    }
 
     if perfil:
         pesos_form = {
@@ -518,49 +509,37 @@ def calibracion_core():
             }
             pesos_form = pesos_nuevos
 
-            todos_modelos = get_all_modelos()
-            
-            if not todos_modelos:
+            catalogo, limites = catalog_cache.get_con_limites("tipo", "PC Escritorio")
+
+            if not limites:
                 flash("Necesitas agregar modelos al sistema para calibrar.", "warning")
             else:
-                try:
-                    maximos = {
-                        'rend': max(float(m.get('rendimiento',0)) for m in todos_modelos),
-                        'prec': max(float(m.get('precio',0)) for m in todos_modelos),
-                        'cons': max(float(m.get('consumo',0)) for m in todos_modelos),
-                        'temp': max(float(m.get('temperatura',0)) for m in todos_modelos)
-                    }
-                    minimos = {
-                        'rend': min(float(m.get('rendimiento',0)) for m in todos_modelos),
-                        'prec': min(float(m.get('precio',0)) for m in todos_modelos),
-                        'cons': min(float(m.get('consumo',0)) for m in todos_modelos),
-                        'temp': min(float(m.get('temperatura',0)) for m in todos_modelos)
-                    }
-                except ValueError:
-                    maximos = minimos = {'rend':0, 'prec':0, 'cons':0, 'temp':0}
-
-                modelos_del_perfil = [m for m in todos_modelos if str(m.get("perfil_uso_id")) == str(perfil_id)]
-
-                for m in modelos_del_perfil:
-                    pesos_actuales = {
-                        "peso_rendimiento": perfil.get("peso_rendimiento", 0),
-                        "peso_precio": perfil.get("peso_precio", 0),
-                        "peso_consumo": perfil.get("peso_consumo", 0),
-                        "peso_temperatura": perfil.get("peso_temperatura", 0),
-                    }
-                    
-                    ie_actual = calcular_ieg_avanzado(m, pesos_actuales, maximos, minimos)
-                    ie_nuevo = calcular_ieg_avanzado(m, pesos_nuevos, maximos, minimos)
-                    
+                # Límites globales mantenidos incrementalmente por el caché del catálogo
+                maximos, minimos = limites
+
+                filas = catalogo.filas(perfil_id=perfil_id, tipo="PC Escritorio")
+                modelos_del_perfil = catalogo.seleccion(filas)
+                columnas = catalogo.columnas(filas)
+
+                # IEG actual y nuevo de todos los modelos en un solo producto matricial
+                matriz = [[CoreService._safe_float(perfil.get(c)) for c in ORDEN_PESOS],
+                          [pesos_nuevos[c] for c in ORDEN_PESOS]]
+                scores = CoreService.calcular_scores_matriz(columnas, matriz, maximos, minimos)
+
+                for m, (ie_actual, ie_nuevo) in zip(modelos_del_perfil, scores.tolist()):
                     resultados.append({
                         "modelo": m,
                         "ieg_actual": round(ie_actual, 4),
                         "ieg_nuevo": round(ie_nuevo, 4),
                         "diferencia": round(ie_nuevo - ie_actual, 4),
                     })
-                    
+
                 resultados.sort(key=lambda x: x['ieg_nuevo'], reverse=True)
 
+                if accion == "barrido" and modelos_del_perfil:
+                    barrido = _barrido_pesos(modelos_del_perfil, columnas, maximos, minimos,
+                                             pesos_nuevos, opciones_barrido)
+
             if accion == "guardar":
                 data_update = {
                     "nombre": perfil["nombre"],
@@ -572,7 +551,7 @@ def calibracion_core():
                 }
                 update_perfil(perfil_id, data_update)
                 flash("Pesos del perfil actualizados correctamente.", "success")
-                perfil = get_perfil_by_id(perfil_id)
+                perfil = get_perfil_by_id(perfil_id, PROYECCION_PESOS)
 
     return render_template(
         "calibracion.html",
@@ -582,5 +561,7 @@ def calibracion_core():
         pesos_form=pesos_form,
         errores=errores,
         resultados=resultados,
+        barrido=barrido,
+        opciones_barrido=opciones_barrido,
     )
 
@@ -0,0 +1,145 @@
+"""
+Análisis de sensibilidad del IEG frente a los pesos del perfil.
+Evalúa miles de vectores de pesos (una rejilla sobre el símplex o una muestra
+aleatoria) con un único producto matricial y resume qué tan estable es el
+ranking, cuántas veces gana cada modelo y en qué zonas de pesos cambia el ganador.
+Los vectores suman 1: el ranking no depende de la escala de los pesos.
+"""
+import itertools
+import numpy as np
+from .services import CoreService
+
+ORDEN_PESOS = ("peso_rendimiento", "peso_precio", "peso_consumo", "peso_temperatura")
+
+# Límite de celdas modelos x vectores para acotar memoria y tiempo de una petición
+MAX_CELDAS = 4_000_000
+
+
+def vector_pesos(pesos):
+    """dict de pesos -> arreglo normalizado a suma 1 (None si todos son 0)."""
+    v = np.array([CoreService._safe_float(pesos.get(c)) for c in ORDEN_PESOS])
+    total = v.sum()
+    return v / total if total > 0 else None
+
+
+def pesos_a_dict(v):
+    return {c: round(float(x), 4) for c, x in zip(ORDEN_PESOS, v)}
+
+
+def pesos_rejilla(paso):
+    """Todos los vectores con componentes múltiplos de `paso` que suman 1."""
+    divisiones = max(1, int(round(1 / paso)))
+    # Barras y estrellas: 3 separadores entre divisiones + 3 posiciones
+    cortes = np.array(list(itertools.combinations(range(divisiones + 3), 3)))
+    extremos = np.column_stack((np.full(len(cortes), -1), cortes, np.full(len(cortes), divisiones + 3)))
+    return (np.diff(extremos, axis=1) - 1).astype(np.float64) / divisiones
+
+
+def tamano_rejilla(paso):
+    divisiones = max(1, int(round(1 / paso)))
+    return (divisiones + 3) * (divisiones + 2) * (divisiones + 1) // 6
+
+
+def pesos_aleatorios(muestras, semilla=None):
+    """Muestra uniforme del símplex (Dirichlet(1, 1, 1, 1))."""
+    return np.random.default_rng(semilla).dirichlet(np.ones(len(ORDEN_PESOS)), size=muestras)
+
+
+def _rangos(scores):
+    """Posición (1 = mejor) de cada modelo en cada columna; empates por índice."""
+    n, m = scores.shape
+    orden = np.argsort(-scores, axis=0, kind="stable")
+    rangos = np.empty((n, m), dtype=np.int32)
+    rangos[orden, np.arange(m)] = np.arange(1, n + 1, dtype=np.int32)[:, None]
+    return rangos
+
+
+def analizar_barrido(columnas, matriz_pesos, maximos, minimos, pesos_base=None, tolerancia=0.01, max_fronteras=20):
+    """
+    Evalúa el IEG de los modelos (columnas) para cada fila de matriz_pesos.
+    Devuelve un dict con:
+      - modelos: victorias, frecuencia de ganar / de quedar en el top 3 y
+        rango medio, desviación, mejor y peor posición (índices de `columnas`).
+      - regiones: para cada ganador, centroide y rango de pesos donde gana.
+      - fronteras: pares (ganador, retador) cuya diferencia de IEG es menor que
+        `tolerancia`, es decir, las zonas donde el ganador está a punto de cambiar.
+      - estabilidad: correlación de Spearman de cada ranking con el de pesos_base
+        y el vector más cercano a pesos_base con otro ganador.
+    """
+    scores = CoreService.calcular_scores_matriz(columnas, matriz_pesos, maximos, minimos)
+    n, m = scores.shape
+    rangos = _rangos(scores)
+    ganadores = np.argmax(scores, axis=0)
+    victorias = np.bincount(ganadores, minlength=n)
+
+    modelos = [{
+        "indice": i,
+        "victorias": int(victorias[i]),
+        "frecuencia": round(float(victorias[i]) / m, 4),
+        "frecuencia_top3": round(float((rangos[i] <= 3).mean()), 4),
+        "rango_medio": round(float(rangos[i].mean()), 2),
+        "rango_std": round(float(rangos[i].std()), 2),
+        "mejor_rango": int(rangos[i].min()),
+        "peor_rango": int(rangos[i].max()),
+    } for i in range(n)]
+    modelos.sort(key=lambda x: (-x["victorias"], x["rango_medio"], x["indice"]))
+
+    regiones = []
+    for g in np.flatnonzero(victorias):
+        zona = matriz_pesos[ganadores == g]
+        regiones.append({
+            "indice": int(g),
+            "vectores": len(zona),
+            "frecuencia": round(len(zona) / m, 4),
+            "centroide": pesos_a_dict(zona.mean(axis=0)),
+            "minimo": pesos_a_dict(zona.min(axis=0)),
+            "maximo": pesos_a_dict(zona.max(axis=0)),
+        })
+    regiones.sort(key=lambda x: -x["vectores"])
+
+    fronteras = []
+    if n > 1:
+        retadores = np.argmax(rangos == 2, axis=0)
+        margen = scores[ganadores, np.arange(m)] - scores[retadores, np.arange(m)]
+        cerca = np.flatnonzero(margen < tolerancia)
+        pares, grupo = np.unique(ganadores[cerca] * n + retadores[cerca], return_inverse=True)
+        for k, par in enumerate(pares):
+            columnas_par = cerca[grupo == k]
+            fronteras.append({
+                "indice": int(par // n), "retador": int(par % n), "vectores": len(columnas_par),
+                "margen_medio": round(float(margen[columnas_par].mean()), 4),
+                "centroide": pesos_a_dict(matriz_pesos[columnas_par].mean(axis=0)),
+            })
+        fronteras.sort(key=lambda x: -x["vectores"])
+        fronteras = fronteras[:max_fronteras]
+
+    resultado = {"vectores": m, "modelos": modelos, "regiones": regiones,
+                 "fronteras": fronteras, "estabilidad": None}
+
+    base = vector_pesos(pesos_base) if pesos_base else None
+    if base is not None:
+        scores_base = CoreService.calcular_scores_matriz(columnas, base[None, :], maximos, minimos)
+        rangos_base = _rangos(scores_base)[:, 0]
+        ganador_base = int(np.argmax(scores_base[:, 0]))
+        if n > 1:
+            d2 = ((rangos - rangos_base[:, None]).astype(np.float64) ** 2).sum(axis=0)
+            spearman = 1 - 6 * d2 / (n * (n * n - 1))
+        else:
+            spearman = np.ones(m)
+
+        cambio = None
+        otros = np.flatnonzero(ganadores != ganador_base)
+        if len(otros):
+            distancias = np.abs(matriz_pesos[otros] - base).sum(axis=1)
+            j = otros[np.argmin(distancias)]
+            cambio = {"indice": int(ganadores[j]), "pesos": pesos_a_dict(matriz_pesos[j]),
+                      "distancia_l1": round(float(distancias.min()), 4)}
+
+        resultado["estabilidad"] = {
+            "indice_base": ganador_base,
+            "spearman_medio": round(float(spearman.mean()), 4),
+            "spearman_minimo": round(float(spearman.min()), 4),
+            "frecuencia_ganador_base": round(float(victorias[ganador_base]) / m, 4),
+            "cambio_mas_cercano": cambio,
+        }
+    return resultado
@@ -1,5 +1,15 @@
 import datetime
+import logging
+import math
+import numpy as np
 from .strategies import StrategyFactory
+from .metricas import fase, IEG_CANDIDATOS, IEG_ERRORES
+
+logger = logging.getLogger(__name__)
+
+# Pares (clave de normalización, campo del documento) usados por el IEG
+CAMPOS_IEG = (("rend", "rendimiento"), ("prec", "precio"), ("cons", "consumo"), ("temp", "temperatura"))
+
 
 class CoreService:
     """
@@ -11,8 +21,10 @@ class CoreService:
     def _safe_float(valor):
         """Convierte a float de forma segura (evita errores 500)"""
         if valor is None: return 0.0
-        try: return float(valor)
+        try: valor = float(valor)
         except: return 0.0
+        # NaN/inf romperían los límites de normalización
+        return valor if math.isfinite(valor) else 0.0
 
     @staticmethod
     def _normalizar(val, min_v, max_v):
@@ -45,10 +57,112 @@ class CoreService:
 
             return (alpha * Rn) + (beta * (1 - Pn)) + (gamma * (1 - Cn)) + (delta * (1 - Tn))
         except Exception as e:
-            print(f"Error cálculo matemático: {e}")
+            IEG_ERRORES.inc()
+            logger.warning("Error cálculo matemático: %s", e)
             return 0.0
 
     @classmethod
+    def columnas_desde_modelos(cls, modelos):
+        """Extrae en una sola pasada las columnas numéricas del IEG como arreglos NumPy"""
+        n = len(modelos)
+        return {
+            campo: np.fromiter((cls._safe_float(m.get(campo)) for m in modelos), dtype=np.float64, count=n)
+            for _, campo in CAMPOS_IEG
+        }
+
+    @staticmethod
+    def calcular_limites(columnas):
+        """Devuelve (maximos, minimos) de cada columna con las claves del IEG"""
+        maximos = {k: float(columnas[campo].max()) for k, campo in CAMPOS_IEG}
+        minimos = {k: float(columnas[campo].min()) for k, campo in CAMPOS_IEG}
+        return maximos, minimos
+
+    @staticmethod
+    def _normalizar_columna(col, min_v, max_v):
+        """Versión vectorizada de _normalizar (rango 0 -> columna de ceros)"""
+        rango = max_v - min_v
+        if rango == 0: return np.zeros_like(col)
+        return (col - min_v) / rango
+
+    @classmethod
+    def calcular_scores_batch(cls, columnas, pesos, maximos=None, minimos=None, ordenar=True):
+        """
+        Calcula el IEG de todo el conjunto candidato en una sola pasada vectorizada.
+        Reproduce exactamente calcular_score modelo a modelo.
+        Retorna (scores, orden) donde orden es el argsort descendente (estable),
+        o None si ordenar=False (p. ej. cuando solo se necesita el top-k).
+        """
+        if maximos is None or minimos is None:
+            maximos, minimos = cls.calcular_limites(columnas)
+
+        with fase("normalizacion"):
+            Rn = cls._normalizar_columna(columnas["rendimiento"], minimos['rend'], maximos['rend'])
+            Pn = cls._normalizar_columna(columnas["precio"], minimos['prec'], maximos['prec'])
+            Cn = cls._normalizar_columna(columnas["consumo"], minimos['cons'], maximos['cons'])
+            Tn = cls._normalizar_columna(columnas["temperatura"], minimos['temp'], maximos['temp'])
+
+        alpha = cls._safe_float(pesos.get("peso_rendimiento"))
+        beta = cls._safe_float(pesos.get("peso_precio"))
+        gamma = cls._safe_float(pesos.get("peso_consumo"))
+        delta = cls._safe_float(pesos.get("peso_temperatura"))
+
+        with fase("scoring"):
+            scores = (alpha * Rn) + (beta * (1 - Pn)) + (gamma * (1 - Cn)) + (delta * (1 - Tn))
+            orden = np.argsort(-scores, kind="stable") if ordenar else None
+        IEG_CANDIDATOS.inc(len(scores))
+        return scores, orden
+
+    @classmethod
+    def matriz_normalizada(cls, columnas, maximos, minimos):
+        """Matriz n x 4 con los términos del IEG: (Rn, 1-Pn, 1-Cn, 1-Tn)"""
+        Rn = cls._normalizar_columna(columnas["rendimiento"], minimos['rend'], maximos['rend'])
+        Pn = cls._normalizar_columna(columnas["precio"], minimos['prec'], maximos['prec'])
+        Cn = cls._normalizar_columna(columnas["consumo"], minimos['cons'], maximos['cons'])
+        Tn = cls._normalizar_columna(columnas["temperatura"], minimos['temp'], maximos['temp'])
+        return np.column_stack((Rn, 1 - Pn, 1 - Cn, 1 - Tn))
+
+    @classmethod
+    def calcular_scores_matriz(cls, columnas, matriz_pesos, maximos, minimos):
+        """
+        IEG de n modelos para m vectores de pesos en un solo producto matricial.
+        matriz_pesos: m x 4 en el orden (rendimiento, precio, consumo, temperatura).
+        Retorna una matriz n x m (columna j = scores con el vector j).
+        """
+        with fase("normalizacion"):
+            normalizada = cls.matriz_normalizada(columnas, maximos, minimos)
+        with fase("scoring"):
+            scores = normalizada @ np.asarray(matriz_pesos, dtype=np.float64).T
+        IEG_CANDIDATOS.inc(len(normalizada))
+        return scores
+
+    @staticmethod
+    @fase("top_k")
+    def seleccionar_top_k(scores, k, despues_de=None):
+        """
+        Índices de los k mejores scores en orden (score desc, índice asc), en
+        O(n + k log k) con selección parcial en lugar de ordenar todo.
+        despues_de=(score, indice) continúa el ranking tras esa posición (cursor).
+        """
+        indices = np.arange(len(scores))
+        if despues_de is not None:
+            s, i = despues_de
+            indices = indices[(scores < s) | ((scores == s) & (indices > i))]
+        sub = scores[indices]
+
+        if 0 < k < len(indices):
+            # k-ésimo mayor; los empates en el umbral se resuelven por índice
+            umbral = np.partition(sub, len(sub) - k)[len(sub) - k]
+            mayores = indices[sub > umbral]
+            iguales = indices[sub == umbral][:k - len(mayores)]
+            indices = np.concatenate([mayores, iguales])
+        elif k <= 0:
+            indices = indices[:0]
+
+        sub = scores[indices]
+        return indices[np.lexsort((indices, -sub))]
+
+    @classmethod
+    @fase("narrativa")
     def generar_narrativa_avanzada(cls, perfil_nombre, top3, pesos):
         """Usa Factory + Strategy para crear el texto"""
         if not top3: return "No hay datos suficientes."
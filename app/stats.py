@@ -0,0 +1,101 @@
+import heapq
+from .services import CoreService, CAMPOS_IEG
+
+
+class _LimitesAtributo:
+    """
+    Multiconjunto de valores de un atributo con min/max en O(1) amortizado.
+    Dos heaps con borrado perezoso: quitar el extremo actual no obliga a
+    recorrer de nuevo el catálogo, la cima obsoleta se descarta al leerla.
+    """
+    __slots__ = ("conteos", "_min_heap", "_max_heap")
+
+    def __init__(self):
+        self.conteos = {}
+        self._min_heap = []
+        self._max_heap = []
+
+    def agregar(self, valor):
+        n = self.conteos.get(valor, 0)
+        self.conteos[valor] = n + 1
+        if n == 0:
+            heapq.heappush(self._min_heap, valor)
+            heapq.heappush(self._max_heap, -valor)
+
+    def quitar(self, valor):
+        n = self.conteos.get(valor, 0)
+        if n <= 1:
+            self.conteos.pop(valor, None)
+        else:
+            self.conteos[valor] = n - 1
+        # Evita que los heaps crezcan sin límite con muchas altas/bajas
+        if len(self._min_heap) > 2 * len(self.conteos) + 32:
+            self._min_heap = list(self.conteos)
+            heapq.heapify(self._min_heap)
+            self._max_heap = [-v for v in self.conteos]
+            heapq.heapify(self._max_heap)
+
+    def minimo(self):
+        while self._min_heap[0] not in self.conteos:
+            heapq.heappop(self._min_heap)
+        return self._min_heap[0]
+
+    def maximo(self):
+        while -self._max_heap[0] not in self.conteos:
+            heapq.heappop(self._max_heap)
+        return -self._max_heap[0]
+
+
+class NormalizationStats:
+    """
+    Límites de normalización (min/max por atributo del IEG) mantenidos de forma
+    incremental por ámbito: global, por marca, por perfil, por tipo de equipo
+    y por tipo + perfil (el reporte analítico solo usa PCs de un perfil).
+    """
+
+    def __init__(self):
+        self._ambitos = {}
+
+    @staticmethod
+    def ambitos_de(modelo):
+        tipo = modelo.get("tipo_equipo")
+        perfil = str(modelo.get("perfil_uso_id"))
+        return (
+            ("global",),
+            ("marca", str(modelo.get("marca_id"))),
+            ("perfil", perfil),
+            ("tipo", tipo),
+            ("tipo_perfil", tipo, perfil),
+        )
+
+    def agregar(self, modelo):
+        valores = [(campo, CoreService._safe_float(modelo.get(campo))) for _, campo in CAMPOS_IEG]
+        for ambito in self.ambitos_de(modelo):
+            atributos = self._ambitos.get(ambito)
+            if atributos is None:
+                atributos = self._ambitos[ambito] = {campo: _LimitesAtributo() for _, campo in CAMPOS_IEG}
+            for campo, v in valores:
+                atributos[campo].agregar(v)
+
+    def quitar(self, modelo):
+        valores = [(campo, CoreService._safe_float(modelo.get(campo))) for _, campo in CAMPOS_IEG]
+        for ambito in self.ambitos_de(modelo):
+            atributos = self._ambitos.get(ambito)
+            if atributos is None: continue
+            for campo, v in valores:
+                atributos[campo].quitar(v)
+            if not atributos[CAMPOS_IEG[0][1]].conteos:
+                del self._ambitos[ambito]
+
+    def reconstruir(self, modelos):
+        self._ambitos = {}
+        for m in modelos:
+            self.agregar(m)
+
+    def limites(self, *ambito):
+        """Devuelve (maximos, minimos) del ámbito, o None si no tiene modelos."""
+        atributos = self._ambitos.get(ambito)
+        if atributos is None: return None
+        maximos = {k: atributos[campo].maximo() for k, campo in CAMPOS_IEG}
+        minimos = {k: atributos[campo].minimo() for k, campo in CAMPOS_IEG}
+        return maximos, minimos
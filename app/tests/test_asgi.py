@@ -0,0 +1,62 @@
+import asyncio
+import json
+from app import create_app, models
+from app.asgi import AplicacionAsync
+from app.cache import catalog_cache, resultados_cache
+from app.materializacion import recomendaciones_materializadas
+from app.repositorios import RepositorioMemoria
+
+
+def _llamar(aplicacion, metodo, ruta, cuerpo=None):
+    datos = json.dumps(cuerpo).encode() if cuerpo is not None else b""
+    enviados = []
+
+    async def receive():
+        return {"type": "http.request", "body": datos, "more_body": False}
+
+    async def send(mensaje):
+        enviados.append(mensaje)
+
+    scope = {"type": "http", "method": metodo, "path": ruta, "query_string": b"", "headers": []}
+    asyncio.run(aplicacion(scope, receive, send))
+    return enviados[0]["status"], json.loads(enviados[1]["body"] or b"null")
+
+
+def test_api_async_responde_igual_que_flask(monkeypatch):
+    monkeypatch.setattr(models, "_repositorio", models._repositorio)
+    for variable, valor in (("STORAGE_BACKEND", "memoria"), ("ASEGURAR_INDICES", "0"), ("SECRET_KEY", "x")):
+        monkeypatch.setenv(variable, valor)
+    app = create_app()
+    repositorio = models.repositorio()
+    assert isinstance(repositorio, RepositorioMemoria)
+    # Los cachés del proceso pueden traer el catálogo de otro test con la misma versión
+    monkeypatch.setattr(catalog_cache, "_catalogo", None)
+    monkeypatch.setattr(catalog_cache, "_version", None)
+    resultados_cache.invalidar()
+    repositorio.eliminar_donde(recomendaciones_materializadas.COLECCION, {})
+    marca = models.create_marca({"nombre": "Acme"})
+    perfil = str(models.create_perfil({"nombre": "Gamer", "peso_rendimiento": 0.5, "peso_precio": 0.3,
+                                       "peso_consumo": 0.1, "peso_temperatura": 0.1}))
+    repositorio.cargar("modelos_computadora", [
+        {"nombre": f"PC {i}", "codigo_modelo": f"PC{i}", "marca_id": str(marca), "perfil_uso_id": perfil,
+         "rendimiento": 10 * i, "precio": 300 + 40 * i, "consumo": 100 + i, "temperatura": 60 + i}
+        for i in range(1, 7)
+    ])
+    models.bump_catalog_version()
+
+    aplicacion = AplicacionAsync(app)
+    cliente = app.test_client()
+    for metodo, ruta, cuerpo in (
+        ("GET", "/api/get_perfiles", None),
+        ("GET", "/api/get_marcas", None),
+        ("POST", "/api/comparar_resultados", {"perfil_id": perfil}),
+        ("POST", "/api/comparar_resultados", {"perfil_id": perfil, "marca_id": str(marca), "k": 2}),
+        ("POST", "/api/comparar_resultados", {"perfil_id": "no-existe"}),
+        ("POST", "/api/comparar_resultados", {"perfil_id": perfil, "marca_id": ["x"]}),
+        ("GET", f"/api/reporte/perfil/{perfil}", None),
+    ):
+        esperado = cliente.open(ruta, method=metodo, json=cuerpo)
+        assert _llamar(aplicacion, metodo, ruta, cuerpo) == (esperado.status_code, esperado.get_json())
+
+    assert _llamar(aplicacion, "GET", "/api/comparar_resultados")[0] == 405
+    assert _llamar(aplicacion, "GET", "/api/otra")[0] == 404
@@ -0,0 +1,28 @@
+from app.busqueda import IndiceTrigramas
+
+
+def _indice():
+    indice = IndiceTrigramas()
+    indice.reconstruir([
+        {"_id": 1, "nombre": "Lenovo ThinkPad X1", "codigo_modelo": "TP-X1"},
+        {"_id": 2, "nombre": "Lenovo Legion 5", "codigo_modelo": "LG-5"},
+        {"_id": 3, "nombre": "ASUS ROG Strix", "codigo_modelo": "ROG-S"},
+    ])
+    return indice
+
+
+def test_busqueda_tolera_errores_de_tipeo():
+    resultados = _indice().buscar("lenvo legion")
+    assert resultados[0][0]["_id"] == 2
+
+
+def test_busqueda_por_codigo_y_mantenimiento():
+    indice = _indice()
+    assert indice.buscar("rog-s")[0][0]["_id"] == 3
+
+    indice.quitar({"_id": 3})
+    assert all(m["_id"] != 3 for m, _ in indice.buscar("rog strix"))
+
+    indice.agregar({"_id": 1, "nombre": "Dell XPS 13", "codigo_modelo": "XPS13"})
+    assert [m["_id"] for m, _ in indice.buscar("xps")] == [1]
+    assert all(m["_id"] != 1 for m, _ in indice.buscar("thinkpad"))
@@ -0,0 +1,39 @@
+from app.cache import LRUCache
+
+
+def test_lru_cache_expulsa_e_invalida_por_clave():
+    cache = LRUCache(max_entradas=2)
+    cache.put(("p1", ""), "a")
+    cache.put(("p2", ""), "b")
+    assert cache.get(("p1", "")) == "a"
+    cache.put(("p3", ""), "c")  # expulsa p2, el menos usado recientemente
+
+    assert cache.get(("p2", "")) is None
+    cache.invalidar(lambda clave: clave[0] == "p1")
+    assert cache.get(("p1", "")) is None
+    assert cache.get(("p3", "")) == "c"
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["claves_mas_usadas"][0]["hits"] == 1
+
+
+def test_cambio_ya_leido_por_una_recarga_no_se_aplica_dos_veces():
+    from app.cache import CatalogCache
+    cache = CatalogCache()
+    modelo = {"_id": "m1", "nombre": "A", "codigo_modelo": "A1", "marca_id": "b", "perfil_uso_id": "p",
+              "rendimiento": 10, "precio": 500, "consumo": 60, "temperatura": 50}
+    # La recarga leyó la versión 3 y ya el documento insertado
+    cache._instalar(3, [dict(modelo)], [], 0.0)
+    cache.aplicar_cambio(4, "modelos_computadora", None, dict(modelo))
+    assert len(cache._catalogo) == 1 and cache.version == 3
+
+    # Una modificación ya leída tampoco: la fila no tiene los valores de antes
+    cache.aplicar_cambio(4, "modelos_computadora", dict(modelo, precio=400), dict(modelo))
+    assert cache.incrementales == 0
+    cache.aplicar_cambio(4, "modelos_computadora", dict(modelo), dict(modelo, precio=400))
+    assert cache.incrementales == 1 and cache._catalogo.valor(0, "precio") == 400
+
+    # Una recarga lenta de la versión 3 no pisa la 4 aplicada mientras tanto
+    cache._instalar(3, [dict(modelo)], [], 0.0, previa=3)
+    assert cache.version == 4 and cache._catalogo.valor(0, "precio") == 400
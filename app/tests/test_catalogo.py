@@ -0,0 +1,50 @@
+import random
+import numpy as np
+from app.catalogo import CatalogoCompacto, CAMPOS_NUMERICOS
+
+
+def _doc(rnd, i):
+    return {"_id": i, "nombre": f"Modelo {i}", "codigo_modelo": f"M{i}",
+            "marca_id": rnd.choice(["a", "b", "c"]), "perfil_uso_id": rnd.choice(["p1", "p2"]),
+            "rendimiento": rnd.randint(10, 100), "precio": rnd.uniform(300, 3000),
+            "consumo": rnd.choice([rnd.randint(30, 200), None]), "temperatura": rnd.randint(40, 95)}
+
+
+def _filas_como_dicts(catalogo):
+    return [dict(v) for v in catalogo.vistas()]
+
+
+def test_cambios_incrementales_equivalen_a_reconstruir():
+    rnd = random.Random(3)
+    pcs = [_doc(rnd, i) for i in range(20)]
+    laptops = [_doc(rnd, 100 + i) for i in range(10)]
+    catalogo = CatalogoCompacto.desde_documentos(pcs, laptops)
+
+    assert catalogo.vista(0)["precio"] == pcs[0]["precio"]
+    assert catalogo.vista(0)["tipo_equipo"] == "PC Escritorio"
+    esperadas = [i for i, m in enumerate(pcs) if m["marca_id"] == "b" and m["perfil_uso_id"] == "p1"]
+    assert list(catalogo.filas(marca_id="b", perfil_id="p1", tipo="PC Escritorio")) == esperadas
+    assert len(catalogo.filas(marca_id="zzz")) == 0
+
+    for _ in range(30):
+        accion = rnd.choice(["alta", "baja", "cambio"])
+        if accion == "alta":
+            nuevo = _doc(rnd, rnd.randint(1000, 10**6))
+            pcs.append(nuevo)
+            catalogo = catalogo.con_cambio("PC Escritorio", None, nuevo)
+        elif accion == "baja" and pcs:
+            antes = pcs.pop(rnd.randrange(len(pcs)))
+            catalogo = catalogo.con_cambio("PC Escritorio", antes, None)
+        elif pcs:
+            i = rnd.randrange(len(pcs))
+            antes, pcs[i] = pcs[i], dict(pcs[i], precio="n/d", marca_id="d")
+            catalogo = catalogo.con_cambio("PC Escritorio", antes, pcs[i])
+
+    reconstruido = CatalogoCompacto.desde_documentos(pcs, laptops)
+    assert catalogo.n_pcs == reconstruido.n_pcs
+    assert _filas_como_dicts(catalogo) == _filas_como_dicts(reconstruido)
+    filas = catalogo.filas(marca_id="d")
+    assert np.array_equal(catalogo.columnas(filas)["precio"], np.zeros(len(filas)))
+    for c in CAMPOS_NUMERICOS:
+        assert np.array_equal(catalogo.columnas(np.arange(len(catalogo)))[c],
+                              reconstruido.columnas(np.arange(len(reconstruido)))[c])
@@ -34,3 +34,42 @@ def test_calcular_score_retorna_float():
     # Validaciones
     assert isinstance(score, float)
     assert score >= 0
+
+
+def test_calcular_scores_batch_coincide_con_calcular_score():
+    modelos = [
+        {"rendimiento": 80, "precio": 1000, "consumo": 60, "temperatura": 70},
+        {"rendimiento": "95", "precio": 1500, "consumo": 90, "temperatura": 85},
+        {"rendimiento": 55, "precio": 800, "consumo": None, "temperatura": 50},
+        {"rendimiento": 70, "precio": "n/a", "consumo": 40, "temperatura": 60},
+    ]
+    pesos = {
+        "peso_rendimiento": 0.4,
+        "peso_precio": 0.3,
+        "peso_consumo": 0.2,
+        "peso_temperatura": 0.1
+    }
+
+    columnas = CoreService.columnas_desde_modelos(modelos)
+    maximos, minimos = CoreService.calcular_limites(columnas)
+    scores, orden = CoreService.calcular_scores_batch(columnas, pesos, maximos, minimos)
+
+    esperados = [CoreService.calcular_score(m, pesos, maximos, minimos) for m in modelos]
+    assert [float(s) for s in scores] == esperados
+    assert list(orden) == sorted(range(len(modelos)), key=lambda i: esperados[i], reverse=True)
+
+
+def test_seleccionar_top_k_pagina_todo_el_ranking():
+    import numpy as np
+    scores = np.array([0.5, 0.9, 0.5, 0.1, 0.9, 0.5, 0.7])
+    esperado = list(np.argsort(-scores, kind="stable"))
+
+    assert list(CoreService.seleccionar_top_k(scores, 3)) == esperado[:3]
+
+    paginas, cursor = [], None
+    while True:
+        pagina = CoreService.seleccionar_top_k(scores, 2, despues_de=cursor)
+        if len(pagina) == 0: break
+        paginas.extend(pagina)
+        cursor = (scores[pagina[-1]], pagina[-1])
+    assert paginas == esperado
@@ -0,0 +1,46 @@
+import threading
+import pytest
+from werkzeug.security import generate_password_hash
+from app import models
+from app.credenciales import ServicioCredenciales, CredencialesSaturadas
+from app.repositorios import RepositorioMemoria
+
+METODO = "pbkdf2:sha256:2000"
+
+
+def test_login_rehashea_costo_anterior(monkeypatch):
+    monkeypatch.setattr(models, "_repositorio", RepositorioMemoria())
+    servicio = ServicioCredenciales(METODO, hilos=2, cola=4, timeout=5)
+    viejo = generate_password_hash("clave", "pbkdf2:sha256:1000")
+    models.create_user({"email": "a@b.c", "password": viejo})
+    usuario = models.get_user_by_email("a@b.c")
+
+    assert not servicio.verificar_usuario(usuario, "otra")
+    assert not servicio.verificar_usuario(None, "clave")
+    assert servicio.verificar_usuario(usuario, "clave")
+    servicio.esperar()
+
+    nuevo = models.get_user_by_email("a@b.c")["password"]
+    assert nuevo.startswith(METODO + "$") and servicio.rehashes == 1
+    assert servicio.verificar_usuario(models.get_user_by_email("a@b.c"), "clave")
+    servicio.esperar()
+    assert servicio.rehashes == 1
+
+
+def test_cola_llena_y_timeout_rechazan():
+    servicio = ServicioCredenciales(METODO, hilos=1, cola=0, timeout=0.05)
+    liberar = threading.Event()
+    bloqueado = servicio._enviar("prueba", liberar.wait)
+    with pytest.raises(CredencialesSaturadas):
+        servicio.hashear("clave")
+    liberar.set()
+    bloqueado.result()
+
+    servicio = ServicioCredenciales(METODO, hilos=1, cola=1, timeout=0.05)
+    liberar.clear()
+    servicio._enviar("prueba", liberar.wait)
+    with pytest.raises(CredencialesSaturadas):
+        servicio.hashear("clave")
+    liberar.set()
+    servicio.esperar()
+    assert servicio.hashear("clave").startswith(METODO)
@@ -0,0 +1,48 @@
+import numpy as np
+from app import dominancia
+from app.dominancia import IndiceDominancia, banda_dominancia, _atributos
+from app.services import CoreService
+
+
+def _columnas(rng, n):
+    # Valores gruesos para que haya modelos repetidos y empates
+    return {"rendimiento": rng.integers(10, 40, n).astype(float), "precio": rng.integers(3, 30, n) * 100.0,
+            "consumo": rng.integers(3, 20, n) * 10.0, "temperatura": rng.integers(40, 60, n).astype(float)}
+
+
+def test_banda_coincide_con_contar_dominadores(monkeypatch):
+    monkeypatch.setattr(dominancia, "MUESTRA", 64)
+    monkeypatch.setattr(dominancia, "BLOQUE", 32)
+    x = _atributos(_columnas(np.random.default_rng(1), 600))
+    mayor_igual = (x[None, :, :] >= x[:, None, :]).all(axis=2)
+    dominadores = (mayor_igual & (x[None, :, :] > x[:, None, :]).any(axis=2)).sum(axis=1)
+
+    indices, cuenta = banda_dominancia(x, 4)
+    assert list(indices) == list(np.flatnonzero(dominadores < 4))
+    assert (cuenta <= dominadores[indices]).all()
+
+
+def test_top_k_igual_al_recorrido_completo(monkeypatch):
+    monkeypatch.setattr(dominancia, "MIN_MODELOS", 100)
+    monkeypatch.setattr(dominancia, "MUESTRA", 256)
+    rng = np.random.default_rng(5)
+    columnas = _columnas(rng, 5000)
+    maximos, minimos = CoreService.calcular_limites(columnas)
+    indice = IndiceDominancia(columnas)
+
+    servidos = 0
+    for j in range(60):
+        pesos = dict(zip(dominancia.CAMPOS_PESOS, rng.dirichlet(np.ones(4)).round(2)))
+        k = j % dominancia.K_MAXIMO + 1
+        resultado = indice.top_k(pesos, maximos, minimos, k)
+        scores, _ = CoreService.calcular_scores_batch(columnas, pesos, maximos, minimos, ordenar=False)
+        esperado = CoreService.seleccionar_top_k(scores, k)
+        if resultado is None: continue
+        servidos += 1
+        assert list(resultado[0]) == list(esperado)
+        assert list(resultado[1]) == list(scores[esperado])
+
+    assert servidos > 30
+    assert len(indice.indices) < len(columnas["precio"]) // 5
+    assert indice.top_k({"peso_precio": -1.0}, maximos, minimos, 3) is None
+    assert indice.top_k(pesos, maximos, minimos, dominancia.K_MAXIMO + 1) is None
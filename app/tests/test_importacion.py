@@ -0,0 +1,39 @@
+import io
+from app import models
+from app.importacion import importar, leer_filas
+from app.repositorios import RepositorioMemoria
+
+CSV = """nombre,codigo_modelo,marca_id,perfil_uso_id,precio,rendimiento,consumo,temperatura
+Torre A,A1,{marca},{perfil},800,70,300,65
+Torre B,B2,Acme,gamer,12000,70,300,65
+Torre C,C3,Otra,{perfil},900,80,-5,60
+Torre D,A1,{marca},{perfil},850,72,310,66
+Torre E,E5,acme,Gamer,950,90,350,70
+Torre F,F6,{marca},{perfil},990,inf,350,70
+"""
+
+
+def test_importa_csv_con_reporte_por_fila(monkeypatch):
+    repositorio = RepositorioMemoria()
+    monkeypatch.setattr(models, "_repositorio", repositorio)
+    monkeypatch.setattr(models, "_observadores_catalogo", [])
+    marca = str(models.create_marca({"nombre": "Acme"}))
+    perfil = str(models.create_perfil({"nombre": "Gamer"}))
+    version = models.get_catalog_version()
+
+    archivo = io.BytesIO(CSV.format(marca=marca, perfil=perfil).encode())
+    reporte = importar(leer_filas(archivo, "csv"), "modelos_laptops", tamano_lote=2)
+    assert (reporte["insertados"], reporte["actualizados"], reporte["rechazados"]) == (2, 0, 4)
+    assert {e["linea"]: sorted(e["errores"]) for e in reporte["errores"]} == {
+        3: ["precio"], 4: ["consumo", "marca_id"], 5: ["codigo_modelo"], 7: ["rendimiento"]}
+    assert models.get_catalog_version() == version + 1
+    assert repositorio.obtener("modelos_laptops", {"codigo_modelo": "E5"})["marca_id"] == marca
+
+    jsonl = io.BytesIO(b'{"nombre": "Torre A2", "codigo_modelo": "A1", "marca_id": "Acme", '
+                       b'"perfil_uso_id": "Gamer", "precio": 700, "rendimiento": 75, "consumo": 280, '
+                       b'"temperatura": 60}\n\nno es json\n')
+    reporte = importar(leer_filas(jsonl, "jsonl"), "modelos_laptops")
+    assert (reporte["insertados"], reporte["actualizados"], reporte["rechazados"]) == (0, 1, 1)
+    assert reporte["errores"][0]["linea"] == 3
+    assert repositorio.contar("modelos_laptops") == 2
+    assert repositorio.obtener("modelos_laptops", {"codigo_modelo": "A1"})["precio"] == 700
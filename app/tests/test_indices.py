@@ -0,0 +1,31 @@
+import pytest
+from pymongo.errors import DuplicateKeyError
+from app import models
+from app.indices import GestorIndices, INDICES
+from app.repositorios import RepositorioMemoria
+
+
+def test_indices_unicos_y_reporte(monkeypatch):
+    repositorio = RepositorioMemoria()
+    monkeypatch.setattr(models, "_repositorio", repositorio)
+    monkeypatch.setattr(models, "_observadores_catalogo", [])
+    gestor = GestorIndices()
+    # Sin el índice único, las altas comprueban antes el duplicado
+    assert not GestorIndices().unico_garantizado("usuarios", "email")
+    assert gestor.asegurar() == {}
+    assert gestor.unico_garantizado("usuarios", "email")
+    assert GestorIndices().unico_garantizado("modelos_computadora", "codigo_modelo")
+
+    models.create_user({"email": "a@b.c"})
+    with pytest.raises(DuplicateKeyError):
+        models.create_user({"email": "a@b.c"})
+
+    models.create_modelo({"codigo_modelo": "A1"})
+    id = str(models.create_modelo({"codigo_modelo": "B2"}))
+    with pytest.raises(DuplicateKeyError):
+        models.update_modelo(id, {"codigo_modelo": "A1"})
+    assert models.get_modelo_by_id(id)["codigo_modelo"] == "B2"
+
+    reporte = gestor.reportar()
+    assert reporte["faltantes"] == []
+    assert len(reporte["indices"]) == len(INDICES)
@@ -0,0 +1,49 @@
+from app.pipelines import pipeline_ranking
+from app.services import CoreService
+
+
+def _evaluar(expr, doc, variables=None):
+    """Evaluador mínimo de las expresiones de agregación que usa pipeline_ranking."""
+    if isinstance(expr, (int, float)):
+        return expr
+    if isinstance(expr, str):
+        return variables[expr[2:]]
+    op, args = next(iter(expr.items()))
+    if op == "$let":
+        variables = {n: _evaluar(e, doc, variables) for n, e in args["vars"].items()}
+        return _evaluar(args["in"], doc, variables)
+    if op == "$cond":
+        return _evaluar(args[1] if _evaluar(args[0], doc, variables) else args[2], doc, variables)
+    if op == "$convert":
+        valor = doc.get(args["input"][1:])
+        if valor is None: return args["onNull"]
+        try: return float(valor)
+        except (TypeError, ValueError): return args["onError"]
+    valores = [_evaluar(a, doc, variables) for a in args]
+    if op == "$and": return all(valores)
+    if op == "$gt": return valores[0] > valores[1]
+    if op == "$lt": return valores[0] < valores[1]
+    if op == "$add": return sum(valores)
+    if op == "$multiply": return valores[0] * valores[1]
+    if op == "$subtract": return valores[0] - valores[1]
+    if op == "$divide": return valores[0] / valores[1]
+    raise AssertionError(op)
+
+
+def test_pipeline_ranking_reproduce_calcular_score():
+    modelos = [
+        {"rendimiento": 80, "precio": 1000, "consumo": 60, "temperatura": 70},
+        {"rendimiento": "95", "precio": 1500, "consumo": 90, "temperatura": 70},
+        {"rendimiento": 55, "precio": 800, "consumo": None, "temperatura": 70},
+        {"rendimiento": float("nan"), "precio": "inf", "consumo": float("-inf"), "temperatura": 70},
+    ]
+    pesos = {"peso_rendimiento": 0.4, "peso_precio": 0.3, "peso_consumo": 0.2, "peso_temperatura": 0.1}
+    maximos, minimos = CoreService.calcular_limites(CoreService.columnas_desde_modelos(modelos))
+
+    pipeline = pipeline_ranking(pesos, maximos, minimos, {}, limite=4)
+    proyeccion = next(e["$project"] for e in pipeline if "$project" in e)
+
+    for m in modelos:
+        esperado = CoreService.calcular_score(m, pesos, maximos, minimos)
+        assert abs(_evaluar(proyeccion["score"], m) - esperado) < 1e-12
+    assert pipeline[-1] == {"$limit": 4}
@@ -0,0 +1,44 @@
+from bson.objectid import ObjectId
+from app.repositorios import RepositorioMemoria
+from app.pipelines import filtro_por_id
+from app.services import CoreService
+
+
+def _repositorio():
+    repositorio = RepositorioMemoria()
+    marca = ObjectId()
+    repositorio.cargar("modelos_computadora", [
+        {"nombre": f"PC {i}", "codigo_modelo": f"PC{i}", "marca_id": str(marca) if i % 2 else "otra",
+         "perfil_uso_id": "p1", "rendimiento": 10 * i, "precio": 300 + 50 * i, "consumo": 100, "temperatura": 60 + i}
+        for i in range(8)
+    ])
+    repositorio.cargar("modelos_laptops", [
+        {"nombre": "Laptop", "marca_id": marca, "rendimiento": 55, "precio": "s/n", "consumo": 40, "temperatura": 70},
+    ])
+    return repositorio, marca
+
+
+def test_crud_con_indices_y_proyeccion():
+    repositorio, marca = _repositorio()
+    assert len(repositorio.listar("modelos_computadora", filtro_por_id("marca_id", str(marca)))) == 4
+    assert repositorio.obtener("modelos_computadora", {"codigo_modelo": "PC3"}, {"nombre": 1}).keys() == {"_id", "nombre"}
+
+    id = repositorio.insertar("perfiles_uso", {"nombre": "Gamer"})
+    antes = repositorio.actualizar("perfiles_uso", str(id), {"nombre": "Oficina"})
+    assert antes["nombre"] == "Gamer"
+    assert repositorio.obtener("perfiles_uso", {"_id": id})["nombre"] == "Oficina"
+    assert repositorio.eliminar("perfiles_uso", str(id))["_id"] == id
+    assert repositorio.contar("perfiles_uso") == 0
+
+
+def test_ranking_en_memoria_coincide_con_core_service():
+    repositorio, marca = _repositorio()
+    filtro = filtro_por_id("marca_id", str(marca))
+    pesos = {"peso_rendimiento": 0.5, "peso_precio": 0.3, "peso_consumo": 0.1, "peso_temperatura": 0.1}
+    maximos, minimos = repositorio.limites_ieg(filtro)
+
+    ranking = list(repositorio.ranking_ieg(pesos, maximos, minimos, filtro, limite=3))
+    modelos = repositorio.listar("modelos_computadora", filtro) + repositorio.listar("modelos_laptops", filtro)
+    esperado = sorted(modelos, key=lambda m: -CoreService.calcular_score(m, pesos, maximos, minimos))[:3]
+    assert [m["nombre"] for m in ranking] == [m["nombre"] for m in esperado]
+    assert ranking[0]["score"] == CoreService.calcular_score(esperado[0], pesos, maximos, minimos)
@@ -0,0 +1,48 @@
+import gzip
+import json
+from datetime import datetime
+import numpy as np
+from bson.objectid import ObjectId
+from flask import Flask, jsonify
+from app.respuestas import ProveedorJSON, Compresion
+
+
+def _app():
+    app = Flask(__name__)
+    app.json = ProveedorJSON(app)
+    Compresion().init_app(app, minimo=512)
+    id = ObjectId("65a000000000000000000001")
+    fecha = datetime(2024, 5, 1, 12, 30)
+
+    @app.route("/grande")
+    def grande():
+        return jsonify({"items": [{"_id": id, "fecha": fecha, "score": np.float64(0.5), "n": i} for i in range(50)]})
+
+    @app.route("/chico")
+    def chico():
+        return jsonify({"_id": id, "fecha": fecha, "puntos": np.arange(3)})
+
+    return app
+
+
+def test_objectid_datetime_y_numpy_nativos():
+    cliente = _app().test_client()
+    respuesta = cliente.get("/chico", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in respuesta.headers
+    assert respuesta.get_json() == {"_id": "65a000000000000000000001", "fecha": "2024-05-01T12:30:00",
+                                    "puntos": [0, 1, 2]}
+
+
+def test_compresion_negociada():
+    cliente = _app().test_client()
+    identidad = cliente.get("/grande")
+    assert "Content-Encoding" not in identidad.headers
+    assert "Accept-Encoding" in identidad.headers["Vary"]
+
+    comprimida = cliente.get("/grande", headers={"Accept-Encoding": "br;q=0.1, gzip"})
+    assert comprimida.headers["Content-Encoding"] == "gzip"
+    assert int(comprimida.headers["Content-Length"]) < len(identidad.get_data()) // 4
+    assert json.loads(gzip.decompress(comprimida.get_data())) == identidad.get_json()
+
+    rechazada = cliente.get("/grande", headers={"Accept-Encoding": "gzip;q=0"})
+    assert "Content-Encoding" not in rechazada.headers
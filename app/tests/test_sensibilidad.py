@@ -0,0 +1,26 @@
+import random
+from app.services import CoreService
+from app.sensibilidad import ORDEN_PESOS, analizar_barrido, pesos_rejilla, tamano_rejilla
+
+
+def test_barrido_coincide_con_calcular_score():
+    rnd = random.Random(7)
+    modelos = [{"rendimiento": rnd.randint(10, 100), "precio": rnd.uniform(300, 3000),
+                "consumo": rnd.randint(30, 200), "temperatura": rnd.randint(40, 95)} for _ in range(12)]
+    columnas = CoreService.columnas_desde_modelos(modelos)
+    maximos, minimos = CoreService.calcular_limites(columnas)
+
+    matriz = pesos_rejilla(0.25)
+    assert len(matriz) == tamano_rejilla(0.25) == 35
+    assert abs(matriz.sum(axis=1) - 1).max() < 1e-12
+
+    scores = CoreService.calcular_scores_matriz(columnas, matriz, maximos, minimos)
+    for j, v in enumerate(matriz):
+        pesos = dict(zip(ORDEN_PESOS, v))
+        for i, m in enumerate(modelos):
+            assert abs(scores[i, j] - CoreService.calcular_score(m, pesos, maximos, minimos)) < 1e-12
+
+    barrido = analizar_barrido(columnas, matriz, maximos, minimos, dict(zip(ORDEN_PESOS, (4, 3, 2, 1))))
+    assert sum(f["victorias"] for f in barrido["modelos"]) == len(matriz)
+    assert sum(r["vectores"] for r in barrido["regiones"]) == len(matriz)
+    assert -1 <= barrido["estabilidad"]["spearman_minimo"] <= barrido["estabilidad"]["spearman_medio"] <= 1
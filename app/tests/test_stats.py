@@ -0,0 +1,49 @@
+import random
+from app.services import CoreService
+from app.stats import NormalizationStats
+
+
+def _limites_por_recorrido(modelos):
+    columnas = CoreService.columnas_desde_modelos(modelos)
+    return CoreService.calcular_limites(columnas)
+
+
+def test_limites_incrementales_coinciden_con_recorrido_completo():
+    rnd = random.Random(7)
+    modelos = [
+        {
+            "_id": i,
+            "marca_id": rnd.choice(["a", "b"]),
+            "perfil_uso_id": "p1",
+            "tipo_equipo": rnd.choice(["PC Escritorio", "Laptop"]),
+            "rendimiento": rnd.randint(10, 100),
+            "precio": rnd.randint(300, 3000),
+            "consumo": rnd.randint(30, 200),
+            "temperatura": rnd.randint(40, 95),
+        }
+        for i in range(200)
+    ]
+    stats = NormalizationStats()
+    stats.reconstruir(modelos)
+
+    # Borra primero los extremos para forzar el borrado perezoso
+    vivos = sorted(modelos, key=lambda m: -m["rendimiento"])
+    while len(vivos) > 1:
+        stats.quitar(vivos.pop(0))
+        for marca in ("a", "b"):
+            subconjunto = [m for m in vivos if m["marca_id"] == marca]
+            esperado = _limites_por_recorrido(subconjunto) if subconjunto else None
+            assert stats.limites("marca", marca) == esperado
+        assert stats.limites("global") == _limites_por_recorrido(vivos)
+
+
+def test_valores_no_finitos_cuentan_como_cero():
+    stats = NormalizationStats()
+    modelo = {"_id": 1, "marca_id": "a", "perfil_uso_id": "p1", "tipo_equipo": "Laptop",
+              "rendimiento": "nan", "precio": float("inf"), "consumo": 50, "temperatura": 60}
+    stats.agregar(modelo)
+    stats.agregar(dict(modelo, _id=2, rendimiento=40, precio=900))
+    maximos, minimos = stats.limites("global")
+    assert (maximos["rend"], minimos["rend"], maximos["prec"], minimos["prec"]) == (40.0, 0.0, 900.0, 0.0)
+    stats.quitar(modelo)
+    assert stats.limites("global")[1]["rend"] == 40.0
@@ -0,0 +1,79 @@
+"""
+Reglas de validación de un modelo (PC o laptop), compartidas por los
+formularios del admin y la importación masiva (importacion.py).
+"""
+import math
+
+PRECIO_MAXIMO = 10000
+CAMPOS_MODELO = ("nombre", "codigo_modelo", "marca_id", "perfil_uso_id",
+                 "precio", "rendimiento", "consumo", "temperatura")
+
+
+def _texto(valor):
+    return str(valor).strip() if valor is not None else ""
+
+
+def validar_modelo(campos, marcas=None, perfiles=None):
+    """
+    Valida los campos crudos de un modelo (valores del formulario o de una fila).
+    marcas / perfiles: ids (str) existentes; si se indican, marca_id y
+    perfil_uso_id deben estar entre ellos.
+    Devuelve (data, errors): data listo para guardar si errors está vacío.
+    """
+    errors = {}
+    nombre = _texto(campos.get("nombre"))
+    codigo_modelo = _texto(campos.get("codigo_modelo"))
+    marca_id = _texto(campos.get("marca_id"))
+    perfil_uso_id = _texto(campos.get("perfil_uso_id"))
+
+    if not nombre:
+        errors["nombre"] = "El nombre del modelo es obligatorio."
+
+    if not codigo_modelo:
+        errors["codigo_modelo"] = "El código del modelo es obligatorio."
+
+    precio_val = None
+    try:
+        precio_val = float(campos.get("precio"))
+        if not 0 < precio_val <= PRECIO_MAXIMO:
+            errors["precio"] = f"El precio debe ser mayor a 0 y razonable (<= {PRECIO_MAXIMO})."
+    except (TypeError, ValueError):
+        errors["precio"] = "El precio debe ser numérico."
+
+    def validar_num_pos(nombre_campo, minimo=0):
+        try:
+            v = float(campos.get(nombre_campo))
+            if not math.isfinite(v):
+                errors[nombre_campo] = f"{nombre_campo.capitalize()} debe ser un número finito."
+            elif not v >= minimo:
+                errors[nombre_campo] = f"{nombre_campo.capitalize()} debe ser ≥ {minimo}."
+            return v
+        except (TypeError, ValueError):
+            errors[nombre_campo] = f"{nombre_campo.capitalize()} debe ser numérico."
+            return None
+
+    rendimiento_val = validar_num_pos("rendimiento")
+    consumo_val = validar_num_pos("consumo")
+    temperatura_val = validar_num_pos("temperatura")
+
+    if not marca_id:
+        errors["marca_id"] = "Debes seleccionar una marca."
+    elif marcas is not None and marca_id not in marcas:
+        errors["marca_id"] = "La marca no existe."
+
+    if not perfil_uso_id:
+        errors["perfil_uso_id"] = "Debes seleccionar un perfil de uso."
+    elif perfiles is not None and perfil_uso_id not in perfiles:
+        errors["perfil_uso_id"] = "El perfil de uso no existe."
+
+    data = {
+        "nombre": nombre,
+        "codigo_modelo": codigo_modelo,
+        "marca_id": marca_id,
+        "perfil_uso_id": perfil_uso_id,
+        "precio": precio_val,
+        "rendimiento": rendimiento_val,
+        "consumo": consumo_val,
+        "temperatura": temperatura_val,
+    }
+    return data, errors
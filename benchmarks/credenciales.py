@@ -0,0 +1,92 @@
+"""
+Costo del hashing de contraseñas y comportamiento del login bajo ráfagas.
+  - calibración: mediana de generate_password_hash para varios costos de scrypt
+    y pbkdf2; recomienda el más caro que cabe en --objetivo-ms,
+  - ráfaga: --rafaga logins concurrentes contra ServicioCredenciales con el
+    método elegido; reporta p50/p99 de los aceptados y cuántos se rechazaron.
+
+Uso:
+  python -m benchmarks.credenciales --objetivo-ms 100
+  python -m benchmarks.credenciales --metodo scrypt:32768:8:1 --hilos 2 --cola 16 --rafaga 64
+"""
+import argparse
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash
+
+from .ieg import medir
+
+CANDIDATOS = (
+    "scrypt:16384:8:1", "scrypt:32768:8:1", "scrypt:65536:8:1", "scrypt:131072:8:1",
+    "pbkdf2:sha256:600000", "pbkdf2:sha256:1000000", "pbkdf2:sha256:2000000",
+)
+
+
+def calibrar(objetivo_ms, minimo_s, candidatos=CANDIDATOS):
+    """{método: mediana en ms} y el método más costoso por familia que cumple objetivo_ms."""
+    tiempos = {}
+    for metodo in candidatos:
+        print(f"  {metodo}", file=sys.stderr)
+        tiempos[metodo] = statistics.median(medir(lambda: generate_password_hash("benchmark", metodo),
+                                                  minimo_s, max_repeticiones=20)) * 1e3
+    recomendados = {}
+    for metodo, ms in tiempos.items():
+        familia = metodo.split(":", 1)[0]
+        if ms <= objetivo_ms: recomendados[familia] = metodo
+    return tiempos, recomendados
+
+
+def rafaga(metodo, hilos, cola, timeout, concurrentes):
+    """Lanza `concurrentes` verificaciones a la vez. Devuelve latencias aceptadas (s) y rechazos."""
+    from app.credenciales import ServicioCredenciales, CredencialesSaturadas
+    servicio = ServicioCredenciales(metodo, hilos, cola, timeout)
+    usuario = {"_id": None, "password": generate_password_hash("clave", metodo)}
+
+    def login(_):
+        inicio = time.perf_counter()
+        try:
+            servicio.verificar(usuario["password"], "clave")
+        except CredencialesSaturadas:
+            return None
+        return time.perf_counter() - inicio
+
+    with ThreadPoolExecutor(max_workers=concurrentes) as clientes:
+        resultados = list(clientes.map(login, range(concurrentes)))
+    aceptadas = sorted(r for r in resultados if r is not None)
+    return aceptadas, len(resultados) - len(aceptadas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Costo del hashing de contraseñas")
+    parser.add_argument("--objetivo-ms", type=float, default=100, help="tiempo máximo aceptable por hash")
+    parser.add_argument("--minimo", type=float, default=0.5, help="segundos mínimos medidos por costo")
+    parser.add_argument("--metodo", help="método para la ráfaga (por defecto el recomendado de scrypt)")
+    parser.add_argument("--hilos", type=int, default=2)
+    parser.add_argument("--cola", type=int, default=16)
+    parser.add_argument("--timeout", type=float, default=3.0)
+    parser.add_argument("--rafaga", type=int, default=64, help="logins concurrentes (0 = no simular)")
+    args = parser.parse_args(argv)
+
+    tiempos, recomendados = calibrar(args.objetivo_ms, args.minimo)
+    for metodo, ms in tiempos.items():
+        marca = "  <- recomendado" if metodo in recomendados.values() else ""
+        print(f"{metodo:24} {ms:>9.1f} ms{marca}")
+
+    metodo = args.metodo or recomendados.get("scrypt") or CANDIDATOS[0]
+    if args.rafaga:
+        aceptadas, rechazadas = rafaga(metodo, args.hilos, args.cola, args.timeout, args.rafaga)
+        print(f"\nRáfaga de {args.rafaga} logins con {metodo} ({args.hilos} hilos, cola {args.cola}):")
+        if aceptadas:
+            p99 = aceptadas[min(len(aceptadas) - 1, int(len(aceptadas) * 0.99))]
+            print(f"  aceptados {len(aceptadas)}: p50 {statistics.median(aceptadas) * 1e3:.1f} ms, "
+                  f"p99 {p99 * 1e3:.1f} ms")
+        print(f"  rechazados {rechazadas} (cola llena o timeout)")
+    print(f"\nPASSWORD_HASH_METODO={metodo}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
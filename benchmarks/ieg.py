@@ -0,0 +1,271 @@
+"""
+Micro-benchmarks de los caminos calientes del IEG sobre catálogos sintéticos
+(benchmarks/sintetico.py) de 1k, 100k y 1M modelos:
+  - ieg.*: calcular_score e calcular_ieg_avanzado modelo a modelo, el scoring
+    vectorizado y la selección del top-k,
+  - limites.*: extracción de columnas, min/max y NormalizationStats,
+  - catalogo.*: construcción del CatalogoCompacto,
+  - dominancia.*: construcción del índice de dominancia y top-k con él y sin él,
+  - narrativa: generar_narrativa_avanzada,
+  - handler.*: /api/comparar_resultados y /api/reporte/perfil/<id> con el test
+    client de Flask, con el caché de resultados vacío en cada llamada.
+
+Los handlers corren por defecto con el backend de almacenamiento en memoria
+(STORAGE_BACKEND=memoria); --backend mongomock usa mongomock (pip install mongomock)
+y --backend mongod un mongod local (--mongo-uri, base bench*: se borra).
+
+Uso:
+  python -m benchmarks.ieg --salida bench.json
+  python -m benchmarks.ieg --tamanos 1000,100000 --comparar bench_anterior.json
+Con --comparar el proceso termina con código 1 si alguna mediana empeora más que --umbral.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+import numpy as np
+
+from .sintetico import marcas_y_perfiles, generar_modelos
+
+TAMANOS_POR_DEFECTO = (1_000, 100_000, 1_000_000)
+MAX_HANDLERS_POR_DEFECTO = 100_000
+TOP_K = 10
+TOP_K_INDICE = 3
+
+
+def medir(funcion, minimo_s=0.5, max_repeticiones=50):
+    """Ejecuta funcion una vez de calentamiento y luego hasta sumar minimo_s segundos."""
+    funcion()
+    tiempos = []
+    while not tiempos or (sum(tiempos) < minimo_s and len(tiempos) < max_repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+
+def _resultado(nombre, tamano, unidades, tiempos):
+    mediana = statistics.median(tiempos)
+    return {
+        "nombre": nombre,
+        "tamano": tamano,
+        "unidades": unidades,
+        "repeticiones": len(tiempos),
+        "min_s": min(tiempos),
+        "mediana_s": mediana,
+        "media_s": statistics.fmean(tiempos),
+        "desv_s": statistics.pstdev(tiempos),
+        "ns_por_unidad": round(mediana / unidades * 1e9, 2) if unidades else None,
+    }
+
+
+# APLICACIÓN
+
+def _preparar_app(backend, mongo_uri):
+    """create_app() con el backend en memoria, un mongomock compartido o el mongod de mongo_uri."""
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ["CATALOG_CACHE_TTL"] = "3600"
+    os.environ["STORAGE_BACKEND"] = "memoria" if backend == "memoria" else "mongo"
+    os.environ["MONGO_URI"] = mongo_uri or "mongodb://localhost:27017/bench_techadvisor"
+    if not urlparse(os.environ["MONGO_URI"]).path.lstrip("/").startswith("bench"):
+        sys.exit("La base de --mongo-uri debe llamarse bench*: el benchmark borra sus colecciones.")
+
+    if backend == "mongomock":
+        try:
+            import mongomock
+        except ImportError:
+            sys.exit("Instale mongomock o indique un mongod local con --mongo-uri.")
+        from app import conexiones
+        compartido = mongomock.MongoClient(os.environ["MONGO_URI"])
+        conexiones.MongoClient = lambda *args, **opciones: compartido
+
+    from app import create_app
+    return create_app()
+
+
+def _cargar_catalogo(app, marcas, perfiles, pcs, laptops):
+    from app import mongo
+    from app.models import bump_catalog_version, repositorio
+    from app.repositorios import RepositorioMemoria
+    from app.cache import catalog_cache
+    with app.app_context():
+        for coleccion, docs in (("marcas", marcas), ("perfiles_uso", perfiles),
+                                ("modelos_computadora", pcs), ("modelos_laptops", laptops)):
+            if isinstance(repositorio(), RepositorioMemoria):
+                repositorio().cargar(coleccion, docs)
+                continue
+            db = mongo.db
+            db[coleccion].delete_many({})
+            for inicio in range(0, len(docs), 10_000):
+                db[coleccion].insert_many([dict(d) for d in docs[inicio:inicio + 10_000]], ordered=False)
+        bump_catalog_version()
+        catalog_cache.invalidar()
+        catalog_cache.get_catalogo()
+
+
+def _bench_handlers(app, tamano, perfiles, minimo_s):
+    from app.cache import resultados_cache
+    cliente = app.test_client()
+    perfil_id = str(perfiles[0]["_id"])
+    resultados = []
+
+    def comparar():
+        resultados_cache.invalidar()
+        respuesta = cliente.post("/api/comparar_resultados", json={"perfil_id": perfil_id, "k": TOP_K})
+        assert respuesta.status_code == 200, respuesta.get_data(as_text=True)
+
+    def reporte():
+        respuesta = cliente.get(f"/api/reporte/perfil/{perfil_id}")
+        assert respuesta.status_code == 200, respuesta.get_data(as_text=True)
+
+    for nombre, funcion in (("handler.comparar_resultados", comparar),
+                            ("handler.reporte_analitico_perfil", reporte)):
+        resultados.append(_resultado(nombre, tamano, 1, medir(funcion, minimo_s)))
+    return resultados
+
+
+# MOTOR IEG
+
+def _bench_motor(tamano, modelos, pcs, laptops, perfiles, minimo_s):
+    from app.services import CoreService
+    from app.stats import NormalizationStats
+    from app.catalogo import CatalogoCompacto
+    from app.dominancia import IndiceDominancia
+    from app.routes import calcular_ieg_avanzado
+    from app.recomendador import pesos_de
+
+    perfil = perfiles[0]
+    pesos = pesos_de(perfil)
+    columnas = CoreService.columnas_desde_modelos(modelos)
+    maximos, minimos = CoreService.calcular_limites(columnas)
+    scores, _ = CoreService.calcular_scores_batch(columnas, pesos, maximos, minimos, ordenar=False)
+    # Las estrategias de narrativa esperan precio/rendimiento numéricos
+    completos = [i for i in CoreService.seleccionar_top_k(scores, 50)
+                 if all(isinstance(modelos[i].get(c), (int, float)) for c in columnas)]
+    top3 = [modelos[i] for i in completos[:3]]
+    indice = IndiceDominancia(columnas)
+
+    def recorrido():
+        puntajes, _ = CoreService.calcular_scores_batch(columnas, pesos, maximos, minimos, ordenar=False)
+        return CoreService.seleccionar_top_k(puntajes, TOP_K_INDICE)
+
+    for m in pcs: m["tipo_equipo"] = "PC Escritorio"
+    for m in laptops: m["tipo_equipo"] = "Laptop"
+
+    casos = (
+        ("ieg.calcular_score", tamano,
+         lambda: [CoreService.calcular_score(m, pesos, maximos, minimos) for m in modelos]),
+        ("ieg.calcular_ieg_avanzado", tamano,
+         lambda: [calcular_ieg_avanzado(m, pesos, maximos, minimos) for m in modelos]),
+        ("ieg.calcular_scores_batch", tamano,
+         lambda: CoreService.calcular_scores_batch(columnas, pesos, maximos, minimos)),
+        ("ieg.seleccionar_top_k", tamano, lambda: CoreService.seleccionar_top_k(scores, TOP_K)),
+        ("limites.columnas_desde_modelos", tamano, lambda: CoreService.columnas_desde_modelos(modelos)),
+        ("limites.calcular_limites", tamano, lambda: CoreService.calcular_limites(columnas)),
+        ("limites.normalization_stats", tamano, lambda: NormalizationStats().reconstruir(modelos)),
+        ("catalogo.desde_documentos", tamano, lambda: CatalogoCompacto.desde_documentos(pcs, laptops)),
+        ("dominancia.construir", tamano, lambda: IndiceDominancia(columnas).construir()),
+        # Con menos de dominancia.MIN_MODELOS el índice cede al recorrido completo
+        ("dominancia.top_k", tamano, lambda: indice.top_k(pesos, maximos, minimos, TOP_K_INDICE) or recorrido()),
+        ("dominancia.top_k_recorrido", tamano, recorrido),
+        ("narrativa", 1,
+         lambda: CoreService.generar_narrativa_avanzada(perfil["nombre"], top3, pesos)),
+    )
+    resultados = []
+    for nombre, unidades, funcion in casos:
+        print(f"  {nombre}", file=sys.stderr)
+        resultados.append(_resultado(nombre, tamano, unidades, medir(funcion, minimo_s)))
+    return resultados
+
+
+# SALIDA
+
+def _metadatos(args):
+    def git(*comando):
+        try:
+            return subprocess.run(("git",) + comando, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git("rev-parse", "HEAD"),
+        "cambios_sin_commit": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "backend": args.backend,
+        "semilla": args.semilla,
+    }
+
+
+def comparar(actual, anterior, umbral):
+    """Imprime la variación de cada benchmark y devuelve los que empeoraron más que umbral."""
+    previos = {(r["nombre"], r["tamano"]): r for r in anterior["resultados"]}
+    regresiones = []
+    print(f"{'benchmark':36} {'tamaño':>9} {'antes':>11} {'ahora':>11} {'cambio':>8}")
+    for r in actual["resultados"]:
+        previo = previos.get((r["nombre"], r["tamano"]))
+        if previo is None: continue
+        cambio = r["mediana_s"] / previo["mediana_s"] - 1 if previo["mediana_s"] else 0.0
+        marca = "  REGRESIÓN" if cambio > umbral else ""
+        print(f"{r['nombre']:36} {r['tamano']:>9} {previo['mediana_s'] * 1e3:>9.3f}ms "
+              f"{r['mediana_s'] * 1e3:>9.3f}ms {cambio:>+8.1%}{marca}")
+        if marca: regresiones.append(r)
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks del motor IEG")
+    parser.add_argument("--tamanos", default=",".join(map(str, TAMANOS_POR_DEFECTO)),
+                        help="tamaños de catálogo separados por comas")
+    parser.add_argument("--max-handlers", type=int, default=MAX_HANDLERS_POR_DEFECTO,
+                        help="tamaño máximo para medir los handlers HTTP (0 = no medirlos)")
+    parser.add_argument("--minimo", type=float, default=0.5, help="segundos mínimos medidos por caso")
+    parser.add_argument("--semilla", type=int, default=7)
+    parser.add_argument("--backend", choices=("memoria", "mongomock", "mongod"), default="memoria",
+                        help="almacenamiento de los handlers")
+    parser.add_argument("--mongo-uri", help="mongod local para --backend mongod (base bench*)")
+    parser.add_argument("--salida", default="bench_ieg.json")
+    parser.add_argument("--comparar", help="resultados anteriores (JSON) para detectar regresiones")
+    parser.add_argument("--umbral", type=float, default=0.10, help="empeoramiento tolerado (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    if args.backend == "mongod" and not args.mongo_uri:
+        parser.error("--backend mongod requiere --mongo-uri")
+    tamanos = [int(t) for t in args.tamanos.split(",") if t]
+    app = _preparar_app(args.backend, args.mongo_uri) if args.max_handlers and min(tamanos) <= args.max_handlers else None
+    marcas, perfiles = marcas_y_perfiles(args.semilla)
+
+    salida = {"metadatos": _metadatos(args), "resultados": []}
+    for tamano in tamanos:
+        print(f"Catálogo de {tamano} modelos", file=sys.stderr)
+        pcs, laptops = generar_modelos(tamano, marcas, perfiles, args.semilla)
+        if app is not None and tamano <= args.max_handlers:
+            print("  handlers", file=sys.stderr)
+            _cargar_catalogo(app, marcas, perfiles, pcs, laptops)
+            salida["resultados"] += _bench_handlers(app, tamano, perfiles, args.minimo)
+        salida["resultados"] += _bench_motor(tamano, pcs + laptops, pcs, laptops, perfiles, args.minimo)
+
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(salida, f, indent=2)
+    print(f"Resultados en {args.salida}", file=sys.stderr)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            anterior = json.load(f)
+        if comparar(salida, anterior, args.umbral):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
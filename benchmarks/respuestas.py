@@ -0,0 +1,119 @@
+"""
+Serialización y bytes enviados de las respuestas grandes sobre catálogos
+sintéticos (backend en memoria):
+  - json.*: el cuerpo de /api/reporte/perfil/<id> y de una página del ranking
+    (/api/comparar_resultados con cursor) con el JSON por defecto de Flask y
+    con ProveedorJSON (orjson si está instalado),
+  - comprimir.*: gzip (niveles 1 y 6) y brotli (si está instalado) de esos
+    cuerpos y del HTML de /inicio, con los bytes resultantes,
+  - handler.*: las mismas rutas con el test client pidiendo identity, gzip o br.
+
+Uso:
+  python -m benchmarks.respuestas --salida bench_respuestas.json
+  python -m benchmarks.respuestas --tamanos 1000,20000
+"""
+import argparse
+import gzip
+import json
+import sys
+
+from .ieg import medir, _resultado, _preparar_app, _cargar_catalogo, _metadatos
+from .sintetico import marcas_y_perfiles, generar_modelos
+
+TAMANOS_POR_DEFECTO = (1_000, 20_000, 100_000)
+LIMITE_PAGINA = 100
+
+
+def _cuerpos(app, cliente, perfil_id):
+    """{endpoint: (cuerpo JSON como objeto o None, bytes sin comprimir, mimetype, ruta, json de la petición)}."""
+    cuerpos = {}
+    reporte = cliente.get(f"/api/reporte/perfil/{perfil_id}")
+    cuerpos["reporte"] = (reporte.get_json(), reporte.get_data(), "GET", f"/api/reporte/perfil/{perfil_id}", None)
+
+    primera = cliente.post("/api/comparar_resultados", json={"perfil_id": perfil_id}).get_json()
+    peticion = {"perfil_id": perfil_id, "cursor": primera["siguiente_cursor"], "limite": LIMITE_PAGINA}
+    ranking = cliente.post("/api/comparar_resultados", json=peticion)
+    cuerpos["ranking"] = (ranking.get_json(), ranking.get_data(), "POST", "/api/comparar_resultados", peticion)
+
+    inicio = cliente.get("/inicio")
+    cuerpos["inicio"] = (None, inicio.get_data(), "GET", "/inicio", None)
+    return cuerpos
+
+
+def _bench(app, tamano, perfiles, minimo_s):
+    from flask.json.provider import DefaultJSONProvider
+    from app.respuestas import ProveedorJSON, comprimir, brotli
+
+    cliente = app.test_client()
+    with cliente.session_transaction() as sesion:
+        sesion["user_role"] = "usuario"
+        sesion["user_name"] = "benchmark"
+    cuerpos = _cuerpos(app, cliente, str(perfiles[0]["_id"]))
+    estandar, rapido = DefaultJSONProvider(app), ProveedorJSON(app)
+
+    codificaciones = [("gzip1", lambda d: gzip.compress(d, compresslevel=1, mtime=0)),
+                      ("gzip6", lambda d: comprimir(d, "gzip", nivel_gzip=6))]
+    if brotli is not None:
+        codificaciones.append(("br5", lambda d: comprimir(d, "br", calidad_brotli=5)))
+
+    resultados = []
+    for endpoint, (objeto, datos, metodo, ruta, peticion) in cuerpos.items():
+        print(f"  {endpoint} ({len(datos)} bytes)", file=sys.stderr)
+        if objeto is not None:
+            for nombre, proveedor in (("flask", estandar), ("orjson", rapido)):
+                r = _resultado(f"json.{endpoint}.{nombre}", tamano, 1,
+                               medir(lambda: proveedor.dumps(objeto), minimo_s))
+                r["bytes"] = len(proveedor.dumps(objeto).encode())
+                resultados.append(r)
+        for nombre, funcion in codificaciones:
+            r = _resultado(f"comprimir.{endpoint}.{nombre}", tamano, 1, medir(lambda: funcion(datos), minimo_s))
+            r["bytes"] = len(funcion(datos))
+            r["bytes_original"] = len(datos)
+            resultados.append(r)
+
+        for aceptada in ["identity", "gzip"] + (["br"] if brotli is not None else []):
+            def llamar():
+                respuesta = cliente.open(ruta, method=metodo, json=peticion, headers={"Accept-Encoding": aceptada})
+                assert respuesta.status_code == 200, respuesta.status_code
+                return respuesta
+            r = _resultado(f"handler.{endpoint}.{aceptada}", tamano, 1, medir(llamar, minimo_s))
+            r["bytes"] = len(llamar().get_data())
+            resultados.append(r)
+    return resultados
+
+
+def _resumen(resultados):
+    print(f"{'benchmark':36} {'tamaño':>9} {'mediana':>11} {'bytes':>11} {'ahorro':>8}")
+    for r in resultados:
+        ahorro = f"{1 - r['bytes'] / r['bytes_original']:>8.1%}" if r.get("bytes_original") else ""
+        print(f"{r['nombre']:36} {r['tamano']:>9} {r['mediana_s'] * 1e3:>9.3f}ms {r['bytes']:>11} {ahorro}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serialización JSON y compresión de respuestas")
+    parser.add_argument("--tamanos", default=",".join(map(str, TAMANOS_POR_DEFECTO)),
+                        help="tamaños de catálogo separados por comas")
+    parser.add_argument("--minimo", type=float, default=0.5, help="segundos mínimos medidos por caso")
+    parser.add_argument("--semilla", type=int, default=7)
+    parser.add_argument("--salida", default="bench_respuestas.json")
+    args = parser.parse_args(argv)
+    args.backend = "memoria"
+
+    app = _preparar_app("memoria", None)
+    marcas, perfiles = marcas_y_perfiles(args.semilla)
+    salida = {"metadatos": _metadatos(args), "resultados": []}
+    for tamano in (int(t) for t in args.tamanos.split(",") if t):
+        print(f"Catálogo de {tamano} modelos", file=sys.stderr)
+        pcs, laptops = generar_modelos(tamano, marcas, perfiles, args.semilla)
+        _cargar_catalogo(app, marcas, perfiles, pcs, laptops)
+        salida["resultados"] += _bench(app, tamano, perfiles, args.minimo)
+
+    _resumen(salida["resultados"])
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(salida, f, indent=2)
+    print(f"Resultados en {args.salida}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
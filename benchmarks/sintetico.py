@@ -0,0 +1,77 @@
+"""
+Catálogos sintéticos para los benchmarks, con distribuciones parecidas a las reales:
+  - rendimiento log-normal recortado a 10-100,
+  - precio, consumo y temperatura correlacionados con el rendimiento
+    (laptops más baratas por punto, con menos consumo y más temperatura),
+  - marcas con popularidad tipo Zipf y ~60% laptops,
+  - ~2% de atributos faltantes o no numéricos (como los datos cargados a mano).
+"""
+import numpy as np
+from bson import ObjectId
+
+N_MARCAS = 12
+N_PERFILES = 6
+PROPORCION_LAPTOPS = 0.6
+PROPORCION_ATIPICOS = 0.02
+
+
+def marcas_y_perfiles(semilla=7):
+    rng = np.random.default_rng(semilla)
+    marcas = [{"_id": ObjectId(), "nombre": f"Marca {i}"} for i in range(N_MARCAS)]
+    perfiles = []
+    for i in range(N_PERFILES):
+        pesos = rng.dirichlet(np.ones(4))
+        perfiles.append({
+            "_id": ObjectId(), "nombre": f"Perfil {i}",
+            "peso_rendimiento": round(float(pesos[0]), 3), "peso_precio": round(float(pesos[1]), 3),
+            "peso_consumo": round(float(pesos[2]), 3), "peso_temperatura": round(float(pesos[3]), 3),
+        })
+    return marcas, perfiles
+
+
+def _atributos(rng, n, laptop):
+    rendimiento = np.clip(rng.lognormal(np.log(45), 0.45, n), 10, 100).round()
+    factor_precio = 0.8 if laptop else 1.0
+    precio = (factor_precio * 250 * np.exp(rendimiento / 38) * rng.lognormal(0, 0.25, n)).round(2)
+    consumo = ((15 if laptop else 65) + rendimiento * (1.2 if laptop else 5) * rng.lognormal(0, 0.3, n)).round()
+    temperatura = np.clip(rng.normal((62 if laptop else 55) + rendimiento * 0.25, 6, n), 35, 99).round()
+    return {"rendimiento": rendimiento, "precio": precio, "consumo": consumo, "temperatura": temperatura}
+
+
+def _columna(rng, valores, entero):
+    """Lista de valores del documento: casi siempre el número; a veces None, "" o un string."""
+    columna = valores.astype(int).tolist() if entero else valores.tolist()
+    atipicos = np.flatnonzero(rng.random(len(valores)) < PROPORCION_ATIPICOS)
+    for i, forma in zip(atipicos, rng.integers(3, size=len(atipicos))):
+        columna[i] = (None, "", str(columna[i]))[forma]
+    return columna
+
+
+def generar_modelos(n, marcas, perfiles, semilla=7):
+    """(pcs, laptops): n documentos en total, con _id, listos para insertar."""
+    rng = np.random.default_rng(semilla)
+    n_laptops = int(n * PROPORCION_LAPTOPS)
+    popularidad = 1 / np.arange(1, len(marcas) + 1)
+    popularidad /= popularidad.sum()
+
+    colecciones = []
+    for laptop, cantidad in ((False, n - n_laptops), (True, n_laptops)):
+        atributos = {campo: _columna(rng, valores, campo != "precio")
+                     for campo, valores in _atributos(rng, cantidad, laptop).items()}
+        marca = rng.choice(len(marcas), size=cantidad, p=popularidad)
+        perfil = rng.integers(len(perfiles), size=cantidad)
+        prefijo = "LT" if laptop else "PC"
+        docs = []
+        for i in range(cantidad):
+            doc = {
+                "_id": ObjectId(),
+                "nombre": f"{marcas[marca[i]]['nombre']} {prefijo}-{i}",
+                "codigo_modelo": f"{prefijo}{i:07d}",
+                "marca_id": str(marcas[marca[i]]["_id"]),
+                "perfil_uso_id": str(perfiles[perfil[i]]["_id"]),
+            }
+            for campo, columna in atributos.items():
+                doc[campo] = columna[i]
+            docs.append(doc)
+        colecciones.append(docs)
+    return colecciones[0], colecciones[1]
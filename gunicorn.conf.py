@@ -0,0 +1,30 @@
+"""
+Configuración de gunicorn (se carga sola desde el directorio del Procfile).
+Cada worker crea sus propios clientes de MongoDB tras el fork y calienta los
+pools antes de aceptar peticiones. Las métricas de Prometheus usan el modo
+multiproceso: cada worker escribe en PROMETHEUS_MULTIPROC_DIR y /metrics
+agrega los valores de todos.
+"""
+import os
+import shutil
+
+# Debe definirse antes de que los workers importen prometheus_client
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/techadvisor-metricas")
+
+
+def on_starting(server):
+    directorio = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(directorio, ignore_errors=True)
+    os.makedirs(directorio, exist_ok=True)
+
+
+def post_worker_init(worker):
+    # Con el backend en memoria no hay pools que calentar
+    if os.getenv("STORAGE_BACKEND", "mongo") == "memoria": return
+    from app import mongo
+    mongo.calentar(worker.log)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)